@@ -25,6 +25,9 @@ Design Principles:
 
 * Key Job settomgs with defaults that can be overridden to accommodate clients needs
     For example: default_instant (undocumented in core docs) enables a job to be processed as soon as upload starts
+    Class defaults are captured by each instance at construction, instance settings are changed with its properties
+
+* One Encoding instance can be shared by a worker pool: threads, and processes forked after its creation
 
 
 """
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Chunked fan out of the actions accepting a list of mediaids.
+
+Encoding.com accepts a comma delimited list of mediaids for CancelMedia, GetStatus, ProcessMedia,
+RestartMedia*, StopMedia and UpdateMedia, but a single call holding thousands of mediaids tends to
+fail or time out.  Batcher splits any iterable of mediaids into chunks, dispatches the chunks
+concurrently and merges the responses and errors into one result keyed by mediaid.
+
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from time import perf_counter
+
+from encodingcom.deadline import current_deadline
+from encodingcom.encoding import Encoding
+from encodingcom.exception import EncodingErrors
+from encodingcom.response_helper import get_response, get_jobs
+
+
+class BatchResult(object):
+    """
+    Merged outcome of a batched action
+    """
+
+    def __init__(self):
+        # mediaid -> job status (GetStatus) or the response of the chunk holding the mediaid
+        self.responses = {}
+        # mediaid -> list of errors
+        self.errors = {}
+        # mediaids of errors raised by the transport (connection failures, timeouts), encoding.com never
+        # answered for them and a later call may succeed
+        self.unreachable = set()
+        self.calls = 0
+        self.elapsed = 0.0
+
+    def __len__(self) -> int:
+        return len(self.responses) + len(self.errors)
+
+    def merge(self, action: str, chunk: [str], response: dict):
+        """
+        Merge the response of a successful chunk
+
+        :param action: str
+            Encoding method name the chunk was dispatched to
+        :param chunk: [str]
+            mediaids of the chunk
+        :param response: dict
+            Entire response data of the call
+        :return: None
+        """
+        if action == 'get_status':
+            for job in get_jobs(response):
+                self.responses[str(job.get('id'))] = job
+            for media_id in chunk:
+                if media_id not in self.responses:
+                    self.errors[media_id] = ['No status returned for mediaid %s' % media_id]
+        else:
+            response = get_response(response)
+            for media_id in chunk:
+                self.responses[media_id] = response
+
+
+class Batcher(object):
+    """
+    Dispatch an Encoding action over any number of mediaids in concurrent chunks.
+
+    A chunk answered with an error response is split in two and retried, down to single mediaids,
+    so errors are isolated to the mediaids causing them.  The split only applies by default to the
+    actions safe to repeat (REPEATABLE_ACTIONS): encoding.com may have partially applied a failing chunk.
+    Transport errors (connection failures, timeouts) are reported for the whole chunk, never split, and
+    at most max_retries splits are made per dispatch so an outage does not multiply the calls.
+
+    The Deadline active in the dispatching thread applies to all the calls, retries included,
+    running out raises DeadlineExceeded from dispatch().
+
+    When no chunk size is given the chunk size is auto tuned: doubled while chunks answer
+    under target_latency, halved when they are slower or fail.
+    """
+
+    # actions accepting a comma delimited list of mediaids
+    ACTIONS = frozenset(['cancel_media', 'get_status', 'process_media', 'restart_media',
+                         'restart_media_errors', 'stop_media', 'update_media'])
+
+    # actions split and retried by default when a chunk fails
+    REPEATABLE_ACTIONS = frozenset(['get_status'])
+
+    def __init__(self, service: Encoding, chunk_size: int=0, workers: int=4,
+                 min_chunk_size: int=10, max_chunk_size: int=500, target_latency: float=5.0,
+                 max_retries: int=50):
+        """
+        :param service: Encoding
+            Encoding service class
+        :param chunk_size: int
+            Fixed number of mediaids per call, 0 (default) to auto tune
+        :param workers: int
+            Maximum number of concurrent calls
+        :param min_chunk_size: int
+            Lower bound of the auto tuned chunk size
+        :param max_chunk_size: int
+            Upper bound of the auto tuned chunk size
+        :param target_latency: float
+            Auto tuning target for the duration of a call (in seconds)
+        :param max_retries: int
+            Maximum number of failing chunks split and retried per dispatch,
+            the failing chunks past it are reported as is
+        """
+        self.service = service
+        self.workers = workers
+        self.auto = not chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.chunk_size = chunk_size or min_chunk_size
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+
+    def dispatch(self, action: str, media_ids, on_chunk=None, split: bool=None, **kwargs) -> BatchResult:
+        """
+        Dispatch the action for all the given mediaids.
+        mediaids are pulled from the iterable as chunks are dispatched, it is never materialized.
+
+        :param action: str
+            Encoding method name, one of Batcher.ACTIONS
+        :param media_ids:
+            Any iterable of mediaids (list, generator, ...)
+        :param on_chunk:
+            Callback invoked in the calling thread as each chunk completes, with arguments
+            chunk (list of mediaids), response (dict, None on error), errors (list, None on success)
+        :param split: bool
+            Split and retry the chunks answered with an error response, to isolate the failing mediaids.
+            Defaults to True for REPEATABLE_ACTIONS only, pass False for actions that are not safe to repeat
+        :param kwargs:
+            Arguments given to the action on top of the mediaid, ie. format for update_media
+        :return: merged result
+        :rtype: BatchResult
+        """
+        if action not in Batcher.ACTIONS:
+            raise ValueError('Action does not accept a list of mediaids: %s' % action)
+
+        if split is None:
+            split = action in Batcher.REPEATABLE_ACTIONS
+        retries_left = self.max_retries
+        call = getattr(self.service, action)
+        errors = self.service.transport.errors
+        deadline = current_deadline()
+        result = BatchResult()
+        started = perf_counter()
+
+        source = iter(media_ids)
+        retries = deque()
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            while True:
+                while len(pending) < self.workers:
+                    if retries:
+                        chunk = retries.popleft()
+                    elif not exhausted:
+                        chunk = [str(media_id) for media_id in islice(source, self.chunk_size)]
+                        if not chunk:
+                            exhausted = True
+                            continue
+                    else:
+                        break
+                    pending[executor.submit(self._call, call, chunk, kwargs, deadline, errors)] = chunk
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    elapsed, response, failures, transport_failure = future.result()
+                    result.calls += 1
+
+                    if failures is None:
+                        self._tune(elapsed, len(chunk))
+                        result.merge(action, chunk, response)
+                    elif split and not transport_failure and len(chunk) > 1 and retries_left > 0:
+                        retries_left -= 1
+                        self._tune(None, len(chunk))
+                        half = len(chunk) // 2
+                        retries.append(chunk[:half])
+                        retries.append(chunk[half:])
+                        continue
+                    else:
+                        self._tune(None, len(chunk))
+                        for media_id in chunk:
+                            result.errors[media_id] = failures
+                        if transport_failure:
+                            result.unreachable.update(chunk)
+
+                    if on_chunk:
+                        on_chunk(chunk=chunk, response=response, errors=failures)
+
+        result.elapsed = perf_counter() - started
+        return result
+
+    @staticmethod
+    def _call(call, chunk: [str], kwargs: dict, deadline=None, errors: tuple=()) -> (float, dict, list, bool):
+        """
+        Invoke the action for the chunk, run in a worker thread
+
+        :param errors: tuple
+            Transport exceptions reported as errors of the chunk (see Transport.errors)
+        :return: tuple of elapsed seconds, response (None on error), errors (None on success),
+            True if the errors come from the transport
+        :rtype: (float, dict, list, bool)
+        """
+        if deadline is not None:
+            # deadlines are per thread, the worker runs under the one of the dispatching thread
+            with deadline:
+                return Batcher._call(call, chunk, kwargs, errors=errors)
+
+        started = perf_counter()
+        try:
+            status, response = call(mediaid=chunk, **kwargs)
+        except EncodingErrors as ex:
+            return perf_counter() - started, None, ex.errors, False
+        except errors as ex:
+            return perf_counter() - started, None, [str(ex)], True
+        return perf_counter() - started, response, None, False
+
+    def _tune(self, elapsed: float, size: int):
+        """
+        Adjust the auto tuned chunk size after a chunk completes
+
+        :param elapsed: float
+            Duration of the call, None if the chunk failed
+        :param size: int
+            Number of mediaids of the chunk
+        :return: None
+        """
+        if not self.auto:
+            return
+        if elapsed is None or elapsed > self.target_latency:
+            self.chunk_size = max(self.min_chunk_size, self.chunk_size // 2)
+        elif size >= self.chunk_size:
+            self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
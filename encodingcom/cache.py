@@ -0,0 +1,269 @@
+"""
+Content addressed cache of finished transcodes.
+
+Re-submitting the same source with an identical format (re-ingests, partner re-deliveries) costs a full
+transcode every time.  The cache keys finished jobs by the source, a canonical hash of the format and the
+destinations, so Encoding.add_media(cache=..., ...) can hand back the previous finished mediaid instead of
+submitting a new job.
+
+The canonical hash ignores key order, value types (3000 and '3000'), keys set to encoding.com defaults,
+empty values, the order of multiple formats and the destinations (where the outputs are stored does not
+change what they are).  The destinations are part of the key nonetheless, each along with the format it
+belongs to: a cached job only serves a request expecting each of its outputs where the cached job stored it.
+
+Stores are pluggable: any object with get(key), put(key, entry) and delete(key) methods.
+MemoryResultStore and JsonFileResultStore are provided.
+
+"""
+
+from hashlib import sha256
+from json import dumps, load, dump
+from os import replace
+from os.path import exists
+from threading import Lock
+from time import time
+
+from encodingcom.encoding import Encoding
+from encodingcom.exception import EncodingErrors
+
+
+# encoding.com defaults, a format stating them explicitly is the same format as one omitting them
+FORMAT_DEFAULTS = {
+    'keep_aspect_ratio': 'yes',
+    'add_meta': 'no',
+    'hint': 'no',
+    'turbo': 'no',
+    'two_pass': 'no',
+    'cbr': 'no',
+    'strip_chapters': 'no',
+    'rotate': 'def',
+    'set_rotate': 'def',
+}
+
+# keys not affecting the transcode outputs
+IGNORED_KEYS = frozenset(['destination'])
+
+
+def canonical_format(format) -> list:
+    """
+    Canonical representation of a format (dict) or multiple formats (list of dicts)
+
+    :param format:
+        Format dict or list of format dicts as given to add_media
+    :return: list of canonical formats, sorted
+    :rtype: list
+    """
+    formats = format if isinstance(format, list) else [format]
+    result = [_canonical(item) for item in formats]
+    return sorted(result, key=lambda item: dumps(item, sort_keys=True))
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key in IGNORED_KEYS:
+                continue
+            item = _canonical(item)
+            if item in ('', [], {}, None) or FORMAT_DEFAULTS.get(key) == item:
+                continue
+            result[key] = item
+        return result
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    return str(value).strip()
+
+
+def format_hash(format) -> str:
+    """
+    :param format:
+        Format dict or list of format dicts as given to add_media
+    :return: hex digest of the canonical format
+    :rtype: str
+    """
+    return sha256(dumps(canonical_format(format), sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cache_key(source, format) -> str:
+    """
+    :param source:
+        Source url (or list of source urls) as given to add_media
+    :param format:
+        Format dict or list of format dicts as given to add_media
+    :return: key of the (source, formats and their destinations) in the result stores
+    :rtype: str
+    """
+    if isinstance(source, (list, tuple)):
+        source = '\n'.join(str(item) for item in source)
+    # each canonical format paired with its own destinations, swapping destinations between formats is a miss
+    outputs = sorted(dumps([_canonical(item), sorted(_destinations(item))], sort_keys=True)
+                     for item in (format if isinstance(format, list) else [format]))
+    return '%s|%s' % (sha256('\n'.join(outputs).encode('utf-8')).hexdigest(), str(source).strip())
+
+
+def get_destinations(format) -> [str]:
+    """
+    :param format:
+        Format dict or list of format dicts
+    :return: all the destinations detailed in the format(s)
+    :rtype: list
+    """
+    result = []
+    for item in (format if isinstance(format, list) else [format]):
+        result.extend(_destinations(item))
+    return result
+
+
+def _destinations(format: dict) -> [str]:
+    destination = format.get('destination')
+    if isinstance(destination, list):
+        return [str(item).strip() for item in destination if item]
+    return [str(destination).strip()] if destination else []
+
+
+class MemoryResultStore(object):
+    """
+    In process result store
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> dict:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class JsonFileResultStore(MemoryResultStore):
+    """
+    Result store persisted to a JSON file, rewritten (atomically) on each change
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        if exists(path):
+            with open(path) as store:
+                self._entries = load(store)
+
+    def put(self, key: str, entry: dict):
+        super().put(key, entry)
+        self._save()
+
+    def delete(self, key: str):
+        super().delete(key)
+        self._save()
+
+    def _save(self):
+        with self._lock:
+            temp = self.path + '.tmp'
+            with open(temp, 'w') as store:
+                dump(self._entries, store)
+            replace(temp, self.path)
+
+
+class ResultCache(object):
+    """
+    Maps (source, canonical format) to a previous Finished mediaid and its destinations.
+
+    Jobs submitted through Encoding.add_media(cache=...) are remembered as pending,
+    and promoted to the store once finished(), ie. from a Poller callback:
+
+        Poller.poll_till_status(service, media_id, callback=cache.poller_callback)
+    """
+
+    def __init__(self, store=None, ttl: float=14 * 24 * 3600, validate: bool=False):
+        """
+        :param store:
+            Result store, MemoryResultStore if not specified
+        :param ttl: float
+            Seconds an entry is served, defaults to 2 weeks (the lifespan of mediaids at encoding.com)
+        :param validate: bool
+            Check with get_media_info that the cached mediaid still exists before serving it
+        """
+        self.store = store if store is not None else MemoryResultStore()
+        self.ttl = ttl
+        self.validate = validate
+        self._pending = {}
+        self._lock = Lock()
+
+    def lookup(self, service, source, format) -> dict:
+        """
+        :param service: Encoding
+            Encoding service class, used for validation
+        :param source:
+            Source as given to add_media
+        :param format:
+            Format as given to add_media
+        :return: cached entry {'mediaid', 'destinations', 'finished'}, None on a miss
+        :rtype: dict
+        """
+        key = cache_key(source, format)
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+
+        if time() - entry['finished'] > self.ttl:
+            self.store.delete(key)
+            return None
+
+        if self.validate:
+            try:
+                service.get_media_info(False, mediaid=entry['mediaid'])
+            except EncodingErrors:
+                self.store.delete(key)
+                return None
+
+        return entry
+
+    def submitted(self, media_id: str, source, format):
+        """
+        Remember a submitted job until it is finished, a missing media_id (no MediaID in the response)
+        is ignored
+
+        :param media_id: str
+        :param source:
+            Source as given to add_media
+        :param format:
+            Format as given to add_media
+        :return: None
+        """
+        if not media_id:
+            return
+        with self._lock:
+            self._pending[media_id] = (cache_key(source, format), get_destinations(format))
+
+    def finished(self, media_id: str, status: str='Finished'):
+        """
+        Promote a submitted job to the store once Finished, forget it on any other exit status
+
+        :param media_id: str
+        :param status: str
+            Exit status of the job
+        :return: None
+        """
+        with self._lock:
+            pending = self._pending.pop(media_id, None)
+        if pending and status == 'Finished':
+            key, destinations = pending
+            self.store.put(key, {'mediaid': media_id, 'destinations': destinations, 'finished': time()})
+
+    def poller_callback(self, **kwargs):
+        """
+        Poller callback promoting jobs as they reach an exit status
+
+        :return: None
+        """
+        if kwargs['status'] in Encoding.EXIT_STATUSES:
+            self.finished(kwargs['media_id'], kwargs['status'])
@@ -0,0 +1,259 @@
+"""
+Record/replay of the exchanges with encoding.com, for deterministic offline runs.
+
+RecordingEncoding sends the requests to encoding.com as usual and appends each exchange (query, HTTP status,
+response, latency) to a Cassette.  ReplayEncoding answers from a Cassette without any network access:
+at full speed for repeatable CPU benchmarks, or sleeping the recorded latencies for realistic
+concurrency benchmarks.
+
+Credentials never reach the cassette: userid/userkey are replaced by a placeholder, as are the
+user:password parts of the urls (ie. ftp sources), in the queries and the responses.
+
+Cassettes are JSON lines, one exchange per line, gzip compressed when the file name ends with .gz.
+The live tests record or replay one through the environment (see from_environment):
+    ENCODING_RECORD=tests.jsonl.gz python -m pytest encodingcom/tests/test_positive.py
+    ENCODING_REPLAY=tests.jsonl.gz python -m pytest encodingcom/tests/test_positive.py
+
+"""
+
+from atexit import register
+from collections import deque
+from gzip import open as gzip_open
+from json import dumps, loads
+from os import getenv
+from re import compile
+from threading import Lock
+from time import perf_counter, sleep
+
+from encodingcom.deadline import current_deadline
+from encodingcom.encoding import Encoding
+from encodingcom.exception import ReplayMiss
+
+
+RECORD_ENV = 'ENCODING_RECORD'
+REPLAY_ENV = 'ENCODING_REPLAY'
+
+# query keys holding credentials
+CREDENTIAL_KEYS = frozenset(['userid', 'userkey'])
+SCRUBBED = 'SCRUBBED'
+
+# user:password@ of a url
+_URL_CREDENTIALS = compile(r'(?<=://)[^/@\s"]+@')
+
+
+def scrub(value):
+    """
+    :param value:
+        Query or response, any JSON compatible value
+    :return: copy of the value without credentials
+    """
+    if isinstance(value, dict):
+        return {key: SCRUBBED if key in CREDENTIAL_KEYS else scrub(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item) for item in value]
+    if isinstance(value, str):
+        return _URL_CREDENTIALS.sub(SCRUBBED + '@', value)
+    return value
+
+
+def query_key(query: dict) -> str:
+    """
+    :param query: dict
+        Query as sent to encoding.com, credentials included or not
+    :return: canonical form of the scrubbed query, the exchanges of a cassette are matched on it
+    :rtype: str
+    """
+    return dumps(scrub(query), sort_keys=True, separators=(',', ':'))
+
+
+class Cassette(object):
+    """
+    Ordered exchanges with encoding.com
+    """
+
+    def __init__(self, path: str=None):
+        """
+        :param path: str
+            File the exchanges are saved to by default
+        """
+        self.path = path
+        # [query key, status, response (JSON), latency in seconds]
+        self.exchanges = []
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.exchanges)
+
+    def append(self, query: dict, status: int, response: dict, latency: float):
+        """
+        Record an exchange, scrubbed of credentials
+
+        :param query: dict
+        :param status: int
+            HTTP status code
+        :param response: dict
+            Decoded response
+        :param latency: float
+            Seconds the exchange took
+        :return: None
+        """
+        exchange = [query_key(query), status, dumps(scrub(response), separators=(',', ':')), round(latency, 6)]
+        with self._lock:
+            self.exchanges.append(exchange)
+
+    def save(self, path: str=None):
+        """
+        :param path: str
+            Destination file, defaults to the path of the cassette
+        :return: None
+        """
+        path = path or self.path
+        with self._lock:
+            lines = [dumps({'q': loads(key), 's': status, 'r': loads(response), 'l': latency},
+                           separators=(',', ':'))
+                     for key, status, response, latency in self.exchanges]
+        with _open(path, 'wt') as out:
+            for line in lines:
+                out.write(line + '\n')
+
+    @staticmethod
+    def load(path: str) -> 'Cassette':
+        """
+        :param path: str
+        :return: cassette holding the exchanges saved in the file
+        :rtype: Cassette
+        """
+        cassette = Cassette(path)
+        with _open(path, 'rt') as lines:
+            for line in lines:
+                if line.strip():
+                    exchange = loads(line)
+                    cassette.exchanges.append([query_key(exchange['q']), exchange['s'],
+                                               dumps(exchange['r'], separators=(',', ':')), exchange['l']])
+        return cassette
+
+
+class RecordingEncoding(Encoding):
+    """
+    Encoding recording every exchange with encoding.com to a cassette
+    """
+
+    def __init__(self, user_id: str, user_key: str, cassette: Cassette=None, **kwargs):
+        """
+        :param user_id: str
+        :param user_key: str
+        :param cassette: Cassette
+            Cassette the exchanges are appended to, a new one when not specified
+        :param kwargs:
+            Other Encoding arguments
+        """
+        super().__init__(user_id, user_key, **kwargs)
+        self.cassette = Cassette() if cassette is None else cassette
+
+    def _post_request(self, json_data, header='') -> (int, dict):
+        start = perf_counter()
+        status, content = super()._post_request(json_data, header)
+        self.cassette.append(loads(json_data)['query'], status, content, perf_counter() - start)
+        return status, content
+
+
+class ReplayEncoding(Encoding):
+    """
+    Encoding answering from a cassette, no request reaches encoding.com.
+
+    Each query is answered with the next exchange recorded for the same query, so successive GetStatus
+    calls replay the recorded progression of the job, and the last one is repeated once they ran out.
+    """
+
+    def __init__(self, cassette: Cassette, user_id: str=SCRUBBED, user_key: str=SCRUBBED,
+                 realtime: bool=False, speed: float=1.0, **kwargs):
+        """
+        :param cassette: Cassette
+            Recorded exchanges
+        :param user_id: str
+            Any, credentials are not part of the recorded queries
+        :param user_key: str
+            Any, credentials are not part of the recorded queries
+        :param realtime: bool
+            Sleep the recorded latency of each exchange (an active Deadline still applies),
+            answer right away otherwise
+        :param speed: float
+            Factor applied to the replay speed in realtime, ie. 2.0 sleeps half of the recorded latencies
+        :param kwargs:
+            Other Encoding arguments
+        """
+        super().__init__(user_id, user_key, **kwargs)
+        self.cassette = cassette
+        self.realtime = realtime
+        self.speed = speed
+
+        # query key -> exchanges left, last exchange served
+        self._exchanges = {}
+        for key, status, response, latency in cassette.exchanges:
+            self._exchanges.setdefault(key, [deque(), None])[0].append((status, response, latency))
+        self._lock = Lock()
+        self.replayed = 0
+
+    def _post_request(self, json_data, header='') -> (int, dict):
+        key = query_key(loads(json_data)['query'])
+        with self._lock:
+            entry = self._exchanges.get(key)
+            if entry is None:
+                raise ReplayMiss(key)
+            if entry[0]:
+                entry[1] = entry[0].popleft()
+            status, response, latency = entry[1]
+            self.replayed += 1
+
+        if self.realtime and latency:
+            delay = latency / self.speed
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.sleep(delay)
+            else:
+                sleep(delay)
+
+        # decoded on each call, as a live response is
+        return status, loads(response)
+
+
+def from_environment(user_id: str, user_key: str, **kwargs) -> Encoding:
+    """
+    Encoding for the live tests and tools: replays the cassette named by ENCODING_REPLAY,
+    records to the cassette named by ENCODING_RECORD (saved at exit), talks to encoding.com otherwise
+
+    :param user_id: str
+    :param user_key: str
+    :param kwargs:
+        Other Encoding arguments
+    :return: service
+    :rtype: Encoding
+    """
+    path = getenv(REPLAY_ENV)
+    if path:
+        # one service per cassette, the recorded progression of the jobs carries across the tests
+        service = _replays.get(path)
+        if service is None:
+            service = _replays[path] = ReplayEncoding(Cassette.load(path), **kwargs)
+        return service
+
+    path = getenv(RECORD_ENV)
+    if path:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+            register(cassette.save)
+        return RecordingEncoding(user_id, user_key, cassette=cassette, **kwargs)
+
+    return Encoding(user_id, user_key, **kwargs)
+
+
+# path -> cassette, or replaying service, shared by the calls of from_environment
+_cassettes = {}
+_replays = {}
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip_open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
@@ -0,0 +1,73 @@
+"""
+encodingcom command, one entry point for the command line tools of this package.
+`python -m encodingcom.cli` runs it as well.
+
+    encodingcom ls       List the medias in the encoding.com queue (encodingcom/cli/ls_queue.py)
+    encodingcom monitor  Follow jobs until done (encodingcom/cli/job_status_monitor.py)
+    encodingcom cancel   Cancel, stop or restart medias (encodingcom/cli/cancel_media.py)
+    encodingcom status   Report the status of mediaids (encodingcom/cli/media_status.py)
+    encodingcom submit   Submit sources with AddMedia (encodingcom/cli/submit_media.py)
+
+The command is run thousands of times a day from cron and shell loops, startup time matters:
+only the module of the requested subcommand is imported, once the subcommand is known, and requests is
+only imported once the first request is sent.  See tools/startup_benchmark.py.
+
+Credentials default to the ENCODING_USER_ID/ENCODING_USER_KEY environment variables, or to the
+~/.encodingcom config file (ENCODINGCOM_CONFIG to use another one):
+    [encodingcom]
+    user_id = 1234
+    user_key = abcde
+
+USAGE:
+    encodingcom ls --verbose --state=Error
+    encodingcom status --mediaid=123,456
+    encodingcom submit --help
+
+"""
+
+from argparse import ArgumentParser, REMAINDER, RawDescriptionHelpFormatter
+from importlib import import_module
+
+
+# subcommand -> module implementing add_arguments(parser) and main(args), help
+COMMANDS = {
+    'ls': ('encodingcom.cli.ls_queue', 'List the medias in the encoding.com queue'),
+    'monitor': ('encodingcom.cli.job_status_monitor', 'Follow jobs until done, or a dashboard of many jobs'),
+    'cancel': ('encodingcom.cli.cancel_media', 'Cancel, stop or restart a media, or the medias selected by filters'),
+    'status': ('encodingcom.cli.media_status', 'Report the status of mediaids'),
+    'submit': ('encodingcom.cli.submit_media', 'Submit sources with AddMedia'),
+}
+
+
+def get_parser() -> ArgumentParser:
+    """
+    :return: parser of the subcommand name, the arguments of the subcommand are parsed by its own parser
+    :rtype: ArgumentParser
+    """
+    parser = ArgumentParser(prog='encodingcom', formatter_class=RawDescriptionHelpFormatter,
+                            description='encoding.com command line tools',
+                            epilog='commands:\n' + ''.join('  %-10s %s\n' % (name, command[1])
+                                                           for name, command in COMMANDS.items()) +
+                                   '\nencodingcom <command> --help details the arguments of a command')
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help='One of: ' + ', '.join(COMMANDS))
+    parser.add_argument('arguments', nargs=REMAINDER, help='Arguments of the command')
+    return parser
+
+
+def main(argv: [str]=None) -> int:
+    """
+    Console entry point
+
+    :param argv: [str]
+        Command line arguments, defaults to sys.argv
+    :return: exit status
+    :rtype: int
+    """
+    args = get_parser().parse_args(argv)
+    name, description = COMMANDS[args.command]
+
+    # deferred until the subcommand is known, --help of the command does not load the others
+    module = import_module(name)
+    parser = ArgumentParser(prog='encodingcom ' + args.command, description=description)
+    module.add_arguments(parser)
+    return module.main(parser.parse_args(args.arguments)) or 0
@@ -0,0 +1,11 @@
+"""
+python -m encodingcom.cli, same as the encodingcom command
+
+"""
+
+from encodingcom.cli import main
+
+
+if __name__ == '__main__':
+
+    exit(main())
@@ -0,0 +1,257 @@
+#! /usr/bin/env python
+"""
+Cancel a specified mediaid job along with all its children.
+Due to minimum documentation on encoding.com.
+
+CancelMedia action invoked on a
+
+
+
+
+
+Provided for the following purposes:
+1.) CLI/API control of cancelling a specific mediaid job... use at your own risk.
+2.) Support a function test workflow
+3.) Education purposes as cancel media is unclear for jobs that are completed as this is undocumented.
+
+Bulk mode selects the medias from GetMediaList by state, age or source pattern,
+and applies the desired action (cancel, stop, restart, restart-errors) to all of them.
+Media ids are dispatched in chunks, with several chunks in flight at once.
+A checkpoint file records the media ids already handled, so an interrupted run can be resumed
+without redoing the work.
+
+USAGE:
+    python -m encodingcom.cli.cancel_media --user=1234 --key=abcde
+    * Cancels the latest mediaid in the queue
+
+    python -m encodingcom.cli.cancel_media --user=1234 --key=abcde --mediaid=123
+    * Cancels the mediaid with the value of 123
+
+    python -m encodingcom.cli.cancel_media --user=1234 --key=abcde --state=Error --action=restart-errors --dry-run
+    * Lists the medias in error that would be restarted
+
+    python -m encodingcom.cli.cancel_media --user=1234 --key=abcde --state=Waitingforencoder --max-age=2 --action=stop \
+        --checkpoint=stop.ckpt
+    * Stops the medias waiting for an encoder created in the last 2 hours, resumable with the same checkpoint
+
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from os.path import exists
+from sys import stderr
+
+from encodingcom.batch import Batcher
+from encodingcom.encoding import Encoding
+from encodingcom.encoding_utils import get_latest_media, iter_medias
+from encodingcom.cli.tool_utils import FILTER_ARGUMENTS, credential_arguments, get_filter, has_filter, \
+    register_arguments
+
+
+# bulk action name -> Encoding method name
+ACTIONS = {
+    'cancel': 'cancel_media',
+    'stop': 'stop_media',
+    'restart': 'restart_media',
+    'restart-errors': 'restart_media_errors',
+}
+
+
+def add_arguments(parser: ArgumentParser):
+    """
+    Add the arguments of the tool, shared by the stand alone script and the encodingcom command
+
+    :param parser: ArgumentParser
+    :return: None
+    """
+
+    arguments = {
+        '--mediaid': {
+            'required': False,
+            # not specified... reflect as this will use the latest encoding mediaid later in the workflow
+            'default': '',
+            'help': 'Detail desired media id desired.  '
+                    'If not specified, use the latest media in the job queue of encoding.com'
+        },
+
+        '--action': {
+            'required': False,
+            'choices': sorted(ACTIONS),
+            'default': 'cancel',
+            'help': 'Action applied to the selected medias (defaults to cancel)'
+        },
+
+        '--dry-run': {
+            'required': False,
+            'action': 'store_true',
+            'help': 'Only list the selected media ids, no action is dispatched'
+        },
+
+        '--checkpoint': {
+            'required': False,
+            'help': 'File recording the media ids already handled, media ids found in it are skipped'
+        },
+
+        '--chunk-size': {
+            'required': False,
+            'type': int,
+            'default': 50,
+            'help': 'Number of media ids per call, 0 to auto tune (defaults to 50)'
+        },
+
+        '--workers': {
+            'required': False,
+            'type': int,
+            'default': 4,
+            'help': 'Maximum number of concurrent calls to encoding.com (defaults to 4)'
+        },
+
+    }
+
+    arguments.update(credential_arguments())
+    arguments.update(FILTER_ARGUMENTS)
+    register_arguments(parser, arguments)
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    parser = ArgumentParser()
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def load_checkpoint(path: str) -> set:
+    """
+    :param path: str
+        Checkpoint file, one handled media id per line
+    :return: set of media ids already handled, empty if there is no checkpoint
+    :rtype: set
+    """
+    if not path or not exists(path):
+        return set()
+    with open(path) as checkpoint:
+        return set(line.strip() for line in checkpoint if line.strip())
+
+
+def bulk_action(encoding: Encoding, action: str, media_ids, chunk_size: int=50, workers: int=4,
+                checkpoint: str='', progress=None) -> dict:
+    """
+    Apply the action to all the given media ids, in chunks dispatched concurrently.
+    Each successful chunk is appended to the checkpoint file as soon as it completes.
+
+    :param encoding: Encoding
+        Encoding service class
+    :param action: str
+        One of ACTIONS
+    :param media_ids:
+        Iterable of media ids
+    :param chunk_size: int
+        Number of media ids per call, 0 to auto tune
+    :param workers: int
+        Maximum number of concurrent calls
+    :param checkpoint: str
+        Checkpoint file path, media ids found in it are skipped
+    :param progress:
+        Callback invoked after each chunk with done, failed counts
+    :return: dict of media id -> errors for the media ids that failed
+    :rtype: dict
+    """
+    done_ids = load_checkpoint(checkpoint)
+    counts = {'done': 0, 'failed': 0}
+
+    checkpoint_file = open(checkpoint, 'a') if checkpoint else None
+
+    def on_chunk(chunk: [str], response: dict, errors: list):
+        if errors is None:
+            counts['done'] += len(chunk)
+            if checkpoint_file:
+                checkpoint_file.write(''.join(media_id + '\n' for media_id in chunk))
+                checkpoint_file.flush()
+        else:
+            counts['failed'] += len(chunk)
+        if progress:
+            progress(counts['done'], counts['failed'])
+
+    try:
+        batcher = Batcher(encoding, chunk_size=chunk_size, workers=workers)
+        # a failing chunk is reported as is, retrying its halves would repeat the action
+        result = batcher.dispatch(ACTIONS[action], (media_id for media_id in media_ids if media_id not in done_ids),
+                                  on_chunk=on_chunk, split=False)
+    finally:
+        if checkpoint_file:
+            checkpoint_file.close()
+
+    return result.errors
+
+
+def print_progress(done: int, failed: int):
+    """
+    Report the bulk progress on a single stderr line
+
+    :param done: int
+    :param failed: int
+    :return: None
+    """
+    stderr.write('\rdone: %d  failed: %d' % (done, failed))
+    stderr.flush()
+
+
+def main(args: Namespace, encoding: Encoding=None):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :param encoding: Encoding
+        Encoding service class, built from the credential arguments if not specified
+    :return:
+    """
+
+    args_dict = vars(args)
+
+    if encoding is None:
+        encoding = Encoding(user_id=args_dict['user'], user_key=args_dict['key'])
+
+    if has_filter(args_dict):
+        media_ids = [media['mediaid'] for media in iter_medias(encoding, get_filter(args_dict))]
+        skipped = load_checkpoint(args_dict['checkpoint'])
+
+        if args_dict['dry_run']:
+            for media_id in media_ids:
+                print('%s %s%s' % (args_dict['action'], media_id, ' (done)' if media_id in skipped else ''))
+            print('%d medias selected, %d already in checkpoint' %
+                  (len(media_ids), len(skipped.intersection(media_ids))), file=stderr)
+            return
+
+        errors = bulk_action(encoding, args_dict['action'], media_ids,
+                             chunk_size=args_dict['chunk_size'], workers=args_dict['workers'],
+                             checkpoint=args_dict['checkpoint'], progress=print_progress)
+        print('', file=stderr)
+        for media_id in sorted(errors):
+            print('*** %s failed for %s: %s' % (args_dict['action'], media_id,
+                                                 ', '.join(str(error) for error in errors[media_id])),
+                  file=stderr)
+        return
+
+    if args_dict['mediaid']:
+        media_id = args_dict['mediaid']
+    else:
+        media_id = get_latest_media(encoding)['mediaid']
+        print('MediaId not specified, cancelling the media id in the queue: %s' % media_id)
+
+    if args_dict['dry_run']:
+        print('%s %s' % (args_dict['action'], media_id))
+        return
+
+    getattr(encoding, ACTIONS[args_dict['action']])(mediaid=[media_id])
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
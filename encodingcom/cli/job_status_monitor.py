@@ -0,0 +1,291 @@
+#! /usr/bin/env python
+"""
+Monitor the job status for a given mediaid, or the latest mediaid job in the queue.
+
+If the job has finished or exited, the last known state (Finished, Error, Stopped) is reflected.
+Otherwise it will monitor and report the state until in a completed success/error state of the job
+
+USAGE:
+    python -m encodingcom.cli.job_status_monitor --user=1234 --key=abcde
+    Monitor the latest mediaid added to the queue
+
+    python -m encodingcom.cli.job_status_monitor --user=1234 --key=abcde --mediaid=123
+    Monitor a specific job with mediaid=123
+
+    python -m encodingcom.cli.job_status_monitor --user=1234 --key=abcde > output.json
+
+Dashboard mode follows a set of mediaids with one batched GetStatus poll per tick,
+and draws a compact table of state, time in state and progress.
+The table is redrawn at most once per --refresh seconds and shows at most --max-rows jobs
+(the ones longest in their state first), remaining jobs are summarized by state.
+
+    python -m encodingcom.cli.job_status_monitor --user=1234 --key=abcde --mediaids=123,124,125
+    Dashboard of the given mediaids
+
+    python -m encodingcom.cli.job_status_monitor --user=1234 --key=abcde --all
+    Dashboard of all the jobs in the queue not yet in a final state
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from pprint import PrettyPrinter
+from sys import stdout
+from time import time
+
+from encodingcom.encoding import Encoding
+from encodingcom.encoding_utils import get_latest_media, iter_medias, media_filter
+from encodingcom.poller import Poller
+from encodingcom.profiling import measure
+from encodingcom.state_tracker import StateTracker
+from encodingcom.cli.tool_utils import PROFILE_ARGUMENTS, credential_arguments, register_arguments, start_profiling
+
+
+def add_arguments(parser: ArgumentParser):
+    """
+    Add the arguments of the tool, shared by the stand alone script and the encodingcom command
+
+    :param parser: ArgumentParser
+    :return: None
+    """
+
+    arguments = {
+        '--mediaid': {
+            'required': False,
+            # not specified... reflect as this will use the latest encoding mediaid later in the workflow
+            'default': '',
+            'help': 'Detail desired media id desired.  '
+                    'If not specified, use the latest media in the job queue of encoding.com'
+        },
+
+        '--interval': {
+            'required': False,
+            'default': 5,
+            'help': 'Designates an interval to poll encoding.com for the job status details (in seconds)\n'
+                    'Defaults to 5 seconds if not specified'
+        },
+
+        '--mediaids': {
+            'required': False,
+            'help': 'Comma delimited list of media ids to follow in dashboard mode'
+        },
+
+        '--all': {
+            'required': False,
+            'action': 'store_true',
+            'help': 'Dashboard mode following all the jobs of the queue not yet in a final state'
+        },
+
+        '--refresh': {
+            'required': False,
+            'type': float,
+            'default': 2.0,
+            'help': 'Minimum number of seconds between two dashboard redraws (defaults to 2)'
+        },
+
+        '--max-rows': {
+            'required': False,
+            'type': int,
+            'default': 40,
+            'help': 'Maximum number of jobs drawn in the dashboard (defaults to 40)'
+        },
+
+    }
+
+    arguments.update(credential_arguments())
+    arguments.update(PROFILE_ARGUMENTS)
+    register_arguments(parser, arguments)
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    parser = ArgumentParser()
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def pretty_print_response(**kwargs):
+    """
+    Use Python standard pprint to output to a nice formatted response from the differing status calls
+
+    :param: **kwargs
+        Key items in the kwargs:
+        media_id: MediaID associated with the Job
+        status: Status / state of the job
+        response:
+    :return:
+    """
+    with measure('job_status_monitor', 'output'):
+        print('\nMedia ID: %s' % kwargs['media_id'])
+        print(' ==== Status: %s =====' % kwargs['status'])
+
+        pretty = PrettyPrinter()
+        pretty.pprint(kwargs['response'])
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Compact representation of a duration, ie. 45s, 12m05s, 3h20m
+
+    :param seconds: float
+    :return: formatted duration
+    :rtype: str
+    """
+    seconds = int(seconds or 0)
+    if seconds < 60:
+        return '%ds' % seconds
+    if seconds < 3600:
+        return '%dm%02ds' % (seconds // 60, seconds % 60)
+    return '%dh%02dm' % (seconds // 3600, (seconds % 3600) // 60)
+
+
+class Dashboard(object):
+    """
+    Rate limited terminal table of the jobs followed by Poller.poll_statuses()
+    """
+
+    # ANSI: move cursor home and clear the screen
+    CLEAR = '\033[H\033[2J'
+
+    def __init__(self, refresh: float=2.0, max_rows: int=40, out=stdout):
+        """
+        :param refresh: float
+            Minimum number of seconds between two draws
+        :param max_rows: int
+            Maximum number of job rows drawn
+        :param out:
+            File like object to draw to, the screen is only cleared on a terminal
+        """
+        self.refresh = refresh
+        self.max_rows = max_rows
+        self.out = out
+        self.last_draw = 0.0
+        self.clear = out.isatty()
+        self.jobs = {}
+
+    def tick(self, tracker: StateTracker, jobs: dict, force: bool=False):
+        """
+        Tick callback for Poller.poll_statuses(), draws the table unless drawn less than refresh seconds ago
+
+        :param tracker: StateTracker
+        :param jobs: dict
+            media_id -> last job status dict
+        :param force: bool
+            Draw regardless of the refresh rate
+        :return: None
+        """
+        self.jobs = jobs
+        now = time()
+        if not force and now - self.last_draw < self.refresh:
+            return
+        self.last_draw = now
+        with measure('job_status_monitor', 'render'):
+            text = self.render(tracker, jobs, now)
+        with measure('job_status_monitor', 'output'):
+            self.out.write(text)
+            self.out.flush()
+
+    def render(self, tracker: StateTracker, jobs: dict, now: float) -> str:
+        """
+        Build the table text
+
+        :param tracker: StateTracker
+        :param jobs: dict
+            media_id -> last job status dict
+        :param now: float
+            Reference time (epoch seconds)
+        :return: table text
+        :rtype: str
+        """
+        # jobs still running first, the ones the longest in their state at the top
+        media_ids = sorted(tracker.media_ids(),
+                           key=lambda media_id: (tracker.status(media_id) in Encoding.EXIT_STATUSES,
+                                                 tracker.entered(media_id)))
+
+        lines = [self.CLEAR if self.clear else '\n']
+        counts = tracker.counts()
+        lines.append('%d jobs  ' % len(tracker) +
+                     '  '.join('%s: %d' % (state, counts[state]) for state in sorted(counts)) + '\n')
+        lines.append('%-12s %-18s %10s %8s\n' % ('MEDIAID', 'STATE', 'IN STATE', 'PROGRESS'))
+
+        for media_id in media_ids[:self.max_rows]:
+            progress = jobs.get(media_id, {}).get('progress', '')
+            lines.append('%-12s %-18s %10s %8s\n' % (media_id, tracker.status(media_id),
+                                                      format_duration(tracker.time_in_state(media_id, now)),
+                                                      '%s%%' % progress if progress != '' else ''))
+
+        hidden = len(media_ids) - self.max_rows
+        if hidden > 0:
+            lines.append('... %d more jobs not shown\n' % hidden)
+
+        return ''.join(lines)
+
+
+def dashboard(encoding: Encoding, media_ids: [str], interval: float, refresh: float, max_rows: int):
+    """
+    Follow the given media ids until all reach a final state, drawing a dashboard along the way
+
+    :param encoding: Encoding
+        Encoding service class
+    :param media_ids: [str]
+        Media ids to follow
+    :param interval: float
+        Interval between each batched poll
+    :param refresh: float
+        Minimum number of seconds between two dashboard redraws
+    :param max_rows: int
+        Maximum number of jobs drawn
+    :return: None
+    """
+    board = Dashboard(refresh=refresh, max_rows=max_rows)
+    tracker = Poller.poll_statuses(encoding, media_ids, tick_callback=board.tick, interval=interval)
+    # final state of every job, regardless of the refresh rate
+    board.tick(tracker, board.jobs, force=True)
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+
+    args_dict = vars(args)
+    start_profiling(args_dict)
+
+    encoding = Encoding(user_id=args_dict['user'], user_key=args_dict['key'])
+
+    if args_dict['mediaids'] or args_dict['all']:
+        if args_dict['mediaids']:
+            media_ids = args_dict['mediaids'].split(',')
+        else:
+            active = media_filter(states=Encoding.STATES - Encoding.EXIT_STATUSES)
+            media_ids = [media['mediaid'] for media in iter_medias(encoding, active)]
+
+        if media_ids:
+            dashboard(encoding, media_ids, interval=float(args_dict['interval']),
+                      refresh=args_dict['refresh'], max_rows=args_dict['max_rows'])
+        else:
+            print('No jobs to follow')
+        return
+
+    if args_dict['mediaid']:
+        media_id = args_dict['mediaid']
+    else:
+        media_id = get_latest_media(encoding)['mediaid']
+        print('MediaId not specified, using the latest media id in the queue: %s' % media_id)
+
+    Poller.poll_status(encoding, media_id=media_id, callback=pretty_print_response,
+                       interval=float(args_dict['interval']))
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
\ No newline at end of file
@@ -0,0 +1,297 @@
+#! /usr/bin/env python
+"""
+List the medias in the encoding.com queue.
+
+Non verbose mode reports the GetMediaList response.
+Verbose mode streams one JSON document per line (JSON Lines) for each selected mediaid,
+holding the media list entry, its GetStatus details and its GetMediaInfoEx details.
+
+Filters (state, age, source pattern) are applied on the media list before any per media call is made.
+GetStatus is dispatched with the extended variant in chunks of mediaids,
+GetMediaInfoEx is dispatched per media through a bounded pool of workers.
+Lines are written as soon as results arrive, so their order is not the media list order.
+Run time stats are reported to stderr at the end.
+
+USAGE:
+    python -m encodingcom.cli.ls_queue --user=1234 --key=abcde
+    * Reports the media list
+
+    python -m encodingcom.cli.ls_queue --user=1234 --key=abcde --verbose --state=Error,Stopped --max-age=24 \
+        > queue.jsonl
+    * Streams the status and media info of jobs in error or stopped created in the last 24 hours
+
+    python -m encodingcom.cli.ls_queue --user=1234 --key=abcde --verbose --source='*.mov' --workers=16
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from json import dumps
+from pprint import PrettyPrinter
+from sys import stderr, stdout
+from time import perf_counter
+
+from encodingcom.encoding import Encoding
+from encodingcom.encoding_utils import iter_chunks, iter_medias
+from encodingcom.exception import EncodingErrors
+from encodingcom.profiling import measure
+from encodingcom.response_helper import get_response, get_jobs, get_medias
+from encodingcom.cli.tool_utils import FILTER_ARGUMENTS, PROFILE_ARGUMENTS, credential_arguments, get_filter, \
+    register_arguments, start_profiling
+
+
+def pretty_print_response(data: dict):
+    """
+    Use Python standard pprint to output to a nice formatted response from the differing status calls
+
+    :param: **kwargs
+        Key items in the kwargs:
+        media_id: MediaID associated with the Job
+        status: Status / state of the job
+        response:
+    :return:
+    """
+
+    pretty = PrettyPrinter()
+    pretty.pprint(data)
+
+
+def add_arguments(parser: ArgumentParser):
+    """
+    Add the arguments of the tool, shared by the stand alone script and the encodingcom command
+
+    :param parser: ArgumentParser
+    :return: None
+    """
+
+    arguments = {
+        '--verbose': {
+            'required': False,
+            'nargs': '?',
+            'const': True,
+            'default': False,
+            'help': 'Verbose mode is enabled... '
+                    'Streams the GetStatus and GetMediaInfoEx details of each mediaid as JSON lines. '
+                    'If not specified, verbose is disabled'
+        },
+
+        '--chunk-size': {
+            'required': False,
+            'type': int,
+            'default': 100,
+            'help': 'Number of mediaids per extended GetStatus call (defaults to 100)'
+        },
+
+        '--workers': {
+            'required': False,
+            'type': int,
+            'default': 8,
+            'help': 'Maximum number of concurrent calls to encoding.com (defaults to 8)'
+        },
+
+    }
+
+    arguments.update(credential_arguments())
+    arguments.update(FILTER_ARGUMENTS)
+    arguments.update(PROFILE_ARGUMENTS)
+    register_arguments(parser, arguments)
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    parser = ArgumentParser()
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+class ReportStats(object):
+    """
+    Run time stats of a verbose report
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.medias = 0
+        self.status_calls = 0
+        self.status_time = 0.0
+        self.info_calls = 0
+        self.info_time = 0.0
+        self.errors = 0
+
+    def report(self, out=stderr):
+        """
+        Write the stats in a human readable form
+
+        :param out:
+            File like object to write to, defaults to stderr
+        :return: None
+        """
+        elapsed = perf_counter() - self.started
+        print('Medias reported: %d in %.2fs (%.1f medias/s)' %
+              (self.medias, elapsed, self.medias / elapsed if elapsed else 0), file=out)
+        print('GetStatus calls: %d, mean latency %.3fs' %
+              (self.status_calls, self.status_time / self.status_calls if self.status_calls else 0), file=out)
+        print('GetMediaInfoEx calls: %d, mean latency %.3fs' %
+              (self.info_calls, self.info_time / self.info_calls if self.info_calls else 0), file=out)
+        print('Errors: %d' % self.errors, file=out)
+
+
+def _timed(errors: tuple, call, *args, **kwargs):
+    """
+    Invoke the call and measure its wall time
+
+    :param errors: tuple
+        Exceptions returned as the result, besides EncodingErrors: the errors of the transport
+    :param call:
+        Function called with the other arguments
+    :return: tuple of the elapsed seconds and the call result (or the raised EncodingErrors/transport error)
+    :rtype: (float, object)
+    """
+    started = perf_counter()
+    try:
+        result = call(*args, **kwargs)
+    except (EncodingErrors,) + errors as ex:
+        result = ex
+    return perf_counter() - started, result
+
+
+def verbose_report(encoding: Encoding, select=None, chunk_size: int=100, workers: int=8, out=stdout) -> ReportStats:
+    """
+    Verbose mode reporting of media id and its contents.
+    Selected mediaids are dispatched in chunks to the extended GetStatus action,
+    followed by one GetMediaInfoEx per mediaid, with at most workers calls in flight: the GetMediaInfoEx
+    calls of a chunk wait their turn, the next chunk is only pulled once they are all submitted.
+    Each media is written as a JSON line as soon as all its details are known, with the error instead when
+    a call failed, whether encoding.com or the transport reported it.
+
+    :param encoding: Encoding
+        Encoding service class
+    :param select:
+        Predicate from media_filter(), all medias reported if not specified
+    :param chunk_size: int
+        Number of mediaids per extended GetStatus call
+    :param workers: int
+        Maximum number of concurrent calls
+    :param out:
+        File like object to write the JSON lines to
+    :return: run time stats
+    :rtype: ReportStats
+    """
+    stats = ReportStats()
+
+    medias = {}
+    chunks = iter_chunks(iter_medias(encoding, select), chunk_size)
+    errors = encoding.transport.errors
+    # mediaids of the chunks done with GetStatus, waiting for their GetMediaInfoEx call
+    waiting = deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def submit_status():
+            # pull the next chunk lazily, so the number of queued calls stays bounded
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            for media in chunk:
+                medias[media['mediaid']] = {'mediaid': media['mediaid'], 'media': media}
+            media_ids = [media['mediaid'] for media in chunk]
+            pending[executor.submit(_timed, errors, encoding.get_status, mediaid=media_ids)] = ('status', media_ids)
+            return True
+
+        def submit_info():
+            media_id = waiting.popleft()
+            pending[executor.submit(_timed, errors, encoding.get_media_info, extended=True,
+                                    mediaid=media_id)] = ('info', media_id)
+
+        more = True
+        while pending or waiting or more:
+            while len(pending) < workers and (waiting or more):
+                if waiting:
+                    submit_info()
+                else:
+                    more = submit_status()
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, key = pending.pop(future)
+                elapsed, result = future.result()
+
+                if kind == 'status':
+                    stats.status_calls += 1
+                    stats.status_time += elapsed
+                    if isinstance(result, Exception):
+                        stats.errors += 1
+                        with measure('ls_queue', 'output'):
+                            for media_id in key:
+                                record = medias.pop(media_id)
+                                record['error'] = str(result)
+                                stats.medias += 1
+                                out.write(dumps(record) + '\n')
+                        continue
+
+                    for job in get_jobs(result[1]):
+                        record = medias.get(job.get('id'))
+                        if record is not None:
+                            record['status'] = job
+                    waiting.extend(key)
+                else:
+                    stats.info_calls += 1
+                    stats.info_time += elapsed
+                    record = medias.pop(key)
+                    if isinstance(result, Exception):
+                        stats.errors += 1
+                        record['error'] = str(result)
+                    else:
+                        record['media_info'] = get_response(result[1])
+                    stats.medias += 1
+                    with measure('ls_queue', 'output'):
+                        out.write(dumps(record) + '\n')
+            out.flush()
+
+    return stats
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+
+    args_dict = vars(args)
+    start_profiling(args_dict)
+
+    encoding = Encoding(user_id=args_dict['user'], user_key=args_dict['key'])
+    select = get_filter(args_dict)
+
+    if args_dict['verbose']:
+        stats = verbose_report(encoding, select,
+                               chunk_size=args_dict['chunk_size'], workers=args_dict['workers'])
+        stats.report()
+    else:
+        status, response = encoding.get_media_list()
+        if 200 == status:
+            medias = [media for media in get_medias(response) if select(media)]
+            response = get_response(response)
+            response['media'] = medias
+            with measure('ls_queue', 'output'):
+                pretty_print_response(response)
+        else:
+            print('HTTP error returned: %s' % status)
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
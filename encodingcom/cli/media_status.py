@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+"""
+Report the status of mediaids, one line per mediaid.
+
+Mediaids are dispatched to GetStatus in chunks (extended variant), several chunks in flight at once.
+Default output is a table of mediaid, status and progress, --json streams the GetStatus details
+of each mediaid as JSON lines.  Exits with status 1 if any mediaid could not be reported.
+
+USAGE:
+    python -m encodingcom.cli.media_status --user=1234 --key=abcde --mediaid=123,456
+    * Reports the status of the mediaids 123 and 456
+
+    python -m encodingcom.cli.media_status --mediaid=123 --json
+    * GetStatus details of the mediaid 123, credentials from the environment or ~/.encodingcom
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from json import dumps
+from sys import stderr
+
+from encodingcom.batch import Batcher
+from encodingcom.encoding import Encoding
+from encodingcom.cli.tool_utils import PROFILE_ARGUMENTS, credential_arguments, register_arguments, start_profiling
+
+
+def add_arguments(parser: ArgumentParser):
+    """
+    Add the arguments of the tool, shared by the stand alone script and the encodingcom command
+
+    :param parser: ArgumentParser
+    :return: None
+    """
+
+    arguments = {
+        '--mediaid': {
+            'required': True,
+            'help': 'Comma delimited list of media ids to report'
+        },
+
+        '--json': {
+            'required': False,
+            'action': 'store_true',
+            'help': 'Stream the GetStatus details of each media id as JSON lines'
+        },
+
+        '--chunk-size': {
+            'required': False,
+            'type': int,
+            'default': 100,
+            'help': 'Number of media ids per GetStatus call (defaults to 100)'
+        },
+
+        '--workers': {
+            'required': False,
+            'type': int,
+            'default': 4,
+            'help': 'Maximum number of concurrent calls to encoding.com (defaults to 4)'
+        },
+
+    }
+
+    arguments.update(credential_arguments())
+    arguments.update(PROFILE_ARGUMENTS)
+    register_arguments(parser, arguments)
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    parser = ArgumentParser()
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def main(args: Namespace) -> int:
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return: exit status, 1 if any media id could not be reported
+    :rtype: int
+    """
+
+    args_dict = vars(args)
+    start_profiling(args_dict)
+
+    encoding = Encoding(user_id=args_dict['user'], user_key=args_dict['key'])
+
+    media_ids = [media_id.strip() for media_id in args_dict['mediaid'].split(',') if media_id.strip()]
+    batcher = Batcher(encoding, chunk_size=args_dict['chunk_size'], workers=args_dict['workers'])
+    result = batcher.dispatch('get_status', media_ids)
+
+    for media_id in media_ids:
+        job = result.responses.get(media_id)
+        if job is None:
+            continue
+        if args_dict['json']:
+            print(dumps(job))
+        else:
+            print('%-12s %-20s %s%%' % (media_id, job.get('status', ''), job.get('progress', '')))
+
+    for media_id in sorted(result.errors):
+        print('*** %s: %s' % (media_id, ', '.join(str(error) for error in result.errors[media_id])), file=stderr)
+    return 1 if result.errors else 0
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    exit(main(args))
@@ -0,0 +1,135 @@
+#! /usr/bin/env python
+"""
+Submit sources to encoding.com with AddMedia, one job per source.
+
+The format is given as JSON (--format), or built from the output and destination arguments.
+Prints one line per source with the mediaid of its job.  Exits with status 1 if any source was rejected.
+
+USAGE:
+    python -m encodingcom.cli.submit_media --user=1234 --key=abcde --source=http://host/a.mov --output=mp4 \
+        --destination=s3://bucket/a.mp4
+    * Submits a mp4 job for the source
+
+    python -m encodingcom.cli.submit_media --source=http://host/a.mov --source=http://host/b.mov \
+        --format='{"output": "mp4", "video_codec": "libx264"}'
+    * Submits the same format for two sources, credentials from the environment or ~/.encodingcom
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from json import loads
+from sys import stderr
+
+from encodingcom.encoding import Encoding
+from encodingcom.exception import EncodingErrors, OutcomeUnknown
+from encodingcom.response_helper import get_media_id
+from encodingcom.cli.tool_utils import PROFILE_ARGUMENTS, credential_arguments, register_arguments, start_profiling
+
+
+def add_arguments(parser: ArgumentParser):
+    """
+    Add the arguments of the tool, shared by the stand alone script and the encodingcom command
+
+    :param parser: ArgumentParser
+    :return: None
+    """
+
+    arguments = {
+        '--source': {
+            'required': True,
+            'action': 'append',
+            'help': 'Source file url, repeat for several sources (one job per source)'
+        },
+
+        '--format': {
+            'required': False,
+            'help': 'Format of the jobs as JSON, ie. \'{"output": "mp4", "video_codec": "libx264"}\''
+        },
+
+        '--output': {
+            'required': False,
+            'default': 'mp4',
+            'help': 'Output of the format when --format is not specified (defaults to mp4)'
+        },
+
+        '--destination': {
+            'required': False,
+            'help': 'Destination url of the output when --format is not specified'
+        },
+
+        '--notify': {
+            'required': False,
+            'default': '',
+            'help': 'Url notified by encoding.com once a job is done'
+        },
+
+    }
+
+    arguments.update(credential_arguments())
+    arguments.update(PROFILE_ARGUMENTS)
+    register_arguments(parser, arguments)
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    parser = ArgumentParser()
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def get_format(args_dict: dict) -> dict:
+    """
+    :param args_dict: dict
+        arguments from the arguments parser
+    :return: format of the jobs
+    :rtype: dict
+    """
+    if args_dict['format']:
+        return loads(args_dict['format'])
+
+    format = {'output': args_dict['output']}
+    if args_dict['destination']:
+        format['destination'] = args_dict['destination']
+    return format
+
+
+def main(args: Namespace) -> int:
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return: exit status, 1 if any source was rejected
+    :rtype: int
+    """
+
+    args_dict = vars(args)
+    start_profiling(args_dict)
+
+    encoding = Encoding(user_id=args_dict['user'], user_key=args_dict['key'], notification_url=args_dict['notify'])
+    format = get_format(args_dict)
+
+    failed = 0
+    for source in args_dict['source']:
+        try:
+            status, result = encoding.add_media(source=source, format=format)
+            print('%s %s' % (get_media_id(result), source))
+        except EncodingErrors as ex:
+            failed += 1
+            print('*** %s rejected: %s' % (source, ', '.join(str(error) for error in ex.errors)), file=stderr)
+        except OutcomeUnknown as ex:
+            failed += 1
+            print('*** %s outcome unknown (%s), check the queue before submitting it again' % (source, ex.error),
+                  file=stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    exit(main(args))
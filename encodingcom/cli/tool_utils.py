@@ -0,0 +1,165 @@
+"""
+Arguments and helpers shared by the tools
+
+"""
+
+from argparse import ArgumentParser
+from configparser import ConfigParser
+from os import getenv
+from os.path import expanduser
+
+from encodingcom.encoding_utils import media_filter
+from encodingcom.profiling import enable
+
+
+# environment variables holding the credentials, as the live tests use them
+USER_ID_ENV = 'ENCODING_USER_ID'
+USER_KEY_ENV = 'ENCODING_USER_KEY'
+
+# config file holding the credentials when not in the environment:
+#   [encodingcom]
+#   user_id = 1234
+#   user_key = abcde
+CONFIG_ENV = 'ENCODINGCOM_CONFIG'
+DEFAULT_CONFIG = '~/.encodingcom'
+
+
+# media selection arguments, see get_filter()
+FILTER_ARGUMENTS = {
+    '--state': {
+        'required': False,
+        'help': 'Comma delimited list of states to select, ie. "Error,Stopped". All states if not specified'
+    },
+
+    '--min-age': {
+        'required': False,
+        'type': float,
+        'help': 'Only select medias created at least this many hours ago'
+    },
+
+    '--max-age': {
+        'required': False,
+        'type': float,
+        'help': 'Only select medias created at most this many hours ago'
+    },
+
+    '--source': {
+        'required': False,
+        'help': 'Only select medias whose source file url matches this shell style pattern, ie. "*.mov"'
+    },
+}
+
+
+def get_credentials(path: str=None) -> (str, str):
+    """
+    Credentials from the environment, or from the config file
+
+    :param path: str
+        Config file, defaults to ENCODINGCOM_CONFIG or ~/.encodingcom
+    :return: user id, user key (None when not found)
+    :rtype: (str, str)
+    """
+    user_id = getenv(USER_ID_ENV)
+    user_key = getenv(USER_KEY_ENV)
+    if user_id and user_key:
+        return user_id, user_key
+
+    config = ConfigParser()
+    config.read(expanduser(path or getenv(CONFIG_ENV) or DEFAULT_CONFIG))
+    return (user_id or config.get('encodingcom', 'user_id', fallback=None),
+            user_key or config.get('encodingcom', 'user_key', fallback=None))
+
+
+def credential_arguments() -> dict:
+    """
+    --user and --key arguments, only required when the credentials are not found by get_credentials()
+
+    :return: arguments
+    :rtype: dict
+    """
+    user_id, user_key = get_credentials()
+    return {
+        '--user': {
+            'required': not user_id,
+            'default': user_id,
+            'help': 'Designate a required UserID needed to access encoding.com '
+                    '(defaults to %s, or user_id of the %s config file)' % (USER_ID_ENV, DEFAULT_CONFIG)
+        },
+
+        '--key': {
+            'required': not user_key,
+            'default': user_key,
+            'help': 'Designate a required User Key to access encoding.com '
+                    '(defaults to %s, or user_key of the %s config file)' % (USER_KEY_ENV, DEFAULT_CONFIG)
+        },
+    }
+
+
+def register_arguments(parser: ArgumentParser, *arguments: dict):
+    """
+    :param parser: ArgumentParser
+    :param arguments: dict
+        argument -> add_argument keyword arguments, added in order
+    :return: None
+    """
+    for group in arguments:
+        for argument in group.keys():
+            parser.add_argument(argument, **group[argument])
+
+
+# profiling arguments, see start_profiling()
+PROFILE_ARGUMENTS = {
+    '--profile': {
+        'required': False,
+        'action': 'store_true',
+        'help': 'Report the wall and CPU time per action and phase to stderr at exit '
+                '(also enabled by the ENCODINGCOM_PROFILE=1 environment variable)'
+    },
+
+    '--profile-stacks': {
+        'required': False,
+        'help': 'File to write sampled collapsed stacks to at exit, for flamegraph tools '
+                '(also enabled by the ENCODINGCOM_PROFILE_STACKS environment variable)'
+    },
+}
+
+
+def start_profiling(args_dict: dict):
+    """
+    Enable the profiling mode from the parsed PROFILE_ARGUMENTS, before any Encoding is created
+
+    :param args_dict: dict
+        arguments from the arguments parser
+    :return: Profiler if enabled, None otherwise
+    """
+    if args_dict.get('profile') or args_dict.get('profile_stacks'):
+        return enable(stacks=args_dict.get('profile_stacks'))
+    return None
+
+
+def has_filter(args_dict: dict) -> bool:
+    """
+    :param args_dict: dict
+        arguments from the arguments parser
+    :return: True if any of the FILTER_ARGUMENTS has been specified
+    :rtype: bool
+    """
+    return any(args_dict.get(key) is not None for key in ('state', 'min_age', 'max_age', 'source'))
+
+
+def get_filter(args_dict: dict):
+    """
+    Build the media selection predicate from the parsed FILTER_ARGUMENTS
+
+    :param args_dict: dict
+        arguments from the arguments parser
+    :return: predicate from media_filter()
+    """
+    states = args_dict.get('state')
+    min_age = args_dict.get('min_age')
+    max_age = args_dict.get('max_age')
+
+    return media_filter(states=states.split(',') if states else None,
+                        min_age=min_age * 3600 if min_age is not None else None,
+                        max_age=max_age * 3600 if max_age is not None else None,
+                        source_pattern=args_dict.get('source') or '')
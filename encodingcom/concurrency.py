@@ -0,0 +1,151 @@
+"""
+Adaptive concurrency control of submissions, driven by the encoder queue time observed at encoding.com.
+
+The capacity encoding.com grants an account changes through the day, a fixed in flight limit is either
+too low (idle capacity) or too high (jobs piling up in Waitingforencoder).  AIMDController measures how
+long jobs stay in the queue states (Ready to process, Waitingforencoder) from the GetStatus transitions,
+and adjusts the limit to keep that queue time under a target:
+* additive increase while jobs leave the queue under the target
+* multiplicative decrease when a job waits longer than the target, at most once per cooldown
+
+"""
+
+from threading import Lock
+from time import time
+
+
+class AIMDController(object):
+    """
+    Additive increase / multiplicative decrease of a concurrency limit
+
+    Usage, feeding it every status observed:
+        controller = AIMDController(target=120)
+        scheduler = SubmissionScheduler(service, controller=controller)
+    """
+
+    # states during which a job waits for an encoder
+    QUEUE_STATES = frozenset(['Ready to process', 'Waitingforencoder'])
+
+    def __init__(self, target: float=60, initial: int=10, minimum: int=1, maximum: int=500,
+                 increase: float=1.0, decrease: float=0.5, cooldown: float=None, smoothing: float=0.2):
+        """
+        :param target: float
+            Queue time target, in seconds
+        :param initial: int
+            Initial limit
+        :param minimum: int
+            Lowest limit
+        :param maximum: int
+            Highest limit
+        :param increase: float
+            Added to the limit per job leaving the queue under the target
+        :param decrease: float
+            Factor applied to the limit when the target is exceeded
+        :param cooldown: float
+            Minimum seconds between two decreases, defaults to the target
+            (the effect of a decrease is not observable before queued jobs leave the queue)
+        :param smoothing: float
+            Weight of the latest sample in the queue time moving average
+        """
+        self.target = target
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = target if cooldown is None else cooldown
+        self.smoothing = smoothing
+
+        self._limit = float(max(minimum, min(maximum, initial)))
+        self._queued = {}
+        self._last_decrease = None
+        self._lock = Lock()
+
+        self.samples = 0
+        self.increases = 0
+        self.decreases = 0
+        self.last_queue_time = None
+        self.mean_queue_time = None
+
+    @property
+    def limit(self) -> int:
+        """
+        :return: current concurrency limit
+        :rtype: int
+        """
+        return int(self._limit)
+
+    def observe(self, media_id: str, status: str, now: float=None):
+        """
+        Feed a status observed for a job (ie. from GetStatus)
+
+        :param media_id: str
+        :param status: str
+            State reported by encoding.com
+        :param now: float
+            Time of the observation (epoch seconds), defaults to current time
+        :return: None
+        """
+        if now is None:
+            now = time()
+
+        with self._lock:
+            entered = self._queued.get(media_id)
+            if status in AIMDController.QUEUE_STATES:
+                if entered is None:
+                    self._queued[media_id] = now
+                elif now - entered > self.target:
+                    # still waiting past the target, no need to wait for it to leave the queue
+                    self._decrease(now)
+                return
+
+            if entered is not None:
+                del self._queued[media_id]
+                self._sample(now - entered, now)
+
+    def forget(self, media_id: str):
+        """
+        Stop following a job (ie. cancelled while queued)
+
+        :param media_id: str
+        :return: None
+        """
+        with self._lock:
+            self._queued.pop(media_id, None)
+
+    def metrics(self) -> dict:
+        """
+        :return: current limit and control signals
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'target': self.target,
+                'queued': len(self._queued),
+                'samples': self.samples,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'last_queue_time': self.last_queue_time,
+                'mean_queue_time': self.mean_queue_time,
+            }
+
+    def _sample(self, queue_time: float, now: float):
+        self.samples += 1
+        self.last_queue_time = queue_time
+        if self.mean_queue_time is None:
+            self.mean_queue_time = queue_time
+        else:
+            self.mean_queue_time += self.smoothing * (queue_time - self.mean_queue_time)
+
+        if queue_time > self.target:
+            self._decrease(now)
+        else:
+            self._limit = min(self.maximum, self._limit + self.increase)
+            self.increases += 1
+
+    def _decrease(self, now: float):
+        if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(self.minimum, self._limit * self.decrease)
+        self.decreases += 1
@@ -0,0 +1,127 @@
+"""
+End to end deadlines across Encoding calls, batched calls and polling loops.
+
+A Deadline used as a context manager applies to every Encoding action made by the thread within the block:
+the connect/read timeouts of each call are cut to the time left, and calls are refused once it ran out.
+Batcher carries the deadline of the dispatching thread to its worker threads, Poller loops accept one
+and stop sleeping when it runs out.  Running out raises DeadlineExceeded, with the last known state when
+there is one.
+
+    with Deadline(300):
+        Poller.poll_till_status(service, media_id)
+
+"""
+
+from threading import local
+from time import monotonic, sleep
+
+from encodingcom.exception import DeadlineExceeded
+
+
+_active = local()
+
+
+class Deadline(object):
+    """
+    Point in time by which an operation must complete
+    """
+
+    def __init__(self, seconds: float):
+        """
+        :param seconds: float
+            Time given to the operation, from now
+        """
+        self.seconds = seconds
+        self.expires = monotonic() + seconds
+
+    def remaining(self) -> float:
+        """
+        :return: seconds left, 0 once expired
+        :rtype: float
+        """
+        return max(0.0, self.expires - monotonic())
+
+    def expired(self) -> bool:
+        """
+        :return: True once the deadline ran out
+        :rtype: bool
+        """
+        return monotonic() >= self.expires
+
+    def check(self, media_id: str='', last_state: dict=None):
+        """
+        :param media_id: str
+            mediaid reported by the exception
+        :param last_state: dict
+            Last known state reported by the exception
+        :return: None
+        :raises DeadlineExceeded: once the deadline ran out
+        """
+        if self.expired():
+            raise DeadlineExceeded(self.seconds, media_id, last_state)
+
+    def timeout(self, timeout) -> tuple:
+        """
+        :param timeout:
+            requests timeout, (connect, read) tuple or a single value for both
+        :return: (connect, read) timeout cut to the time left
+        :rtype: tuple
+        """
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        # requests rejects a 0 timeout
+        remaining = max(0.001, self.remaining())
+        return (remaining if connect is None else min(connect, remaining),
+                remaining if read is None else min(read, remaining))
+
+    def sleep(self, seconds: float, media_id: str='', last_state: dict=None):
+        """
+        Sleep, at most until the deadline
+
+        :param seconds: float
+        :param media_id: str
+            mediaid reported by the exception
+        :param last_state: dict
+            Last known state reported by the exception
+        :return: None
+        :raises DeadlineExceeded: if the deadline runs out before the end of the sleep
+        """
+        self.check(media_id, last_state)
+        remaining = self.remaining()
+        sleep(min(seconds, remaining))
+        if seconds >= remaining:
+            raise DeadlineExceeded(self.seconds, media_id, last_state)
+
+    def __enter__(self) -> 'Deadline':
+        stack = getattr(_active, 'stack', None)
+        if stack is None:
+            stack = _active.stack = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active.stack.remove(self)
+
+
+def current_deadline() -> Deadline:
+    """
+    :return: earliest deadline active in the current thread, None if none
+    :rtype: Deadline
+    """
+    stack = getattr(_active, 'stack', None)
+    if not stack:
+        return None
+    return min(stack, key=lambda deadline: deadline.expires)
+
+
+def get_deadline(deadline) -> Deadline:
+    """
+    :param deadline:
+        Deadline, seconds from now, or None
+    :return: the given deadline, or the one active in the current thread when None
+    :rtype: Deadline
+    """
+    if deadline is None:
+        return current_deadline()
+    if isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(deadline)
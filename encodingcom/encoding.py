@@ -4,19 +4,120 @@ Top level import for anyone who wants to use this package.
 from encodingcom.encoding import Encoding
 """
 
-from json import dumps, loads
-from requests import post
+from codecs import getincrementaldecoder
+from collections import namedtuple
+from functools import partial
+from json import JSONDecoder, loads
+from logging import getLogger
+from re import compile
+from sqlite3 import Error as SQLiteError
+from urllib.parse import urlencode
 
 from encodingcom.string_utils import list_to_str
 
+from encodingcom.deadline import current_deadline
 from encodingcom.error_handler import ErrorHandler
-from encodingcom.exception import InvalidParameterError
+from encodingcom.exception import DeadlineExceeded, InvalidParameterError, OutcomeUnknown
+from encodingcom.profiling import get_profiler
+from encodingcom.request_builder import RequestBuilder
+from encodingcom.response_helper import get_medias
+from encodingcom.transport import RequestsTransport
+from encodingcom.validator import validate
+
+
+logger = getLogger(__name__)
+
+# key of the media list in a GetMediaList response, the medias are decoded one by one after it
+_MEDIA_KEY = compile(r'"media"\s*:\s*')
+
+
+# immutable settings of a client, replaced as a whole when a setting changes
+EncodingConfig = namedtuple('EncodingConfig', ['url', 'user_id', 'user_key', 'notify', 'notify_encoding_errors',
+                                               'notification_format', 'instant', 'timeout'])
+
+
+def _config_property(name: str, doc: str) -> property:
+    """
+    Property reading a setting of the client config, setting it replaces the config (and the compiled requests)
+
+    :param name: str
+        EncodingConfig field
+    :param doc: str
+    :return: property
+    :rtype: property
+    """
+    def getter(self):
+        return getattr(self._compiled[0], name)
+
+    def setter(self, value):
+        self._compiled = (self._compiled[0]._replace(**{name: value}), {})
+
+    return property(getter, setter, doc=doc)
+
+
+def _parse_media_list(chunks):
+    """
+    Medias of a GetMediaList response, each decoded as soon as its chunks are received,
+    only the media being decoded is buffered.
+    A response without a media list (ie. errors) is decoded as a whole and checked by ErrorHandler
+
+    :param chunks:
+        Iterator of the response content chunks (bytes)
+    :return: generator of media dicts
+    """
+    decoder = JSONDecoder()
+    text = getincrementaldecoder('utf-8')()
+    buffer = ''
+    # index of the next media in buffer, None until the media list is found
+    index = None
+    listing = True
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        if index is None:
+            match = _MEDIA_KEY.search(buffer)
+            if match is None or match.end() == len(buffer) or buffer[match.end()] not in '[{':
+                continue
+            index = match.end()
+            if buffer[index] == '[':
+                index += 1
+            else:
+                # encoding.com collapses a single item list into a dict
+                listing = False
+
+        while True:
+            while index < len(buffer) and buffer[index] in ', \t\r\n':
+                index += 1
+            if index == len(buffer):
+                break
+            if buffer[index] == ']':
+                return
+            try:
+                media, end = decoder.raw_decode(buffer, index)
+            except ValueError:
+                # media not received entirely yet
+                break
+            yield media
+            if not listing:
+                return
+            buffer, index = buffer[end:], 0
+
+    if index is not None:
+        raise ValueError('GetMediaList response cut short')
+    content = loads(buffer + text.decode(b'', True))
+    ErrorHandler.process(content)
+    yield from get_medias(content)
 
 
 class Encoding(object):
     """
     Helper class to talk to Encoding.com server
 
+    An instance can be shared by threads and survives fork():
+    * settings are an immutable EncodingConfig per instance, replaced atomically by the property setters,
+      changing the class defaults only affects the instances created afterwards
+    * arguments of the actions are never modified in place
+    * connections are pooled by the transport, rebuilt in a forked child process
+      (the parent's sockets are never shared)
     """
 
     ENCODING_API_URL = 'manage.encoding.com'
@@ -24,6 +125,9 @@ class Encoding(object):
 
     EXIT_STATUSES = frozenset(['Finished', 'Error', 'Stopped'])
 
+    # actions creating a job, a timeout waiting for their answer raises OutcomeUnknown
+    SUBMIT_ACTIONS = frozenset(['AddMedia', 'AddMediaBenchmark'])
+
     # each state represents a given state that a mediaid can be in.
     # when querying for the status of a mediaid, one of these will be returned
     STATES = frozenset(['New', 'Downloading', 'Downloaded', 'Ready to process', 'Waitingforencoder',
@@ -38,6 +142,9 @@ class Encoding(object):
     # Initiate the processing to instant/immediately even though when the source media is still uploading
     default_instant = 'no'
 
+    # (connect, read) timeouts in seconds of every call
+    default_timeout = (5.0, 60.0)
+
     # === Standard Query template used in ALL core Encodingcom json data structure ===
 
     QUERY_TEMPLATE = {
@@ -47,9 +154,19 @@ class Encoding(object):
     # ref: http://api.encoding.com/#VideoSettings
     # client specifying a codec without the explicit codec setting will use the default codec detailed in encoding.com
 
+    url = _config_property('url', 'Encoding.com API url')
+    user_id = _config_property('user_id', 'Encoding.com client user account id')
+    user_key = _config_property('user_key', 'Encoding.com client user account secret/key')
+    notify = _config_property('notify', 'Notification url called upon job completion')
+    notify_encoding_errors = _config_property('notify_encoding_errors', 'Notification url called upon job error')
+    notification_format = _config_property('notification_format', 'Format of the responses and notifications')
+    instant = _config_property('instant', 'Default instant mode of add_media and add_media_benchmark')
+    timeout = _config_property('timeout', '(connect, read) timeouts in seconds of every call')
+
     def __init__(self, user_id: str, user_key: str,
                  notification_url: str='', error_url: str='',
-                 https: bool=True):
+                 https: bool=True, ledger=None, pool_size: int=10, timeout: tuple=None, hedge=None,
+                 profiler=None, transport=None):
         """
         Initializes access to package layer service
 
@@ -64,23 +181,61 @@ class Encoding(object):
         :param https: bool
             True (default) matching encoding.com specs to use port 443 to communicate
             False otherwise using port 80
+        :param ledger: JobLedger
+            Durable ledger every successful action is written through (see encodingcom/ledger.py),
+            a failing write is logged and does not fail the action
+        :param pool_size: int
+            Maximum number of pooled connections to encoding.com, ie. the number of threads sharing the instance
+        :param timeout: tuple
+            (connect, read) timeouts in seconds of every call, defaults to Encoding.default_timeout.
+            An active Deadline (see encodingcom/deadline.py) further cuts them to the time it has left.
+            A submission (AddMedia, AddMediaBenchmark) running out of time raises OutcomeUnknown instead of
+            the timeout: the job may have been created, submitting it again could transcode it twice
+        :param hedge: HedgePolicy
+            Hedge the slow read only calls with a second identical request (see encodingcom/hedging.py)
+        :param profiler: Profiler
+            Record the wall and CPU time of each action per phase (see encodingcom/profiling.py),
+            defaults to the profiler of the process when profiling is enabled
+        :param transport: Transport
+            HTTP transport the requests are sent through (see encodingcom/transport.py),
+            defaults to a RequestsTransport of pool_size connections
         :return: None
         """
 
         if https:
-            self.url = 'https://' + Encoding.ENCODING_API_URL
+            url = 'https://' + Encoding.ENCODING_API_URL
         else:
-            self.url = 'http://' + Encoding.ENCODING_API_URL
+            url = 'http://' + Encoding.ENCODING_API_URL
+
+        # explicit contractual needs from the client, and the values that can be defaulted
+        config = EncodingConfig(url=url, user_id=user_id, user_key=user_key,
+                                notify=notification_url, notify_encoding_errors=error_url,
+                                notification_format=Encoding.default_notification_format,
+                                instant=Encoding.default_instant,
+                                timeout=Encoding.default_timeout if timeout is None else timeout)
+        # config, action -> RequestBuilder compiled from that config
+        self._compiled = (config, {})
 
-        # explicit contractual needs from the client
-        self.user_id = user_id
-        self.user_key = user_key
+        self.ledger = ledger
+        self.hedge = hedge
+        self.profiler = profiler if profiler is not None else get_profiler()
+        self.transport = transport if transport is not None else RequestsTransport(pool_size)
 
-        self.notify = notification_url
-        self.notify_encoding_errors = error_url
+    @property
+    def config(self) -> EncodingConfig:
+        """
+        :return: current settings of the client
+        :rtype: EncodingConfig
+        """
+        return self._compiled[0]
 
-        # all other values that can be defaulted
-        self._setup_defaults()
+    @property
+    def pool_size(self) -> int:
+        """
+        :return: maximum number of pooled connections of the transport, None when it does not pool connections
+        :rtype: int
+        """
+        return getattr(self.transport, 'pool_size', None)
 
     # ===== Media APIs =====
 
@@ -93,16 +248,32 @@ class Encoding(object):
             Variable list of arguments detailed by the client.
             Needs to match the request template (via JSON)
             ref: http://api.encoding.com/#CompleteXMLTemplate
+            strict=True validates the arguments locally against the request template before any call
+            cache=ResultCache returns the previous Finished job of the same source and format, if any,
+                instead of submitting a new job (see encodingcom/cache.py)
         :return: HTTP status code, dict response from encoding.com
         :rtype: (int, dict)
         """
+        cache = kwargs.pop('cache', None)
+        self._check_strict(kwargs)
+
+        if cache is not None and 'source' in kwargs and 'format' in kwargs:
+            entry = cache.lookup(self, kwargs['source'], kwargs['format'])
+            if entry:
+                return 200, {'response': {'message': 'Cached', 'MediaID': entry['mediaid'],
+                                          'destination': entry['destinations']}}
+
         if not kwargs.get('instant'):
-            kwargs['instant'] = Encoding.default_instant
+            kwargs['instant'] = self.instant
 
         # notify url is optional as encoding.com will let the target URL know when the job is done
         # if not specified, it defaults to:
         required = ['source', 'format']
-        return self._request('AddMedia', required, **kwargs)
+        status, result = self._request('AddMedia', required, **kwargs)
+
+        if cache is not None:
+            cache.submitted(result.get('response', {}).get('MediaID'), kwargs['source'], kwargs['format'])
+        return status, result
 
     def add_media_benchmark(self, **kwargs) -> (int, dict):
         """
@@ -113,11 +284,14 @@ class Encoding(object):
             Variable list of arguments detailed by the client.
             Needs to match the request template (via JSON)
             ref: http://api.encoding.com/#CompleteXMLTemplate
+            strict=True validates the arguments locally against the request template before any call
         :return: HTTP status code, dict response from encoding.com
         :rtype: (int, dict)
         """
+        self._check_strict(kwargs)
+
         if not kwargs.get('instant'):
-            kwargs['instant'] = Encoding.default_instant
+            kwargs['instant'] = self.instant
 
         # notify url is optional as encoding.com will let the target URL know when the job is done
         # if not specified, it defaults to:
@@ -214,9 +388,11 @@ class Encoding(object):
             Variable list of arguments detailed by the client.
             Needs to match the request template (via JSON)
             ref: http://api.encoding.com/#CompleteXMLTemplate
+            strict=True validates the arguments locally against the request template before any call
         :return: HTTP status code, dict response from encoding.com
         :rtype: (int, dict)
         """
+        self._check_strict(kwargs)
 
         # notify url is optional as encoding.com will let the target URL know when the job is done
         # if not specified, it defaults to:
@@ -313,9 +489,11 @@ class Encoding(object):
             Variable list of arguments detailed by the client.
             Needs to match the request template (via JSON)
             ref: http://api.encoding.com/#CompleteXMLTemplate
+            strict=True validates the arguments locally against the request template before any call
         :return: HTTP status code, dict response from encoding.com
         :rtype: (int, dict)
         """
+        self._check_strict(kwargs)
 
         # notify url is optional as encoding.com will let the target URL know when the job is done
         # if not specified, it defaults to:
@@ -325,6 +503,43 @@ class Encoding(object):
         required = ['mediaid', 'format']
         return self._request('UpdateMedia', required, **kwargs)
 
+    def iter_media_list(self, **kwargs):
+        """
+        Medias of the user's queue, as get_media_list returns them, decoded while the response is streamed:
+        the list of an account with a long history is never held in memory as a whole.
+        Neither hedged nor profiled, if a subclass overrides _post_request (ie. fakes, recording)
+        the list is requested through get_media_list
+
+        :param kwargs:
+            Variable list of arguments detailed by the client, as for get_media_list
+        :return: generator of media dicts
+        """
+        if getattr(self._post_request, '__func__', None) is not Encoding._post_request:
+            status, response = self.get_media_list(**kwargs)
+            yield from get_medias(response)
+            return
+
+        timeout = self.timeout
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check()
+            timeout = deadline.timeout(timeout)
+        json, body = self._builder('GetMediaList').build(kwargs)
+
+        transport = self.transport
+        try:
+            status, chunks = transport.stream(self.url, body, Encoding.API_HEADER, timeout)
+            try:
+                yield from _parse_media_list(chunks)
+            finally:
+                close = getattr(chunks, 'close', None)
+                if close is not None:
+                    close()
+        except transport.timeouts:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(deadline.seconds)
+            raise
+
     # ===== Internal Methods =====
 
     def _post_request(self, json_data, header='') -> (int, dict):
@@ -339,16 +554,44 @@ class Encoding(object):
             Encoding.com returns 200 status, but content still reflects errors
         :rtype: (string, dict)
         """
+        # all JSON data needs to be wrapped within 'json' dict in the body
+        return self._send(urlencode({'json': json_data}), header)
+
+    def _send(self, body: str, header='') -> (int, dict):
+        """
+        Post a form url encoded body through the transport, under the deadline active in the thread.
+        _request sends the body prebuilt by RequestBuilder straight through here, unless a subclass
+        overrides _post_request (ie. fakes, recording), which is then called with the JSON data as before
+
+        :param body: str
+            Form url encoded body holding the JSON data
+        :param header:
+            Header for the request, defaults to standard Encoding API headers
+        :return: tuple consisting of a status code from the call, and the actual content of the response
+        :rtype: (int, dict)
+        """
         if not header:
             header = Encoding.API_HEADER
 
-        # all JSON data needs to be wrapped within 'json' dict in the body
-        data = {'json': json_data}
-
-        response = post(self.url, data=data, headers=header)
-        status_code = response.status_code
-        content = response.content.decode('utf-8')
-        content = loads(content)
+        timeout = self.timeout
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+        timer = self.profiler.current() if self.profiler is not None else None
+
+        transport = self.transport
+        try:
+            status_code, content = transport.send(self.url, body, header, timeout)
+        except transport.timeouts:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(deadline.seconds)
+            raise
+        if timer is not None:
+            timer.lap('network')
+
+        content = loads(content.decode('utf-8'))
+        if timer is not None:
+            timer.lap('decode')
 
         return status_code, content
 
@@ -363,10 +606,11 @@ class Encoding(object):
         :rtype: dict
         """
 
+        config = self.config
         query = Encoding.QUERY_TEMPLATE.copy()
-        body = {'userid': self.user_id,
-                'userkey': self.user_key,
-                'notify_format': Encoding.default_notification_format,
+        body = {'userid': config.user_id,
+                'userkey': config.user_key,
+                'notify_format': config.notification_format,
                 'action': action}
         query['query'] = body
         return query
@@ -404,29 +648,84 @@ class Encoding(object):
         :return: tuple of HTTP status code, result response dictionary
         :rtype: (int, dict)
         """
-        self._check_requirements(requirements, **kwargs)
-
-        request = self._setup_request(action, **kwargs)
-        json = dumps(request)
-
-        status, result = self._post_request(json)
-        ErrorHandler.process(result)
-
+        timer = self.profiler.timer(action) if self.profiler is not None else None
+        try:
+            self._check_requirements(requirements, **kwargs)
+
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.check()
+
+            builder = self._builder(action)
+            if timer is not None:
+                timer.lap('build')
+            json, body = builder.build(kwargs)
+            if timer is not None:
+                timer.lap('serialize')
+
+            if getattr(self._post_request, '__func__', None) is Encoding._post_request:
+                post = partial(self._send, body)
+            else:
+                # _post_request intercepted by a subclass, given the JSON data as it always was
+                post = partial(self._post_request, json)
+
+            try:
+                if self.hedge is not None:
+                    status, result = self.hedge.call(action, post)
+                else:
+                    status, result = post()
+            except self.transport.timeouts + (DeadlineExceeded,) as ex:
+                if action in Encoding.SUBMIT_ACTIONS:
+                    raise OutcomeUnknown(action, ex) from ex
+                raise
+            if timer is not None and 'network' not in timer.phases:
+                # _post_request overridden or run by hedging threads: network includes the decoding
+                timer.lap('network')
+
+            ErrorHandler.process(result)
+            if timer is not None:
+                timer.lap('error_check')
+        finally:
+            if timer is not None:
+                self.profiler.finish()
+
+        if self.ledger is not None:
+            try:
+                self.ledger.on_request(action, kwargs, result)
+            except SQLiteError:
+                # the action succeeded (ie. a job was submitted), a ledger failure must not hide its result
+                logger.exception('Ledger write of %s failed', action)
         return status, result
 
-    def _setup_defaults(self):
+    def _builder(self, action: str) -> RequestBuilder:
+        """
+        Compiled request builder of the action, for the current config
+
+        :param action: str
+        :return: request builder
+        :rtype: RequestBuilder
         """
-        Setup instance object to reflect client settings
-        Only specify default settings that falls in this criteria:
-         * override the default natural Encoding.com defaults
-         * hidden or non documented settings
+        config, builders = self._compiled
+        builder = builders.get(action)
+        if builder is None:
+            builder = builders[action] = RequestBuilder(config.user_id, config.user_key,
+                                                        config.notification_format, action)
+        return builder
 
-        client can override these settings with explicit property setters after construction of object
+    @staticmethod
+    def _check_strict(kwargs: dict) -> bool:
+        """
+        Opt-in local validation of the client arguments against the request template.
+        The strict flag is consumed, it is never sent to encoding.com
 
-        :return: None
+        :param kwargs: dict
+            Client API invocation arguments
+        :return: True if the arguments were validated
+        :rtype: bool
         """
-        self.notification_format = Encoding.default_notification_format
-        self.instant = Encoding.default_instant
+        if kwargs.pop('strict', False):
+            return validate(kwargs)
+        return False
 
     @staticmethod
     def _check_requirements(required_params: list, **kwargs) -> bool:
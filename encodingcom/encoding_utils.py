@@ -3,10 +3,18 @@ Set of utility methods to help clients to access data
 
 """
 
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from itertools import islice
+
 from encodingcom.encoding import Encoding
 from encodingcom.response_helper import get_response
 
 
+# date format used by encoding.com for createdate/startdate/finishdate in GetMediaList
+MEDIA_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
 def get_latest_media(service: Encoding) -> dict:
     """
     Get latest media id information
@@ -36,3 +44,114 @@ def get_oldest_media(service: Encoding) -> dict:
     medias = response['media']
     return medias[0]
 
+
+def iter_chunks(iterable, size: int):
+    """
+    Split any iterable into lists of at most size items without materializing the whole iterable
+
+    :param iterable:
+        Any iterable, ie. list of mediaids or a generator of mediaids
+    :param size: int
+        Maximum number of items per chunk
+    :return: generator of lists
+    """
+    if size < 1:
+        raise ValueError('Chunk size must be at least 1: %s' % size)
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_media_date(value: str):
+    """
+    Parse a GetMediaList date (createdate, startdate, finishdate) into a datetime.
+    encoding.com reports these dates in UTC.
+
+    :param value: str
+        Date string as reported by encoding.com
+    :return: naive UTC datetime, None if the date is not set or malformed
+    :rtype: datetime
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, MEDIA_DATE_FORMAT)
+    except (TypeError, ValueError):
+        # encoding.com reports 0000-00-00 00:00:00 for dates not yet reached
+        return None
+
+
+def media_age(media: dict, now: datetime=None) -> float:
+    """
+    Age of the given media (GetMediaList entry) in seconds since its creation
+
+    :param media: dict
+        Media entry from GetMediaList
+    :param now: datetime
+        Naive UTC reference time, defaults to current time
+    :return: age in seconds, None if the creation date is unknown
+    :rtype: float
+    """
+    created = parse_media_date(media.get('createdate'))
+    if not created:
+        return None
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (now - created).total_seconds()
+
+
+def media_filter(states=None, min_age: float=None, max_age: float=None, source_pattern: str=''):
+    """
+    Build a predicate to select GetMediaList entries.
+    Filters are evaluated locally on the media list, so they cost nothing in API calls
+    and should be applied before any per media call.
+
+    :param states:
+        Iterable of states (see Encoding.STATES) to keep, all states if not specified
+    :param min_age: float
+        Keep only medias created at least min_age seconds ago
+    :param max_age: float
+        Keep only medias created at most max_age seconds ago
+    :param source_pattern: str
+        Shell style pattern (fnmatch) matched against the media source file url
+    :return: callable taking a media dict and returning True if the media is selected
+    """
+    states = frozenset(states) if states else None
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def _select(media: dict) -> bool:
+        if states is not None and media.get('mediastatus') not in states:
+            return False
+        if source_pattern and not fnmatchcase(media.get('mediafile', ''), source_pattern):
+            return False
+        if min_age is not None or max_age is not None:
+            age = media_age(media, now)
+            if age is None:
+                return False
+            if min_age is not None and age < min_age:
+                return False
+            if max_age is not None and age > max_age:
+                return False
+        return True
+
+    return _select
+
+
+def iter_medias(service: Encoding, select=None):
+    """
+    Iterate over the medias in the user's queue, optionally filtered.
+    The GetMediaList response is streamed, see Encoding.iter_media_list
+
+    :param service: Encoding
+        Encoding service class
+    :param select:
+        Predicate from media_filter(), all medias returned if not specified
+    :return: generator of media dicts (GetMediaList entries)
+    """
+    for media in service.iter_media_list():
+        if select is None or select(media):
+            yield media
@@ -0,0 +1,236 @@
+"""
+Estimate when a job will finish.
+
+ETAModel learns how long jobs stay in each state from the transitions observed by clients (pollers,
+schedulers...).  States whose duration depends on the source or the outputs are normalized by the job
+attributes from GetMediaInfo:
+* Downloading scales with the source size (duration * bitrate)
+* Processing scales with the source duration * megapixels * number of outputs
+* Saving scales with the number of outputs
+
+eta(mediaid) sums the remaining time of the current state (given the time already spent in it) and the
+durations of the states still ahead, as low/expected/high bands (10th, 50th and 90th percentiles by default).
+
+The model is small (a bounded list of samples per state) and can be persisted to a JSON file,
+so estimates survive restarts:
+
+    model = ETAModel('eta.json')
+    Poller.poll_till_status(service, media_id, eta_model=model)
+    model.save()
+
+"""
+
+from json import dump, load
+from os import replace
+from os.path import exists
+from threading import Lock
+from time import time
+
+from encodingcom.encoding import Encoding
+from encodingcom.exception import EncodingErrors
+from encodingcom.response_helper import get_response
+from encodingcom.state_tracker import StateTracker
+
+
+# order in which a job goes through the non final states
+STATE_ORDER = ('New', 'Downloading', 'Downloaded', 'Ready to process', 'Waitingforencoder', 'Processing', 'Saving')
+
+
+def parse_media_info(media_info: dict, outputs: int=1) -> dict:
+    """
+    Work units of a job, from its GetMediaInfo response
+
+    :param media_info: dict
+        GetMediaInfo response (duration in seconds, size as WxH, bitrate as 5000k)
+    :param outputs: int
+        Number of outputs (formats/renditions) of the job
+    :return: dict of state -> units of work for the normalized states
+    :rtype: dict
+    """
+    duration = float(media_info.get('duration') or 0)
+    try:
+        width, height = (int(value) for value in str(media_info.get('size', '')).split('x'))
+    except ValueError:
+        width, height = 1920, 1080
+    bitrate = float(str(media_info.get('bitrate') or '0').rstrip('kK') or 0)
+
+    return {
+        # MB downloaded
+        'Downloading': duration * bitrate / 8000.0 or None,
+        # source seconds of 1080p per output
+        'Processing': duration * width * height / (1920.0 * 1080.0) * outputs or None,
+        'Saving': float(outputs),
+    }
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ETAModel(object):
+    """
+    Per state duration model, fed with observed statuses and GetMediaInfo attributes
+    """
+
+    def __init__(self, path: str=None, max_samples: int=200, bands: tuple=(0.1, 0.5, 0.9)):
+        """
+        :param path: str
+            JSON file the model is loaded from (if it exists) and saved to, in memory only if not specified
+        :param max_samples: int
+            Samples kept per state, the most recent ones
+        :param bands: tuple
+            Percentiles of the low, expected and high estimates
+        """
+        self.path = path
+        self.max_samples = max_samples
+        self.bands = bands
+        self.tracker = StateTracker()
+
+        # state -> list of [seconds, units or None]
+        self._samples = {}
+        # media_id -> state -> units
+        self._units = {}
+        self._fetched = set()
+        self._lock = Lock()
+
+        if path and exists(path):
+            with open(path) as model:
+                self._samples = load(model).get('states', {})
+
+    def save(self):
+        """
+        Write the model to its JSON file (atomically)
+
+        :return: None
+        """
+        if not self.path:
+            return
+        with self._lock:
+            temp = self.path + '.tmp'
+            with open(temp, 'w') as model:
+                dump({'version': 1, 'states': self._samples}, model)
+            replace(temp, self.path)
+
+    def set_info(self, media_id: str, media_info: dict, outputs: int=1):
+        """
+        Give the job attributes of a mediaid, its estimates and samples are normalized by them
+
+        :param media_id: str
+        :param media_info: dict
+            GetMediaInfo response of the mediaid
+        :param outputs: int
+            Number of outputs of the job
+        :return: None
+        """
+        self._units[media_id] = parse_media_info(media_info, outputs)
+
+    def fetch_info(self, service: Encoding, media_id: str, outputs: int=1) -> bool:
+        """
+        Fetch the GetMediaInfo of a mediaid once, GetMediaInfo fails until the source is downloaded
+
+        :param service: Encoding
+        :param media_id: str
+        :param outputs: int
+        :return: True if the job attributes are known
+        :rtype: bool
+        """
+        if media_id in self._units:
+            return True
+        if media_id in self._fetched or self.tracker.status(media_id) in ('', 'New', 'Downloading'):
+            return False
+
+        self._fetched.add(media_id)
+        try:
+            status, response = service.get_media_info(False, mediaid=media_id)
+        except EncodingErrors:
+            return False
+        self.set_info(media_id, get_response(response), outputs)
+        return True
+
+    def observe(self, media_id: str, status: str, now: float=None):
+        """
+        Feed a status observed for a job (ie. from GetStatus), full state durations become samples
+
+        :param media_id: str
+        :param status: str
+        :param now: float
+            Time of the observation (epoch seconds), defaults to current time
+        :return: None
+        """
+        if now is None:
+            now = time()
+
+        entered = self.tracker.entered(media_id)
+        previous = self.tracker.update(media_id, status, now)
+        if previous and previous in STATE_ORDER:
+            units = self._units.get(media_id, {}).get(previous)
+            with self._lock:
+                samples = self._samples.setdefault(previous, [])
+                samples.append([now - entered, units])
+                del samples[:-self.max_samples]
+
+        if status in Encoding.EXIT_STATUSES:
+            self.tracker.remove(media_id)
+            self._units.pop(media_id, None)
+            self._fetched.discard(media_id)
+
+    def poller_callback(self, **kwargs):
+        """
+        Poller callback feeding the model: Poller.poll_status(service, media_id, callback=model.poller_callback)
+
+        :param kwargs: media_id, status, response
+        :return: None
+        """
+        self.observe(kwargs['media_id'], kwargs['status'])
+
+    def durations(self, status: str, units: float=None) -> [float]:
+        """
+        :param status: str
+        :param units: float
+            Units of work of the job for the state, normalized samples are used when given
+        :return: sorted sample durations of the given state, scaled to the job units when possible
+        :rtype: list
+        """
+        samples = self._samples.get(status, [])
+        if units:
+            scaled = [seconds / sample_units * units for seconds, sample_units in samples if sample_units]
+            if scaled:
+                return sorted(scaled)
+        return sorted(seconds for seconds, sample_units in samples)
+
+    def eta(self, media_id: str, now: float=None) -> dict:
+        """
+        Estimate the remaining time of a job
+
+        :param media_id: str
+        :param now: float
+            Current time (epoch seconds), defaults to current time
+        :return: dict of status, low, expected, high (seconds remaining) and samples (number of samples used),
+            None if the mediaid has not been observed
+        :rtype: dict
+        """
+        if now is None:
+            now = time()
+
+        status = self.tracker.status(media_id)
+        if not status:
+            return None
+
+        estimate = {'status': status, 'low': 0.0, 'expected': 0.0, 'high': 0.0, 'samples': 0}
+        if status not in STATE_ORDER:
+            return estimate
+
+        units = self._units.get(media_id, {})
+        in_state = self.tracker.time_in_state(media_id, now)
+        for state in STATE_ORDER[STATE_ORDER.index(status):]:
+            durations = self.durations(state, units.get(state))
+            if state == status:
+                # remaining time given the time already spent in the state
+                durations = [duration - in_state for duration in durations if duration > in_state]
+            if not durations:
+                continue
+
+            estimate['samples'] += len(durations)
+            for band, fraction in zip(('low', 'expected', 'high'), self.bands):
+                estimate[band] += _percentile(durations, fraction)
+        return estimate
@@ -48,7 +48,88 @@ class EncodingErrors(EncodingExceptionBase):
         :return:
         """
 
+        self.errors = error if isinstance(error, list) else [error]
         error = 'Encoding.com error response {0}'.format(error)
         super().__init__(error)
 
 
+
+class DeadlineExceeded(EncodingExceptionBase):
+    """
+    Deadline ran out before the operation completed
+    """
+    def __init__(self, seconds: float, media_id: str='', last_state: dict=None):
+        """
+
+        :param seconds: float
+            Duration given to the operation
+        :param media_id: str
+            mediaid waited upon, if any
+        :param last_state: dict
+            Last known GetStatus response of the mediaid (mediaid -> job status when several were waited upon),
+            None if no status was received
+        :return:
+        """
+        self.seconds = seconds
+        self.media_id = media_id
+        self.last_state = last_state
+
+        if not last_state:
+            state = 'unknown'
+        elif 'status' in last_state:
+            state = last_state['status']
+        else:
+            state = ', '.join('%s: %s' % (key, job.get('status')) for key, job in sorted(last_state.items()))
+
+        error = 'Deadline of {0}s exceeded{1}, last known state: {2}'.format(
+            seconds, ' for mediaid %s' % media_id if media_id else '', state)
+        super().__init__(error)
+
+
+class TransportError(EncodingExceptionBase):
+    """
+    No response received from encoding.com (connection failure, protocol error...)
+    """
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class TransportTimeout(TransportError):
+    """
+    Connect or read timeout ran out before a response was received
+    """
+
+
+class OutcomeUnknown(EncodingExceptionBase):
+    """
+    Submission (AddMedia, AddMediaBenchmark) sent without an answer before its timeout or deadline ran out:
+    encoding.com may have created the job.  Not a transport error, so retrying callers do not submit it
+    again blindly: look the source up in GetMediaList before submitting it again
+    """
+    def __init__(self, action: str, error: Exception):
+        """
+
+        :param action: str
+            Submission action
+        :param error: Exception
+            Timeout or DeadlineExceeded raised while waiting for the answer
+        :return:
+        """
+        self.action = action
+        self.error = error
+        super().__init__('{0} outcome unknown, the job may have been created: {1}'.format(action, error))
+
+
+class ReplayMiss(EncodingExceptionBase):
+    """
+    Query without any recorded exchange in the cassette being replayed
+    """
+    def __init__(self, query: str):
+        """
+
+        :param query: str
+            Canonical form of the scrubbed query
+        :return:
+        """
+        self.query = query
+        super().__init__('No recorded exchange for query: {0}'.format(query))
@@ -4,6 +4,8 @@ Provide format data constructors to adhere to encoding.com needs
 
 """
 
+from encodingcom.exception import InvalidParameterError
+
 
 class Format(object):
     """
@@ -11,6 +13,17 @@ class Format(object):
 
     """
 
+    # (width, height, video bitrate kbps, audio bitrate kbps), highest rendition first
+    DEFAULT_LADDER = [
+        (1920, 1080, 5000, 128),
+        (1280, 720, 3000, 128),
+        (960, 540, 1800, 96),
+        (640, 360, 900, 96),
+        (416, 234, 400, 64),
+    ]
+
+    PROFILES = frozenset(['baseline', 'main', 'high'])
+
     @staticmethod
     def thumbnail(destination: str,
                   time: str='', video_codec: str='', width: str='', keep_aspect_ratio: bool=True, rotate: str=''):
@@ -57,3 +70,184 @@ class Format(object):
             format['rotate'] = rotate
 
         return format
+
+    @staticmethod
+    def spread(count: int) -> [str]:
+        """
+        Evenly spread percentages of the video length, centered in count equal slices.
+        ie. spread(4) returns ['12.5%', '37.5%', '62.5%', '87.5%']
+
+        :param count: int
+            Number of times desired
+        :return: list of percentage time strings usable as thumbnail times
+        :rtype: list
+        """
+        if count < 1:
+            raise InvalidParameterError('thumbnail count %s, expected at least 1' % count)
+        return ['%g%%' % round((index + 0.5) * 100.0 / count, 2) for index in range(count)]
+
+    @staticmethod
+    def thumbnails(destination: str, times: list=None, count: int=0,
+                   video_codec: str='', width: str='', keep_aspect_ratio: bool=True, rotate: str='') -> (dict, list):
+        """
+        Helper method to build many thumbnails in a single thumbnail format.
+        The times are given to encoding.com as a comma delimited time list along with one destination per time.
+
+        Multiple times per thumbnail format is not part of the published request template,
+        make sure it is enabled for the account before relying on it.
+
+        :param destination: str
+            Destination URL template, formatted per thumbnail with the keys:
+            index (0 based), label (time as a url friendly string, ie. 12s or 50pct)
+            ie. 's3://bucket/title/thumb_{index:03d}.jpg'
+        :param times: list
+            Times in seconds (int, float or str) or percentages of the video length ('10%')
+        :param count: int
+            When no times are given, count thumbnails evenly spread over the video length (see spread())
+        :param video_codec:
+            video codec desired to encode for the thumbnails
+        :param width: int
+        :param keep_aspect_ratio:
+        :param rotate:
+        :return: tuple of the format dict and the manifest: list of {'time', 'destination'} per thumbnail
+        :rtype: (dict, list)
+        """
+        times = [str(time) for time in times] if times else Format.spread(count)
+
+        manifest = []
+        for index, time in enumerate(times):
+            manifest.append({
+                'time': time,
+                'destination': destination.format(index=index, label=Format._time_label(time))
+            })
+
+        format = Format.thumbnail('', time=','.join(times), video_codec=video_codec, width=width,
+                                  keep_aspect_ratio=keep_aspect_ratio, rotate=rotate)
+        format['destination'] = [item['destination'] for item in manifest]
+
+        return format, manifest
+
+    @staticmethod
+    def _time_label(time: str) -> str:
+        """
+        :param time: str
+            Thumbnail time in seconds or percentage
+        :return: url friendly representation of the time, ie. 12s, 12.5s, 50pct
+        :rtype: str
+        """
+        if time.endswith('%'):
+            return time[:-1] + 'pct'
+        return time + 's'
+
+    @staticmethod
+    def abr_ladder(destination: str, renditions: list=None, output: str='mp4', video_codec: str='libx264',
+                   profile: str='main', framerate: int=30, segment_duration: int=2,
+                   maxrate_ratio: float=1.1, bufsize_ratio: float=2.0) -> [dict]:
+        """
+        Helper method to build all the renditions of an adaptive bitrate (HLS/DASH) ladder.
+        The resulting list of formats is meant to be given as the format of a single AddMedia,
+        so encoding.com downloads the source once for the whole ladder instead of once per rendition.
+
+        All renditions share the framerate and a closed GOP of framerate * segment_duration frames,
+        so keyframes line up across renditions at every segment boundary.
+
+        :param destination: str
+            Destination URL template, formatted per rendition with the keys:
+            name (ie. 720p_3000k), width, height, bitrate (video kbps)
+            ie. 's3://bucket/title/{name}.mp4'
+        :param renditions: list
+            List of (width, height, video bitrate kbps, audio bitrate kbps) tuples, highest rendition first.
+            Audio bitrate is optional.  Defaults to Format.DEFAULT_LADDER
+        :param output: str
+            Output format of each rendition
+        :param video_codec: str
+            Video codec of each rendition
+        :param profile: str
+            H.264 profile, one of Format.PROFILES
+        :param framerate: int
+            Framerate of every rendition
+        :param segment_duration: int
+            Segment duration (in seconds) the keyframes are aligned to
+        :param maxrate_ratio: float
+            Peak bitrate relative to the rendition bitrate
+        :param bufsize_ratio: float
+            Rate control buffer size relative to the rendition bitrate
+        :return: list of format dicts, one per rendition
+        :rtype: list
+        """
+        renditions = Format.DEFAULT_LADDER if renditions is None else renditions
+        Format.validate_ladder(renditions, profile=profile, framerate=framerate, segment_duration=segment_duration)
+
+        keyframe = str(framerate * segment_duration)
+
+        formats = []
+        for rendition in renditions:
+            width, height, bitrate = rendition[:3]
+            name = '%dp_%dk' % (height, bitrate)
+            format = {
+                'output': output,
+                'video_codec': video_codec,
+                'destination': destination.format(name=name, width=width, height=height, bitrate=bitrate),
+                'size': '%dx%d' % (width, height),
+                'bitrate': '%dk' % bitrate,
+                'maxrate': '%dk' % int(bitrate * maxrate_ratio),
+                'bufsize': '%dk' % int(bitrate * bufsize_ratio),
+                'framerate': str(framerate),
+                'keyframe': keyframe,
+                'gop': 'cgop',
+                'profile': profile,
+            }
+            if len(rendition) > 3 and rendition[3]:
+                format['audio_bitrate'] = '%dk' % rendition[3]
+            formats.append(format)
+
+        return formats
+
+    @staticmethod
+    def validate_ladder(renditions: list, profile: str='main', framerate: int=30, segment_duration: int=2) -> bool:
+        """
+        Ensure the ladder is consistent before it is submitted to encoding.com.
+        Throws an exception describing the first inconsistency found.
+
+        :param renditions: list
+            List of (width, height, video bitrate kbps[, audio bitrate kbps]) tuples, highest rendition first
+        :param profile: str
+            H.264 profile, one of Format.PROFILES
+        :param framerate: int
+            Framerate of every rendition
+        :param segment_duration: int
+            Segment duration (in seconds) the keyframes are aligned to
+        :return: True if the ladder is valid
+        :rtype: bool
+        """
+        if not renditions:
+            raise InvalidParameterError('ladder has no rendition')
+        if profile not in Format.PROFILES:
+            raise InvalidParameterError('profile %s, expected one of %s' % (profile, sorted(Format.PROFILES)))
+        if int(framerate) != framerate or framerate <= 0:
+            raise InvalidParameterError('framerate %s, expected a positive integer' % framerate)
+        if int(segment_duration) != segment_duration or segment_duration <= 0:
+            raise InvalidParameterError('segment_duration %s, expected a positive integer' % segment_duration)
+
+        previous = None
+        for rendition in renditions:
+            if len(rendition) not in (3, 4):
+                raise InvalidParameterError('rendition %s, expected (width, height, bitrate[, audio_bitrate])'
+                                            % (rendition,))
+            width, height, bitrate = rendition[:3]
+            if width <= 0 or height <= 0 or width % 2 or height % 2:
+                raise InvalidParameterError('rendition size %sx%s, expected positive even dimensions'
+                                            % (width, height))
+            if bitrate <= 0:
+                raise InvalidParameterError('rendition bitrate %s, expected a positive bitrate' % bitrate)
+
+            if previous:
+                if bitrate >= previous[2]:
+                    raise InvalidParameterError('rendition bitrate %sk, expected lower than the prior %sk'
+                                                % (bitrate, previous[2]))
+                if width > previous[0] or height > previous[1]:
+                    raise InvalidParameterError('rendition size %sx%s, expected at most the prior %sx%s'
+                                                % (width, height, previous[0], previous[1]))
+            previous = rendition
+
+        return True
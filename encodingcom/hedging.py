@@ -0,0 +1,280 @@
+"""
+Hedged requests for the read only actions.
+
+A few GetStatus/GetMediaInfo calls take 10x the median (slow backend nodes), some of them until the read
+timeout.  With a HedgePolicy, Encoding sends a second identical request when the first one has not
+answered after a percentile of the observed latencies.  Read only actions are safe to send twice.
+
+The request and its hedge race: the calling thread returns the first successful response of either, and
+the error of the first request when both fail.  A request already sent cannot be interrupted, the response
+of the losing copy is dropped once it arrives.  So that the calling thread is free to return first, the
+request is sent from a thread of its own, started right away (it never waits for a busy worker); the hedges
+are sent from worker threads by a timer thread firing once the delay has run out.  Without a credit left for
+a hedge, the request is sent from the calling thread as a plain request.
+
+Hedges are paid with credits earned by the requests (budget per request, up to max_credits),
+so they stay a small fraction of the traffic even when the backend is slow across the board.
+
+    service = Encoding(user_id, user_key, hedge=HedgePolicy(percentile=0.95, budget=0.05))
+    ...
+    service.hedge.stats()
+
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappop, heappush
+from itertools import count
+from os import getpid
+from threading import Condition, Event, Lock, Thread
+from time import perf_counter
+
+from encodingcom.deadline import current_deadline
+
+
+# actions without side effects, the only ones hedged
+READ_ACTIONS = frozenset(['GetStatus', 'GetMediaInfo', 'GetMediaInfoEx'])
+
+
+class _Race(object):
+    """
+    Request and its hedge, the hedge is sent by the timer thread unless the race is over.
+    Guarded by the timer condition of the policy
+    """
+
+    __slots__ = ('action', 'send', 'deadline', 'answered', 'hedged', 'running', 'winner', 'result', 'error',
+                 'done')
+
+    def __init__(self, action: str, send, deadline):
+        self.action = action
+        self.send = send
+        self.deadline = deadline
+        # race over: a response was returned, or the request failed without a hedge in flight
+        self.answered = False
+        self.hedged = False
+        # copies sent and not answered yet
+        self.running = 1
+        # 'request' or 'hedge'
+        self.winner = None
+        self.result = None
+        self.error = None
+        self.done = Event()
+
+
+class HedgePolicy(object):
+    """
+    When to send a hedge, how many, and how often they win
+    """
+
+    def __init__(self, percentile: float=0.95, initial_delay: float=1.0, min_delay: float=0.01,
+                 min_samples: int=50, budget: float=0.05, max_credits: float=10, workers: int=8,
+                 actions=READ_ACTIONS):
+        """
+        :param percentile: float
+            Percentile of the observed latencies (per action) after which the hedge is sent
+        :param initial_delay: float
+            Seconds after which the hedge is sent until min_samples latencies are observed
+        :param min_delay: float
+            Shortest delay before a hedge
+        :param min_samples: int
+            Latencies observed before the percentile is used
+        :param budget: float
+            Hedges allowed per request, ie. 0.05 for at most 5% more requests
+        :param max_credits: float
+            Most hedges that can be sent in a burst
+        :param workers: int
+            Threads sending the hedges
+        :param actions:
+            Actions hedged, only actions without side effects may be given
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget = budget
+        self.max_credits = max_credits
+        self.workers = workers
+        self.actions = frozenset(actions)
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+
+        # action -> recent latencies of the first requests
+        self._latencies = {}
+        self._credits = float(max_credits)
+        self._lock = Lock()
+        # worker threads are started on demand
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        # heap of (due, sequence, _Race) waiting for the delay of their hedge, guarded by _timer
+        self._timer = Condition()
+        self._hedges = []
+        self._sequence = count()
+        self._timer_thread = None
+        self._pid = getpid()
+
+    def delay(self, action: str) -> float:
+        """
+        :param action: str
+        :return: seconds waited for the first request before sending the hedge
+        :rtype: float
+        """
+        with self._lock:
+            latencies = self._latencies.get(action)
+            if not latencies or len(latencies) < self.min_samples:
+                return max(self.min_delay, self.initial_delay)
+            ordered = sorted(latencies)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(self.percentile * len(ordered)))])
+
+    def stats(self) -> dict:
+        """
+        :return: requests, hedges sent, hedge wins and win rate, credits left
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'hedge_rate': self.hedged / self.requests if self.requests else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'primary_wins': self.primary_wins,
+                'win_rate': self.hedge_wins / self.hedged if self.hedged else 0.0,
+                'credits': self._credits,
+            }
+
+    def call(self, action: str, send):
+        """
+        Send the request, and a hedge if it is slow and the budget allows
+
+        :param action: str
+            Action of the request
+        :param send:
+            Function sending the request, called without arguments, called twice when hedged
+        :return: first successful result of the request or of the hedge
+        """
+        if action not in self.actions:
+            return send()
+
+        self._check_pid()
+        with self._lock:
+            self.requests += 1
+            self._credits = min(self.max_credits, self._credits + self.budget)
+            hedgeable = self._credits >= 1
+
+        if not hedgeable:
+            started = perf_counter()
+            result = send()
+            self._record(action, perf_counter() - started)
+            return result
+
+        race = _Race(action, send, current_deadline())
+        self._schedule(perf_counter() + self.delay(action), race)
+        Thread(target=self._attempt, args=(race, False), name='HedgedRequest', daemon=True).start()
+        race.done.wait()
+
+        if race.winner is None:
+            raise race.error
+        if race.hedged:
+            with self._lock:
+                if race.winner == 'hedge':
+                    self.hedge_wins += 1
+                else:
+                    self.primary_wins += 1
+        return race.result
+
+    def _record(self, action: str, latency: float):
+        """
+        Keep the latency of a successful request, the delay is a percentile of what a request takes
+        """
+        with self._lock:
+            self._latencies.setdefault(action, deque(maxlen=1000)).append(latency)
+
+    def _attempt(self, race: _Race, hedge: bool):
+        """
+        Send the request or its hedge, under the deadline of the calling thread, the first success wins
+        """
+        started = perf_counter()
+        try:
+            if race.deadline is None:
+                result = race.send()
+            else:
+                # deadlines are per thread, both copies run under the one of the calling thread
+                with race.deadline:
+                    result = race.send()
+        except Exception as ex:
+            with self._timer:
+                race.running -= 1
+                if not hedge or race.error is None:
+                    # the error of the request is the one raised when both fail
+                    race.error = ex
+                if not race.running and race.winner is None:
+                    race.answered = True
+                    race.done.set()
+            return
+
+        if not hedge:
+            # the request answering after its hedge won still tells how long requests take
+            self._record(race.action, perf_counter() - started)
+        with self._timer:
+            race.running -= 1
+            if race.winner is None:
+                race.winner = 'hedge' if hedge else 'request'
+                race.result = result
+                race.answered = True
+                race.done.set()
+
+    def _take_credit(self) -> bool:
+        with self._lock:
+            if self._credits < 1:
+                return False
+            self._credits -= 1
+            self.hedged += 1
+            return True
+
+    def _schedule(self, due: float, race: _Race):
+        """
+        Queue the hedge of the race for the timer thread, started on first use
+        """
+        with self._timer:
+            heappush(self._hedges, (due, next(self._sequence), race))
+            if self._timer_thread is None:
+                self._timer_thread = Thread(target=self._run_timer, name='HedgeTimer', daemon=True)
+                self._timer_thread.start()
+            elif self._hedges[0][2] is race:
+                # due before the one the timer thread waits for
+                self._timer.notify()
+
+    def _run_timer(self):
+        """
+        Timer thread: send the hedges whose delay ran out and whose request has not answered yet
+        """
+        timer = self._timer
+        with timer:
+            while True:
+                while self._hedges and self._hedges[0][2].answered:
+                    heappop(self._hedges)
+                if not self._hedges:
+                    timer.wait()
+                    continue
+
+                wait = self._hedges[0][0] - perf_counter()
+                if wait > 0:
+                    timer.wait(wait)
+                    continue
+
+                race = heappop(self._hedges)[2]
+                if self._take_credit():
+                    race.hedged = True
+                    race.running += 1
+                    self._executor.submit(self._attempt, race, True)
+
+    def _check_pid(self):
+        if self._pid != getpid():
+            # threads (and locks held by them) do not survive fork(), a child starts over
+            self._lock = Lock()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            self._timer = Condition()
+            self._hedges = []
+            self._timer_thread = None
+            self._pid = getpid()
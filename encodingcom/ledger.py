@@ -0,0 +1,402 @@
+"""
+Durable job ledger in SQLite, shared by processes and surviving restarts.
+
+An orchestrator restarting loses every mediaid it was tracking, rebuilding that state from GetMediaList
+and per media GetStatus takes minutes and spikes the API usage.  JobLedger keeps, in a WAL mode SQLite
+database (concurrent readers, one writer, across processes):
+* jobs: one row per mediaid with its action, source, format, last status and whether it is final
+* transitions: each state change observed, timestamped
+* last_responses: the last response of each action per mediaid
+
+Encoding(ledger=...) writes every successful action through the ledger, so pollers, batchers and
+schedulers built on the service are recorded as well.  Writing is best effort: a locked or unavailable
+database is logged by Encoding, the action result is returned all the same.  Writes are queued and committed
+in batches (batch_size rows, or flush_interval seconds after the first queued write, whichever comes first),
+the writes still queued are committed at exit.
+
+A forked child process opens its own connection on first use, the writes queued by the parent are left to it.
+
+On startup, rehydrate() fills a StateTracker with the jobs not final yet, only those need to be polled again:
+
+    ledger = JobLedger('jobs.db')
+    service = Encoding(user_id, user_key, ledger=ledger)
+    tracker = ledger.rehydrate()
+    Poller.poll_statuses(service, tracker.media_ids(), tracker=tracker)
+
+"""
+
+import sqlite3
+from atexit import register, unregister
+from json import dumps, loads
+from logging import getLogger
+from os import getpid
+from threading import RLock, Timer
+from time import time
+
+from encodingcom.response_helper import get_jobs, get_media_id, get_response
+from encodingcom.state_tracker import StateTracker
+
+
+logger = getLogger(__name__)
+
+EXIT_STATUSES = frozenset(['Finished', 'Error', 'Stopped'])
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS jobs ('
+    ' mediaid TEXT PRIMARY KEY, action TEXT, source TEXT, format TEXT,'
+    ' status TEXT, final INTEGER NOT NULL DEFAULT 0, created REAL, entered REAL, updated REAL)',
+    'CREATE INDEX IF NOT EXISTS jobs_final ON jobs (final, updated)',
+    'CREATE TABLE IF NOT EXISTS transitions ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT, mediaid TEXT NOT NULL, status TEXT NOT NULL, at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS transitions_mediaid ON transitions (mediaid, at)',
+    'CREATE TABLE IF NOT EXISTS last_responses ('
+    ' mediaid TEXT NOT NULL, action TEXT NOT NULL, response TEXT, at REAL,'
+    ' PRIMARY KEY (mediaid, action))',
+)
+
+# actions creating a job
+SUBMIT_ACTIONS = frozenset(['AddMedia', 'AddMediaBenchmark'])
+
+
+class JobLedger(object):
+    """
+    Jobs, state transitions and last responses persisted in SQLite with batched commits
+    """
+
+    def __init__(self, path: str, batch_size: int=100, flush_interval: float=1.0):
+        """
+        :param path: str
+            SQLite database file, ':memory:' for a private in memory ledger
+        :param batch_size: int
+            Queued writes triggering a commit
+        :param flush_interval: float
+            Seconds after which queued writes are committed
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._lock = RLock()
+        self._pending = []
+        self._timer = None
+        # media_id -> last status written (queued or committed), for the non final jobs seen since startup
+        self._status = {}
+        # final jobs whose status is still queued, kept in _status until committed
+        self._final = set()
+
+        self._pid = getpid()
+        self._connection = self._connect()
+        register(self.flush)
+
+    def close(self):
+        """
+        Commit the queued writes and close the database
+
+        :return: None
+        """
+        unregister(self.flush)
+        self._get_connection()
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+    def flush(self):
+        """
+        Commit the queued writes
+
+        :return: None
+        """
+        connection = self._get_connection()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                pending, self._pending = self._pending, []
+                try:
+                    with connection:
+                        for statement, parameters in pending:
+                            connection.execute(statement, parameters)
+                except sqlite3.Error:
+                    # rolled back, the writes are committed by the next flush
+                    self._pending = pending + self._pending
+                    raise
+                # final jobs are not expected to change again, keep the memory bounded
+                for media_id in self._final:
+                    self._status.pop(media_id, None)
+                self._final.clear()
+
+    # ===== Writes =====
+
+    def record_submission(self, media_id: str, action: str, source=None, format=None, now: float=None):
+        """
+        :param media_id: str
+            MediaID of the new job
+        :param action: str
+            Action that created the job (AddMedia, AddMediaBenchmark)
+        :param source:
+            Source of the job
+        :param format:
+            Format of the job
+        :param now: float
+            Time of the submission (epoch seconds), defaults to current time
+        :return: None
+        """
+        if now is None:
+            now = time()
+        self._write('INSERT OR REPLACE INTO jobs (mediaid, action, source, format, status, final, created, entered, '
+                    'updated) VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)',
+                    (media_id, action, dumps(source), dumps(format), 'New', now, now, now),
+                    media_id=media_id, status='New', now=now)
+
+    def record_status(self, media_id: str, status: str, now: float=None):
+        """
+        Record a status observed for a job, a transition is added when it differs from the last one
+
+        :param media_id: str
+        :param status: str
+        :param now: float
+            Time of the observation (epoch seconds), defaults to current time
+        :return: None
+        """
+        if now is None:
+            now = time()
+
+        self._get_connection()
+        with self._lock:
+            if self._last_status(media_id) == status:
+                return
+            # jobs submitted elsewhere (ie. before the ledger existed) are added on their first status
+            self._write('INSERT OR IGNORE INTO jobs (mediaid, created) VALUES (?, ?)', (media_id, now))
+            self._write('UPDATE jobs SET status = ?, final = ?, entered = ?, updated = ? WHERE mediaid = ?',
+                        (status, int(status in EXIT_STATUSES), now, now, media_id),
+                        media_id=media_id, status=status, now=now)
+
+    def record_response(self, media_id: str, action: str, response: dict, now: float=None):
+        """
+        :param media_id: str
+        :param action: str
+        :param response: dict
+            Response of the action for the mediaid
+        :param now: float
+            Time of the response (epoch seconds), defaults to current time
+        :return: None
+        """
+        if now is None:
+            now = time()
+        self._write('INSERT OR REPLACE INTO last_responses (mediaid, action, response, at) VALUES (?, ?, ?, ?)',
+                    (media_id, action, dumps(response), now))
+
+    def on_request(self, action: str, query: dict, result: dict):
+        """
+        Write through hook called by Encoding after each successful action
+
+        :param action: str
+            Action performed
+        :param query: dict
+            Arguments of the action
+        :param result: dict
+            Response from encoding.com
+        :return: None
+        """
+        now = time()
+        if action in SUBMIT_ACTIONS:
+            media_id = get_media_id(result)
+            if media_id:
+                self.record_submission(media_id, action, query.get('source'), query.get('format'), now)
+                self.record_response(media_id, action, get_response(result), now)
+            return
+
+        if action == 'GetStatus':
+            jobs = [job for job in get_jobs(result) if job.get('id')]
+            # one read for the last statuses of a batched GetStatus
+            self._load_statuses([job['id'] for job in jobs])
+            for job in jobs:
+                self.record_status(job['id'], job.get('status'), now)
+                self.record_response(job['id'], action, job, now)
+            return
+
+        media_ids = [media_id for media_id in str(query.get('mediaid', '')).split(',') if media_id]
+        for media_id in media_ids:
+            self.record_response(media_id, action, get_response(result), now)
+
+    def poller_callback(self, **kwargs):
+        """
+        Poller callback recording the statuses: Poller.poll_status(service, media_id, callback=ledger.poller_callback)
+
+        :param kwargs: media_id, status, response
+        :return: None
+        """
+        self.record_status(kwargs['media_id'], kwargs['status'])
+
+    # ===== Reads =====
+
+    def job(self, media_id: str) -> dict:
+        """
+        :param media_id: str
+        :return: dict of the job row (source and format decoded), None if unknown
+        :rtype: dict
+        """
+        row = self._query('SELECT mediaid, action, source, format, status, final, created, entered, updated '
+                          'FROM jobs WHERE mediaid = ?', (media_id,))
+        if not row:
+            return None
+        job = dict(zip(('mediaid', 'action', 'source', 'format', 'status', 'final', 'created', 'entered',
+                        'updated'), row[0]))
+        for key in ('source', 'format'):
+            job[key] = loads(job[key]) if job[key] else None
+        job['final'] = bool(job['final'])
+        return job
+
+    def transitions(self, media_id: str) -> [tuple]:
+        """
+        :param media_id: str
+        :return: list of (status, time) in the order observed
+        :rtype: list
+        """
+        return self._query('SELECT status, at FROM transitions WHERE mediaid = ? ORDER BY at, id', (media_id,))
+
+    def last_response(self, media_id: str, action: str) -> dict:
+        """
+        :param media_id: str
+        :param action: str
+        :return: last response of the action for the mediaid, None if none recorded
+        :rtype: dict
+        """
+        row = self._query('SELECT response FROM last_responses WHERE mediaid = ? AND action = ?', (media_id, action))
+        return loads(row[0][0]) if row else None
+
+    def pending_media_ids(self) -> [str]:
+        """
+        :return: mediaids of the jobs not final yet, oldest update first
+        :rtype: list
+        """
+        return [row[0] for row in self._query('SELECT mediaid FROM jobs WHERE final = 0 ORDER BY updated')]
+
+    def rehydrate(self, tracker: StateTracker=None) -> StateTracker:
+        """
+        Restore the state of the jobs not final yet, with the time they entered it
+
+        :param tracker: StateTracker
+            Tracker to fill, a new one is created if not specified
+        :return: tracker holding the non final jobs
+        :rtype: StateTracker
+        """
+        if tracker is None:
+            tracker = StateTracker()
+        rows = self._query('SELECT mediaid, status, created, entered FROM jobs WHERE final = 0')
+        with self._lock:
+            for media_id, status, created, entered in rows:
+                tracker.update(media_id, 'New', created)
+                if status != 'New':
+                    tracker.update(media_id, status, entered)
+                self._status[media_id] = status
+        return tracker
+
+    def rehydrate_cache(self, cache) -> int:
+        """
+        Give a ResultCache back the AddMedia jobs not final yet, so they are promoted once finished
+
+        :param cache: ResultCache
+        :return: number of jobs restored in the cache
+        :rtype: int
+        """
+        rows = self._query("SELECT mediaid, source, format FROM jobs WHERE final = 0 AND action = 'AddMedia'")
+        for media_id, source, format in rows:
+            cache.submitted(media_id, loads(source), loads(format))
+        return len(rows)
+
+    # ===== Internal Methods =====
+
+    def _last_status(self, media_id: str) -> str:
+        """
+        :return: last status of the job, from the queued writes or the committed rows (without committing the
+            queued writes), None for a job never seen
+        """
+        if media_id in self._status:
+            return self._status[media_id]
+        return self._load_statuses([media_id]).get(media_id)
+
+    def _load_statuses(self, media_ids: [str]) -> dict:
+        """
+        Read the committed statuses of the jobs not known by _status, the queued writes are not committed.
+        Every queued status is in _status, so the committed rows of the others are current
+
+        :return: media_id -> committed status of the jobs read
+        :rtype: dict
+        """
+        connection = self._get_connection()
+        statuses = {}
+        with self._lock:
+            missing = [media_id for media_id in dict.fromkeys(media_ids) if media_id not in self._status]
+            # bounded number of parameters per statement
+            for index in range(0, len(missing), 500):
+                chunk = missing[index:index + 500]
+                rows = dict(connection.execute('SELECT mediaid, status FROM jobs WHERE mediaid IN (%s)' %
+                                               ','.join('?' * len(chunk)), chunk).fetchall())
+                for media_id in chunk:
+                    status = statuses[media_id] = rows.get(media_id)
+                    if status not in EXIT_STATUSES:
+                        # final jobs are read again if ever seen again, to keep the memory bounded
+                        self._status[media_id] = status
+        return statuses
+
+    def _write(self, statement: str, parameters: tuple, media_id: str=None, status: str=None, now: float=None):
+        """
+        Queue a write, along with the transition when a status is given, commit when the batch is full or old
+
+        :return: None
+        """
+        self._get_connection()
+        with self._lock:
+            self._pending.append((statement, parameters))
+            if status is not None:
+                self._pending.append(('INSERT INTO transitions (mediaid, status, at) VALUES (?, ?, ?)',
+                                      (media_id, status, now)))
+                self._status[media_id] = status
+                if status in EXIT_STATUSES:
+                    self._final.add(media_id)
+                else:
+                    self._final.discard(media_id)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = Timer(self.flush_interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except sqlite3.Error:
+            logger.warning('JobLedger %s: flush failed, retried on the next write', self.path, exc_info=True)
+
+    def _query(self, statement: str, parameters: tuple=()) -> [tuple]:
+        connection = self._get_connection()
+        with self._lock:
+            self.flush()
+            return connection.execute(statement, parameters).fetchall()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+        return connection
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        :return: connection of the current process, a forked child opens its own
+        """
+        if self._pid != getpid():
+            # the parent's connection, lock (possibly held by another parent thread), queue and timer are left behind
+            self._lock = RLock()
+            self._pending = []
+            self._timer = None
+            self._status = {}
+            self._final = set()
+            self._pid = getpid()
+            self._connection = self._connect()
+        return self._connection
@@ -0,0 +1,70 @@
+"""
+Local HTTP server standing in for encoding.com, for the transport tests and benchmarks.
+Only the standard library is used, so it is available wherever the package is installed
+
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from time import sleep
+from urllib.parse import parse_qs
+
+
+class LocalServer(object):
+    """
+    Answers every POST with the same response, after an optional delay.
+    Bodies received are kept in bodies for assertions.
+
+    Usage:
+        with LocalServer(b'{"response": {}}') as server:
+            service.url = server.url
+    """
+
+    def __init__(self, content: bytes, delay: float=0.0, keep_bodies: bool=True):
+        """
+        :param content: bytes
+            Response content
+        :param delay: float
+            Seconds waited before answering
+        :param keep_bodies: bool
+            Keep the json field of the bodies received
+        """
+        self.content = content
+        self.delay = delay
+        self.keep_bodies = keep_bodies
+        self.bodies = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # headers and content are written separately, do not wait for the client acknowledgement in between
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if server.keep_bodies:
+                    server.bodies.append(parse_qs(body.decode('utf-8')).get('json', [''])[0])
+                if server.delay:
+                    sleep(server.delay)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(server.content)))
+                self.end_headers()
+                self.wfile.write(server.content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = 'http://127.0.0.1:%d/' % self._server.server_address[1]
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'LocalServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,188 @@
+"""
+AddMediaBenchmark -> ProcessMedia pipeline.
+
+AddMediaBenchmark starts downloading a source without encoding it, ProcessMedia later gives it its formats.
+BenchmarkPipeline submits benchmark jobs in bulk, follows them with batched GetStatus until downloaded,
+then decides their formats with a client function (optionally fed with GetMediaInfo: resolution, duration...)
+and starts them with ProcessMedia.  Downloads of the remaining jobs overlap with the format decisions.
+
+Usage:
+    def decide(source, media_id, media_info):
+        height = int(media_info['size'].split('x')[1])
+        return Format.abr_ladder('s3://bucket/%s/{name}.mp4' % media_id,
+                                 [r for r in Format.DEFAULT_LADDER if r[1] <= height])
+
+    pipeline = BenchmarkPipeline(service, decide)
+    pipeline.add_all(sources)
+    results = pipeline.run()
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+from encodingcom.batch import Batcher
+from encodingcom.encoding import Encoding
+from encodingcom.exception import EncodingErrors, OutcomeUnknown
+from encodingcom.response_helper import get_media_id, get_response
+
+
+class BenchmarkPipeline(object):
+    """
+    Bulk AddMediaBenchmark, batched tracking to downloaded, ProcessMedia with client decided formats
+    """
+
+    # states reached once the source is downloaded and the job waits for ProcessMedia
+    DOWNLOADED_STATES = frozenset(['Downloaded', 'Ready to process'])
+
+    # format given to AddMediaBenchmark, replaced by ProcessMedia
+    BENCHMARK_FORMAT = {'output': 'mp4'}
+
+    def __init__(self, service: Encoding, format_fn, media_info: bool=True, workers: int=8,
+                 interval: float=10, chunk_size: int=100, benchmark_format: dict=None):
+        """
+        :param service: Encoding
+            Encoding service class
+        :param format_fn:
+            Client function deciding the formats, called with source, media_id, media_info
+            (GetMediaInfo response, {} when media_info is False) and returning the format(s) for ProcessMedia
+        :param media_info: bool
+            Fetch GetMediaInfo of each downloaded job for format_fn
+        :param workers: int
+            Maximum number of concurrent submissions and format decisions
+        :param interval: float
+            Seconds between two batched status polls
+        :param chunk_size: int
+            Number of mediaids per GetStatus call
+        :param benchmark_format: dict
+            Format given to AddMediaBenchmark, defaults to BENCHMARK_FORMAT
+        """
+        self.service = service
+        self.format_fn = format_fn
+        self.media_info = media_info
+        self.workers = workers
+        self.interval = interval
+        self.batcher = Batcher(service, chunk_size=chunk_size, workers=min(workers, 4))
+        self.benchmark_format = benchmark_format or BenchmarkPipeline.BENCHMARK_FORMAT
+
+        # media_id -> source, jobs downloading
+        self._downloading = {}
+        # media_id -> 'Started' or list of errors
+        self.results = {}
+
+    def add(self, source, **kwargs) -> str:
+        """
+        Submit a benchmark job, its download starts right away
+
+        :param source:
+            Source as given to add_media_benchmark
+        :param kwargs:
+            Other arguments given to add_media_benchmark
+        :return: media_id of the benchmark job
+        :rtype: str
+        """
+        status, result = self.service.add_media_benchmark(source=source, format=self.benchmark_format, **kwargs)
+        media_id = get_media_id(result)
+        self._downloading[media_id] = source
+        return media_id
+
+    def add_all(self, sources, **kwargs) -> dict:
+        """
+        Submit benchmark jobs for all the sources, concurrently
+
+        :param sources:
+            Iterable of sources
+        :param kwargs:
+            Other arguments given to add_media_benchmark
+        :return: dict of source -> media_id, or the errors for the sources rejected or not submitted
+            (transport error, or outcome unknown: the job may exist at encoding.com)
+        :rtype: dict
+        """
+        errors = self.service.transport.errors
+
+        def add(source):
+            try:
+                return source, self.add(source, **kwargs)
+            except EncodingErrors as ex:
+                return source, ex.errors
+            except (OutcomeUnknown,) + errors as ex:
+                return source, [str(ex)]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(executor.map(add, sources))
+
+    def pending(self) -> int:
+        """
+        :return: number of jobs still downloading
+        :rtype: int
+        """
+        return len(self._downloading)
+
+    def step(self, executor: ThreadPoolExecutor) -> [str]:
+        """
+        Poll the jobs downloading, hand the downloaded ones to the executor for their format decision
+
+        :param executor: ThreadPoolExecutor
+        :return: media_ids handed over during this step
+        :rtype: list
+        """
+        if not self._downloading:
+            return []
+
+        result = self.batcher.dispatch('get_status', list(self._downloading))
+
+        ready = []
+        for media_id, job in result.responses.items():
+            status = job.get('status')
+            if status in BenchmarkPipeline.DOWNLOADED_STATES:
+                ready.append(media_id)
+                executor.submit(self._process, media_id, self._downloading.pop(media_id))
+            elif status in Encoding.EXIT_STATUSES:
+                self._downloading.pop(media_id)
+                self.results[media_id] = ['Job ended in %s before being processed' % status]
+        for media_id, errors in result.errors.items():
+            if media_id in result.unreachable:
+                # not an answer from encoding.com, polled again on the next step
+                continue
+            self._downloading.pop(media_id, None)
+            self.results[media_id] = errors
+
+        return ready
+
+    def run(self) -> dict:
+        """
+        Follow all the added jobs until each is started with ProcessMedia or failed
+
+        :return: dict of media_id -> 'Started' or the list of errors
+        :rtype: dict
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while self._downloading:
+                self.step(executor)
+                if self._downloading:
+                    sleep(self.interval)
+        return self.results
+
+    def _process(self, media_id: str, source):
+        """
+        Decide the formats of a downloaded job and start it, run in a worker thread
+
+        :param media_id: str
+        :param source:
+            Source of the job
+        :return: None
+        """
+        try:
+            info = {}
+            if self.media_info:
+                status, response = self.service.get_media_info(False, mediaid=media_id)
+                info = get_response(response)
+
+            format = self.format_fn(source=source, media_id=media_id, media_info=info)
+            status, response = self.service.process_media(mediaid=media_id, format=format)
+            self.results[media_id] = get_response(response).get('message', 'Started')
+        except EncodingErrors as ex:
+            self.results[media_id] = ex.errors
+        except Exception as ex:
+            # format_fn failures are reported with the job, not lost in the worker thread
+            self.results[media_id] = ['%s: %s' % (type(ex).__name__, ex)]
@@ -10,11 +10,15 @@ Pollers are obviously spammy and should only be used where appropriate.
 """
 
 from os import getenv
-from time import sleep
+from time import sleep, time
 
+from encodingcom.batch import Batcher, BatchResult
+from encodingcom.deadline import Deadline, get_deadline
 from encodingcom.encoding import Encoding
+from encodingcom.exception import DeadlineExceeded
 from encodingcom.response_helper import get_response
 from encodingcom.encoding_utils import get_latest_media
+from encodingcom.state_tracker import StateTracker
 
 
 class Poller(object):
@@ -23,7 +27,8 @@ class Poller(object):
     """
 
     @staticmethod
-    def poll_till_status(service: Encoding, media_id: str, callback=None, status='Finished', interval: float=5):
+    def poll_till_status(service: Encoding, media_id: str, callback=None, status='Finished', interval: float=5,
+                         eta_model=None, max_interval: float=600, deadline=None):
         """
         Continuously update the status of the given media_id until desired state.
         Call the given callback to handle the completion state
@@ -48,6 +53,15 @@ class Poller(object):
             Should the status not be found, callback will be invoked for either "finished" or "error"
         :param interval: float
             Interval between each polling operation
+        :param eta_model: ETAModel
+            Model fed with the observed statuses.  When waiting for Finished, the poller then sleeps until the
+            low estimate of the completion time (at least interval, at most max_interval) instead of polling
+            every interval
+        :param max_interval: float
+            Longest sleep between two polling operations when an eta_model is given
+        :param deadline:
+            Deadline or seconds given to reach the status, defaults to the Deadline active in the thread.
+            DeadlineExceeded holding the last GetStatus response is raised once it runs out
 
         :return: last state reflected by GetStatus action
         :rtype: dict
@@ -59,20 +73,33 @@ class Poller(object):
         else:
             exit_statuses = Encoding.EXIT_STATUSES
 
+        # the estimate is the completion time, waiting for an earlier state (ie. Saving) polls every interval
+        use_eta = eta_model is not None and status == 'Finished'
+
+        deadline = get_deadline(deadline)
+        response = None
         while True:
-            http_status, response = service.get_status(mediaid=media_id)
-            response = get_response(response)
-            status = response['status']
+            response = get_response(Poller._get_status(service, media_id, deadline, response))
+            current = response['status']
 
-            if status in exit_statuses:
+            if eta_model is not None:
+                eta_model.observe(media_id, current)
+
+            if current in exit_statuses:
                 if callback:
-                    callback(media_id=media_id, status=status, response=response)
+                    callback(media_id=media_id, status=current, response=response)
                 return response
 
-            sleep(interval)
+            if use_eta:
+                eta_model.fetch_info(service, media_id)
+                estimate = eta_model.eta(media_id)
+                Poller._sleep(min(max_interval, max(interval, estimate['low'])), deadline, media_id, response)
+            else:
+                Poller._sleep(interval, deadline, media_id, response)
 
     @staticmethod
-    def poll_status(service: Encoding, media_id: str, callback=None, status='Finished', interval: float=5):
+    def poll_status(service: Encoding, media_id: str, callback=None, status='Finished', interval: float=5,
+                    recorder=None, deadline=None):
         """
         Continuously poll for status changes from the prior state.
 
@@ -90,6 +117,11 @@ class Poller(object):
         :param interval: float
             Interval to poll at... some of these states goes by very quickly depending on the encoding.com bandwidth
             Set to spammy 0 if you want to track all the changes
+        :param recorder: TransitionRecorder
+            Recorder timestamping the state changes into per stage duration histograms
+        :param deadline:
+            Deadline or seconds given to reach the status, defaults to the Deadline active in the thread.
+            DeadlineExceeded holding the last GetStatus response is raised once it runs out
         :return: None
         """
 
@@ -99,21 +131,158 @@ class Poller(object):
         else:
             exit_statuses = Encoding.EXIT_STATUSES
 
+        deadline = get_deadline(deadline)
         last_status = ''
+        response = None
         while True:
-            http_status, response = service.get_status(mediaid=media_id)
-            response = get_response(response)
+            response = get_response(Poller._get_status(service, media_id, deadline, response))
             status = response['status']
 
             if status != last_status:
                 last_status = status
+                if recorder is not None:
+                    recorder.observe(media_id, status, response=response)
                 if callback:
                     callback(media_id=media_id, status=status, response=response)
 
             if status in exit_statuses:
                 return response
 
+            Poller._sleep(interval, deadline, media_id, response)
+
+    @staticmethod
+    def poll_statuses(service: Encoding, media_ids: [str], callback=None, tick_callback=None,
+                      status='Finished', interval: float=5, chunk_size: int=100,
+                      tracker: StateTracker=None, deadline=None, error_callback=None) -> StateTracker:
+        """
+        Continuously poll a set of mediaids for status changes.
+        Each tick dispatches one extended GetStatus per chunk of mediaids still being followed (see Batcher),
+        mediaids reaching an exit status are no longer polled.
+        A chunk answered with an error is split to isolate the failing mediaids, mediaids encoding.com
+        answers with an error or without a status are no longer polled either, those the transport failed
+        to reach are polled again on the next tick.
+
+        :param service: Encoding
+            service class to Encoding
+        :param media_ids: [str]
+            Desired media_ids to poll status for
+        :param callback:
+            Client callback to invoke per state change encountered, per media_id.
+            Same arguments as the poll_status() callback: media_id, status, response (the job status dict)
+        :param tick_callback:
+            Client callback to invoke after each tick with the tracker and jobs (dict of media_id -> last job status)
+        :param status: str
+            desired state for which a media_id stops being polled, on top of the exit statuses
+        :param interval: float
+            Interval between each tick
+        :param chunk_size: int
+            Maximum number of mediaids per GetStatus call
+        :param tracker: StateTracker
+            Tracker to record the state changes into, a new one is created if not specified
+        :param deadline:
+            Deadline or seconds given to all the media_ids, defaults to the Deadline active in the thread.
+            DeadlineExceeded holding the last job status of each media_id is raised once it runs out
+        :param error_callback:
+            Client callback to invoke with media_id, errors for each media_id dropped on an error
+        :return: tracker holding the last known state of all the media_ids
+        :rtype: StateTracker
+        """
+
+        if status not in Encoding.EXIT_STATUSES:
+            exit_statuses = set(Encoding.EXIT_STATUSES)
+            exit_statuses.add(status)
+        else:
+            exit_statuses = Encoding.EXIT_STATUSES
+
+        if tracker is None:
+            tracker = StateTracker()
+
+        deadline = get_deadline(deadline)
+        batcher = Batcher(service, chunk_size=chunk_size, workers=1)
+        jobs = {}
+        remaining = [str(media_id) for media_id in media_ids]
+        while remaining:
+            now = time()
+            result = Poller._dispatch_status(batcher, remaining, deadline, jobs)
+            for media_id, job in result.responses.items():
+                jobs[media_id] = job
+                job_status = job.get('status')
+                if tracker.update(media_id, job_status, now) is not None and callback:
+                    callback(media_id=media_id, status=job_status, response=job)
+
+            dropped = {media_id: errors for media_id, errors in result.errors.items()
+                       if media_id not in result.unreachable}
+            if error_callback:
+                for media_id, errors in dropped.items():
+                    error_callback(media_id=media_id, errors=errors)
+
+            remaining = [media_id for media_id in remaining
+                         if media_id not in dropped and tracker.status(media_id) not in exit_statuses]
+
+            if tick_callback:
+                tick_callback(tracker=tracker, jobs=jobs)
+
+            if remaining:
+                Poller._sleep(interval, deadline, '', jobs)
+
+        return tracker
+
+    @staticmethod
+    def _get_status(service: Encoding, media_id, deadline: Deadline, last_state: dict) -> dict:
+        """
+        GetStatus under the deadline, DeadlineExceeded reports the last known state
+
+        :param service: Encoding
+        :param media_id:
+            mediaid or list of mediaids
+        :param deadline: Deadline
+            None for no deadline
+        :param last_state: dict
+            Last known state reported if the deadline runs out
+        :return: entire response data of GetStatus
+        :rtype: dict
+        """
+        if deadline is None:
+            return service.get_status(mediaid=media_id)[1]
+
+        try:
+            with deadline:
+                return service.get_status(mediaid=media_id)[1]
+        except DeadlineExceeded:
+            raise DeadlineExceeded(deadline.seconds, media_id if isinstance(media_id, str) else '', last_state)
+
+    @staticmethod
+    def _dispatch_status(batcher: Batcher, media_ids: [str], deadline: Deadline, last_state: dict) -> BatchResult:
+        """
+        Batched GetStatus under the deadline, DeadlineExceeded reports the last known states
+
+        :param batcher: Batcher
+        :param media_ids: [str]
+        :param deadline: Deadline
+            None for no deadline
+        :param last_state: dict
+            Last known states reported if the deadline runs out
+        :return: merged result of the GetStatus calls
+        :rtype: BatchResult
+        """
+        if deadline is None:
+            return batcher.dispatch('get_status', media_ids)
+
+        try:
+            with deadline:
+                return batcher.dispatch('get_status', media_ids)
+        except DeadlineExceeded:
+            raise DeadlineExceeded(deadline.seconds, '', last_state)
+
+    @staticmethod
+    def _sleep(interval: float, deadline: Deadline, media_id: str, last_state: dict):
+        """
+        Sleep between two polls, at most until the deadline
+        """
+        if deadline is None:
             sleep(interval)
+        else:
+            deadline.sleep(interval, media_id, last_state)
 
     @staticmethod
     def print_response(**kwargs):
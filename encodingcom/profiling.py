@@ -0,0 +1,300 @@
+"""
+Profiling mode of Encoding and the tools.
+
+When enabled, each Encoding action records its wall time and CPU time (of the calling thread) per phase:
+* build: requirements check and request builder lookup
+* serialize: JSON and form url encoding of the query
+* network: HTTP round trip to encoding.com
+* decode: response decoding and JSON parsing
+* error_check: error detection in the response
+Tools add their own phases (ie. printing) with measure().  A large wall time with little CPU time is
+waiting (network), CPU time close to the wall time is work done by the client.
+
+Optionally a sampling profiler records the stacks of all the threads every few milliseconds, written as
+collapsed stacks ("frame;frame;frame count" lines) for flamegraph.pl, speedscope or inferno.
+
+Enabled by the tools --profile / --profile-stacks=FILE flags, or the environment:
+    ENCODINGCOM_PROFILE=1
+    ENCODINGCOM_PROFILE_STACKS=stacks.txt
+The report is written to stderr at exit.  When disabled nothing is recorded, Encoding only checks its
+profiler attribute is None.
+
+"""
+
+import sys
+from atexit import register
+from contextlib import contextmanager
+from os import environ
+from threading import Event, Lock, Thread, get_ident, local
+from time import perf_counter, thread_time
+
+
+PROFILE_ENV = 'ENCODINGCOM_PROFILE'
+STACKS_ENV = 'ENCODINGCOM_PROFILE_STACKS'
+
+# phases of an Encoding action, in order
+PHASES = ('build', 'serialize', 'network', 'decode', 'error_check')
+
+
+class PhaseTimer(object):
+    """
+    Times the successive phases of one action in the calling thread
+    """
+
+    __slots__ = ('profiler', 'action', 'wall', 'cpu', 'phases')
+
+    def __init__(self, profiler: 'Profiler', action: str):
+        self.profiler = profiler
+        self.action = action
+        self.phases = set()
+        self.wall = perf_counter()
+        self.cpu = thread_time()
+
+    def lap(self, phase: str):
+        """
+        Record the time since the previous lap (or the start) as the given phase
+
+        :param phase: str
+        :return: None
+        """
+        wall = perf_counter()
+        cpu = thread_time()
+        self.profiler.record(self.action, phase, wall - self.wall, cpu - self.cpu)
+        self.phases.add(phase)
+        self.wall = wall
+        self.cpu = cpu
+
+
+class Profiler(object):
+    """
+    Wall and CPU time totals per action and phase
+    """
+
+    def __init__(self):
+        # (action, phase) -> [calls, wall, cpu]
+        self._stats = {}
+        self._lock = Lock()
+        self._local = local()
+
+    def timer(self, action: str) -> PhaseTimer:
+        """
+        Start timing an action in the calling thread
+
+        :param action: str
+        :return: timer, current() until finish()
+        :rtype: PhaseTimer
+        """
+        timer = self._local.timer = PhaseTimer(self, action)
+        return timer
+
+    def current(self) -> PhaseTimer:
+        """
+        :return: timer of the action running in the calling thread, None if none
+        :rtype: PhaseTimer
+        """
+        return getattr(self._local, 'timer', None)
+
+    def finish(self):
+        """
+        End the action of the calling thread
+
+        :return: None
+        """
+        self._local.timer = None
+
+    def record(self, action: str, phase: str, wall: float, cpu: float):
+        """
+        :param action: str
+        :param phase: str
+        :param wall: float
+            Wall time in seconds
+        :param cpu: float
+            CPU time in seconds
+        :return: None
+        """
+        with self._lock:
+            stats = self._stats.get((action, phase))
+            if stats is None:
+                stats = self._stats[(action, phase)] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += wall
+            stats[2] += cpu
+
+    @contextmanager
+    def measure(self, action: str, phase: str):
+        """
+        Context manager recording its block as a phase of an action (ie. tool output)
+        """
+        wall = perf_counter()
+        cpu = thread_time()
+        try:
+            yield
+        finally:
+            self.record(action, phase, perf_counter() - wall, thread_time() - cpu)
+
+    def stats(self) -> dict:
+        """
+        :return: dict of (action, phase) -> dict of calls, wall, cpu (seconds)
+        :rtype: dict
+        """
+        with self._lock:
+            return dict((key, {'calls': calls, 'wall': wall, 'cpu': cpu})
+                        for key, (calls, wall, cpu) in self._stats.items())
+
+    def report(self, out=None):
+        """
+        Write the stats as a table, one row per action and phase, with a total row per action
+
+        :param out:
+            File like object to write to, defaults to stderr
+        :return: None
+        """
+        out = out or sys.stderr
+        stats = self.stats()
+        order = dict((phase, index) for index, phase in enumerate(PHASES))
+
+        print('%-22s %-12s %8s %10s %10s %11s %11s %6s' %
+              ('ACTION', 'PHASE', 'CALLS', 'WALL S', 'CPU S', 'WALL MS/CALL', 'CPU MS/CALL', 'CPU%'), file=out)
+        for action in sorted(set(action for action, phase in stats)):
+            phases = sorted((phase for name, phase in stats if name == action),
+                            key=lambda phase: (order.get(phase, len(order)), phase))
+            rows = [(phase, stats[(action, phase)]) for phase in phases]
+            if len(rows) > 1:
+                rows.append(('total', {'calls': max(row['calls'] for phase, row in rows),
+                                       'wall': sum(row['wall'] for phase, row in rows),
+                                       'cpu': sum(row['cpu'] for phase, row in rows)}))
+            for phase, row in rows:
+                print('%-22s %-12s %8d %10.3f %10.3f %11.3f %11.3f %5.0f%%' %
+                      (action, phase, row['calls'], row['wall'], row['cpu'],
+                       row['wall'] * 1000 / row['calls'], row['cpu'] * 1000 / row['calls'],
+                       100 * row['cpu'] / row['wall'] if row['wall'] else 0), file=out)
+
+
+class SamplingProfiler(object):
+    """
+    Samples the stacks of all the threads at a fixed interval, as collapsed stacks
+    """
+
+    def __init__(self, interval: float=0.005):
+        """
+        :param interval: float
+            Seconds between two samples
+        """
+        self.interval = interval
+        # collapsed stack -> samples
+        self.stacks = {}
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start sampling in a daemon thread
+
+        :return: None
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = Thread(target=self._run, name='SamplingProfiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        :return: None
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def write(self, path: str):
+        """
+        Write the collapsed stacks, one "frame;frame;frame count" line per distinct stack
+
+        :param path: str
+        :return: None
+        """
+        with open(path, 'w') as stacks:
+            for stack, count in sorted(self.stacks.items()):
+                stacks.write('%s %d\n' % (stack, count))
+
+    def _run(self):
+        own = get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append('%s:%s' % (code.co_filename.rsplit('/', 1)[-1], code.co_name))
+                    frame = frame.f_back
+                stack = ';'.join(reversed(frames))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+
+_profiler = None
+_sampler = None
+_enabled = Lock()
+# the environment is only read by the first get_profiler(), enable() still works afterwards
+_environment_read = False
+
+
+def enable(stacks: str=None, interval: float=0.005) -> Profiler:
+    """
+    Enable the profiling mode of the process: Encoding instances created afterwards record their phases,
+    the report is written to stderr at exit
+
+    :param stacks: str
+        File the sampled collapsed stacks are written to at exit, no sampling if not specified
+    :param interval: float
+        Seconds between two stack samples
+    :return: profiler shared by the process
+    :rtype: Profiler
+    """
+    global _profiler, _sampler
+    with _enabled:
+        if _profiler is None:
+            _profiler = Profiler()
+            register(_profiler.report)
+        if stacks and _sampler is None:
+            sampler = _sampler = SamplingProfiler(interval)
+            sampler.start()
+
+            def write():
+                sampler.stop()
+                sampler.write(stacks)
+            register(write)
+    return _profiler
+
+
+def get_profiler() -> Profiler:
+    """
+    :return: profiler of the process, enabled from the environment on first call if requested, None when disabled
+    :rtype: Profiler
+    """
+    global _environment_read
+    if _profiler is None and not _environment_read:
+        _environment_read = True
+        if environ.get(PROFILE_ENV, '') not in ('', '0') or environ.get(STACKS_ENV):
+            enable(stacks=environ.get(STACKS_ENV))
+    return _profiler
+
+
+@contextmanager
+def _disabled():
+    yield
+
+
+def measure(action: str, phase: str):
+    """
+    Context manager recording its block as a phase of an action when profiling is enabled.
+    Called per output line by the tools: once the environment was read, disabled costs two global lookups
+
+    :param action: str
+    :param phase: str
+    :return: context manager
+    """
+    profiler = _profiler if _environment_read else get_profiler()
+    if profiler is None:
+        return _disabled()
+    return profiler.measure(action, phase)
@@ -2,7 +2,8 @@
 request template used by encoding.com
 ref: http://api.encoding.com/#CompleteXMLTemplate
 
-DO NOT import this file as this is here as strictly reference purposes
+DO NOT import this file as this is here as strictly reference purposes.
+The only exception is encodingcom/validator.py, compiling it once into the checks of the strict mode.
 
 """
 
@@ -52,4 +52,47 @@ def get_format(data: dict) -> dict:
         if result:
             return result
 
-    return {}
\ No newline at end of file
+    return {}
+
+
+def get_medias(data: dict) -> [dict]:
+    """
+    Retrieve the list of medias from a GetMediaList response.
+    encoding.com collapses a single item list into a dict, this always returns a list.
+
+    :param data: dict
+        Entire response data returned by GetMediaList
+    :return: list of media dicts, [] if none found
+    :rtype: list
+    """
+    response = get_response(data)
+    medias = response.get('media')
+    if not medias:
+        return []
+    if isinstance(medias, dict):
+        return [medias]
+    return medias
+
+
+def get_jobs(data: dict) -> [dict]:
+    """
+    Retrieve the per mediaid job statuses from a GetStatus response.
+    Handles both the single mediaid response (job details at the response level)
+    and the extended variant (list of jobs under the 'job' key).
+
+    :param data: dict
+        Entire response data returned by GetStatus
+    :return: list of job status dicts, [] if none found
+    :rtype: list
+    """
+    response = get_response(data)
+    if not response:
+        return []
+
+    jobs = response.get('job')
+    if jobs is None:
+        # single mediaid variant, the response itself is the job
+        return [response] if 'status' in response else []
+    if isinstance(jobs, dict):
+        return [jobs]
+    return jobs
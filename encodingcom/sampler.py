@@ -0,0 +1,181 @@
+"""
+Account level queue depth and throughput sampler.
+
+QueueSampler periodically counts the jobs of the account in each state, and how many jobs arrived and
+finished since the previous sample.  Each sample is one GetMediaList (discovers new and purged mediaids)
+plus chunked extended GetStatus calls.  The GetStatus calls only cover the jobs not final yet after the first
+pass, final jobs keep their last known state, so the cost follows the active jobs, not the account history.
+
+Samples are kept in ring buffers (the last capacity samples), exposed through series() and latest(),
+and by tools/queue_sampler.py.
+
+    sampler = QueueSampler(service, interval=60)
+    sampler.start()
+    ...
+    sampler.series('Waitingforencoder')
+    sampler.series('completion_rate')
+
+"""
+
+from collections import deque
+from threading import Event, Lock, Thread
+from time import time
+
+from encodingcom.batch import Batcher
+from encodingcom.encoding import Encoding
+from encodingcom.encoding_utils import iter_medias
+
+
+class QueueSampler(object):
+    """
+    Background sampler of per state job counts, arrival rate and completion rate
+    """
+
+    def __init__(self, service: Encoding, interval: float=60, capacity: int=1440, chunk_size: int=100,
+                 workers: int=4):
+        """
+        :param service: Encoding
+            Encoding service class
+        :param interval: float
+            Seconds between two samples
+        :param capacity: int
+            Samples kept in the ring buffers (1440 samples of 60 seconds is a day)
+        :param chunk_size: int
+            Number of mediaids per GetStatus call
+        :param workers: int
+            Maximum number of concurrent GetStatus calls
+        """
+        self.service = service
+        self.interval = interval
+        self.batcher = Batcher(service, chunk_size=chunk_size, workers=workers)
+        self.samples = deque(maxlen=capacity)
+
+        # media_id -> last known status
+        self._statuses = {}
+        self._first = True
+        self._last = None
+        self.last_error = None
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def sample(self, now: float=None) -> dict:
+        """
+        Take one sample
+
+        :param now: float
+            Time of the sample (epoch seconds), defaults to current time
+        :return: sample: time, counts (state -> jobs), arrivals and completions since the previous sample,
+            arrival_rate and completion_rate (jobs per minute)
+        :rtype: dict
+        """
+        if now is None:
+            now = time()
+
+        listed = {}
+        for media in iter_medias(self.service):
+            listed[media.get('mediaid')] = media.get('mediastatus')
+
+        arrivals = [media_id for media_id in listed if media_id not in self._statuses]
+        # purged from the account
+        for media_id in [media_id for media_id in self._statuses if media_id not in listed]:
+            del self._statuses[media_id]
+
+        if self._first:
+            polled = list(listed)
+        else:
+            polled = arrivals + [media_id for media_id, status in self._statuses.items()
+                                 if status not in Encoding.EXIT_STATUSES]
+
+        completions = 0
+        new = set(arrivals)
+        for media_id in arrivals:
+            # the GetMediaList status stands in if GetStatus fails
+            self._statuses[media_id] = listed[media_id]
+
+        result = self.batcher.dispatch('get_status', polled)
+        for media_id, job in result.responses.items():
+            status = job.get('status')
+            previous = None if media_id in new else self._statuses.get(media_id)
+            if status in Encoding.EXIT_STATUSES and previous not in Encoding.EXIT_STATUSES and not self._first:
+                completions += 1
+            self._statuses[media_id] = status
+
+        counts = {}
+        for status in self._statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+
+        elapsed = (now - self._last) if self._last is not None else None
+        sample = {
+            'time': now,
+            'counts': counts,
+            'polled': len(polled),
+            # the first pass discovers the backlog, it is not an arrival burst
+            'arrivals': 0 if self._first else len(arrivals),
+            'completions': completions,
+            'arrival_rate': len(arrivals) * 60.0 / elapsed if elapsed else None,
+            'completion_rate': completions * 60.0 / elapsed if elapsed else None,
+        }
+
+        with self._lock:
+            self.samples.append(sample)
+        self._first = False
+        self._last = now
+        return sample
+
+    def latest(self) -> dict:
+        """
+        :return: last sample taken, None before the first one
+        :rtype: dict
+        """
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    def series(self, name: str) -> [tuple]:
+        """
+        :param name: str
+            State (jobs in that state) or sample key (arrivals, completions, arrival_rate, completion_rate, polled)
+        :return: list of (time, value) of the samples in the ring buffer
+        :rtype: list
+        """
+        with self._lock:
+            samples = list(self.samples)
+        if name in Encoding.STATES:
+            return [(sample['time'], sample['counts'].get(name, 0)) for sample in samples]
+        return [(sample['time'], sample[name]) for sample in samples]
+
+    def start(self):
+        """
+        Start sampling every interval in a daemon thread
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='QueueSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float=None):
+        """
+        Stop the sampling thread
+
+        :param timeout: float
+            Seconds waited for the thread to finish its current sample
+        :return: None
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            started = time()
+            try:
+                self.sample(started)
+            except Exception as ex:
+                # a failed sample (network, encoding.com errors) is skipped, the next one may succeed
+                self.last_error = ex
+            if self._stop.wait(max(0.0, self.interval - (time() - started))):
+                return
@@ -0,0 +1,286 @@
+"""
+Local submission scheduler in front of Encoding.add_media.
+
+Pushing thousands of AddMedia at once leaves everything in Waitingforencoder, urgent jobs queued behind
+bulk backfills.  SubmissionScheduler keeps at most max_in_flight jobs in non final states at encoding.com,
+refreshed with batched GetStatus calls, and decides what to submit next:
+* priority classes are served strictly in order (0 first)
+* within a priority class, tenants share the capacity by weight (stride scheduling)
+
+The limit can be adapted to the observed encoder queue time with an AIMDController
+(see encodingcom/concurrency.py).
+
+Queued jobs are compact specs (source, interned format, tenant), so memory stays bounded
+by the number of queued jobs and distinct formats.
+
+"""
+
+from collections import deque
+from itertools import count
+from json import dumps
+from time import sleep, time
+
+from encodingcom.batch import Batcher
+from encodingcom.encoding import Encoding
+from encodingcom.exception import EncodingErrors, OutcomeUnknown
+from encodingcom.response_helper import get_media_id
+from encodingcom.state_tracker import StateTracker
+
+
+class JobSpec(object):
+    """
+    Compact description of a queued job
+    """
+
+    __slots__ = ('token', 'tenant', 'priority', 'source', 'format', 'extra')
+
+    def __init__(self, token: int, tenant: str, priority: int, source, format, extra: dict):
+        self.token = token
+        self.tenant = tenant
+        self.priority = priority
+        self.source = source
+        self.format = format
+        self.extra = extra
+
+
+class SubmissionScheduler(object):
+    """
+    Caps the number of jobs in flight at encoding.com, with priorities and weighted fairness across tenants.
+
+    Usage:
+        scheduler = SubmissionScheduler(service, max_in_flight=100, weights={'partner': 3, 'backfill': 1})
+        scheduler.submit('http://host/a.mov', format, tenant='partner', priority=0)
+        scheduler.run()
+    """
+
+    def __init__(self, service: Encoding, max_in_flight: int=50, weights: dict=None, interval: float=10,
+                 chunk_size: int=100, on_submitted=None, on_finished=None, on_error=None, controller=None):
+        """
+        :param service: Encoding
+            Encoding service class
+        :param max_in_flight: int
+            Maximum number of jobs in non final states
+        :param weights: dict
+            tenant -> weight, tenants not listed have a weight of 1
+        :param interval: float
+            Seconds between two steps of run()
+        :param chunk_size: int
+            Number of mediaids per GetStatus call refreshing the jobs in flight
+        :param on_submitted:
+            Callback invoked with token, media_id once a job is submitted
+        :param on_finished:
+            Callback invoked with token, media_id, status once a job reaches an exit status
+        :param on_error:
+            Callback invoked with token, errors when a submission is rejected by encoding.com or its outcome
+            is unknown (OutcomeUnknown, not requeued), or when encoding.com answers GetStatus of a job in flight
+            with an error (the job is dropped)
+        :param controller: AIMDController
+            Adaptive controller fed with every status observed, its limit replaces max_in_flight
+        """
+        self.service = service
+        self.max_in_flight = max_in_flight
+        self.weights = weights or {}
+        self.interval = interval
+        self.batcher = Batcher(service, chunk_size=chunk_size)
+        self.tracker = StateTracker()
+
+        self.on_submitted = on_submitted
+        self.on_finished = on_finished
+        self.on_error = on_error
+        self.controller = controller
+
+        # priority -> tenant -> deque of JobSpec
+        self._queues = {}
+        # priority -> tenant -> pass value of the stride scheduling
+        self._passes = {}
+        # canonical json -> format, identical formats are kept once
+        self._formats = {}
+        # media_id -> token
+        self._in_flight = {}
+        self._tokens = count(1)
+        self._queued = 0
+
+    @property
+    def limit(self) -> int:
+        """
+        :return: current maximum number of jobs in flight
+        :rtype: int
+        """
+        if self.controller is not None:
+            return self.controller.limit
+        return self.max_in_flight
+
+    def __len__(self) -> int:
+        """
+        :return: number of jobs queued locally
+        :rtype: int
+        """
+        return self._queued
+
+    def in_flight(self) -> int:
+        """
+        :return: number of jobs submitted and not yet in an exit status
+        :rtype: int
+        """
+        return len(self._in_flight)
+
+    def submit(self, source, format, tenant: str='default', priority: int=1, **kwargs) -> int:
+        """
+        Queue a job for submission
+
+        :param source:
+            Source as given to add_media
+        :param format:
+            Format as given to add_media
+        :param tenant: str
+            Tenant the job is accounted to for fair sharing
+        :param priority: int
+            Priority class, 0 is served first
+        :param kwargs:
+            Other arguments given to add_media
+        :return: token identifying the job in the callbacks
+        :rtype: int
+        """
+        key = dumps(format, sort_keys=True)
+        format = self._formats.setdefault(key, format)
+
+        token = next(self._tokens)
+        tenants = self._queues.setdefault(priority, {})
+        passes = self._passes.setdefault(priority, {})
+        if tenant not in tenants or not tenants[tenant]:
+            # a tenant (re)joining starts at the current virtual time, it is not owed past capacity
+            active = [passes[name] for name, queue in tenants.items() if queue]
+            passes[tenant] = max(passes.get(tenant, 0.0), min(active) if active else 0.0)
+            tenants.setdefault(tenant, deque())
+
+        tenants[tenant].append(JobSpec(token, tenant, priority, source, format, kwargs or None))
+        self._queued += 1
+        return token
+
+    def step(self) -> [int]:
+        """
+        Refresh the state of the jobs in flight and submit queued jobs up to the limit
+
+        :return: tokens of the jobs submitted during this step
+        :rtype: list
+        """
+        self.refresh()
+
+        submitted = []
+        while self._queued and len(self._in_flight) < self.limit:
+            spec = self._next()
+            try:
+                if self._submit(spec):
+                    submitted.append(spec.token)
+            except self.service.transport.errors:
+                # encoding.com unreachable, the job was requeued for a later step
+                break
+        return submitted
+
+    def run(self):
+        """
+        Step until all queued jobs have been submitted and have reached an exit status
+
+        :return: None
+        """
+        while True:
+            self.step()
+            if not self._queued and not self._in_flight:
+                return
+            sleep(self.interval)
+
+    def refresh(self):
+        """
+        Update the state of the jobs in flight with batched GetStatus calls.
+        Jobs encoding.com answers with an error (ie. unknown or deleted mediaid) are dropped through on_error,
+        those the transport failed to reach are refreshed again on the next step
+
+        :return: None
+        """
+        if not self._in_flight:
+            return
+
+        now = time()
+        result = self.batcher.dispatch('get_status', list(self._in_flight))
+        for media_id, job in result.responses.items():
+            status = job.get('status')
+            self.tracker.update(media_id, status, now)
+            if self.controller is not None:
+                self.controller.observe(media_id, status, now)
+            if status in Encoding.EXIT_STATUSES:
+                token = self._in_flight.pop(media_id, None)
+                self.tracker.remove(media_id)
+                if token is not None and self.on_finished:
+                    self.on_finished(token=token, media_id=media_id, status=status)
+
+        for media_id, errors in result.errors.items():
+            if media_id in result.unreachable:
+                continue
+            token = self._in_flight.pop(media_id, None)
+            self.tracker.remove(media_id)
+            if token is not None and self.on_error:
+                self.on_error(token=token, errors=errors)
+
+    def _next(self) -> JobSpec:
+        """
+        Pop the next job: most urgent priority class, tenant with the lowest pass value
+
+        :return: job spec
+        :rtype: JobSpec
+        """
+        for priority in sorted(self._queues):
+            tenants = self._queues[priority]
+            passes = self._passes[priority]
+            candidates = [tenant for tenant, queue in tenants.items() if queue]
+            if not candidates:
+                continue
+
+            tenant = min(candidates, key=lambda name: passes[name])
+            passes[tenant] += 1.0 / self.weights.get(tenant, 1)
+            self._queued -= 1
+            return tenants[tenant].popleft()
+
+    def _requeue(self, spec: JobSpec):
+        """
+        Put back a job popped by _next at the head of its queue, its tenant is not charged for it
+
+        :param spec: JobSpec
+        :return: None
+        """
+        self._queues[spec.priority][spec.tenant].appendleft(spec)
+        self._passes[spec.priority][spec.tenant] -= 1.0 / self.weights.get(spec.tenant, 1)
+        self._queued += 1
+
+    def _submit(self, spec: JobSpec) -> bool:
+        """
+        :param spec: JobSpec
+        :return: True if encoding.com accepted the job, False if it was rejected and dropped through on_error
+        :rtype: bool
+        """
+        try:
+            status, result = self.service.add_media(source=spec.source, format=spec.format, **(spec.extra or {}))
+        except EncodingErrors as ex:
+            if self.on_error:
+                self.on_error(token=spec.token, errors=ex.errors)
+            return False
+        except OutcomeUnknown as ex:
+            # the job may exist at encoding.com, requeuing it could transcode it twice
+            if self.on_error:
+                self.on_error(token=spec.token, errors=[str(ex)])
+            return False
+        except self.service.transport.errors:
+            # encoding.com unreachable, nothing was created: the job is not lost
+            self._requeue(spec)
+            raise
+        except Exception as ex:
+            # failed before reaching encoding.com (ie. strict validation), submitting it again fails the same way
+            if self.on_error:
+                self.on_error(token=spec.token, errors=[str(ex)])
+            return False
+
+        media_id = get_media_id(result)
+        self._in_flight[media_id] = spec.token
+        self.tracker.update(media_id, 'New')
+        if self.on_submitted:
+            self.on_submitted(token=spec.token, media_id=media_id)
+        return True
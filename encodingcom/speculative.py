@@ -0,0 +1,389 @@
+"""
+Speculative duplicate submission for straggler transcodes.
+
+A few slow encoder nodes make the p99 completion time several times the median.  SpeculativeRunner
+follows submitted jobs with batched GetStatus, and once a job runs past a percentile of the observed
+completion times it submits a duplicate (same source and format) through add_media.  The first copy
+reaching Finished wins, the other copy is cancelled with cancel_media.  A budget caps how many
+duplicates run at once, and a job gets a single duplicate: a failed duplicate is not submitted again.
+
+The percentile is a Kaplan-Meier estimate over the durations of the originals: an original finishing
+gives its full duration, an original cancelled because its duplicate won is a duration cut short (it would
+have taken longer).  Dropping the cut short durations, or counting them as complete, would lower the
+percentile at each step and duplicate ever more jobs.
+
+A duplicate submission timing out may have created the job (OutcomeUnknown): it is looked up in the queue
+by source to be followed, and cancelled if it loses.
+
+simulate() evaluates the tail latency improvement on a modeled workload, see tools/speculative_simulation.py
+
+"""
+
+from collections import deque
+from heapq import heappush, heappop
+from random import Random
+from time import sleep, time
+
+from encodingcom.batch import Batcher
+from encodingcom.encoding import Encoding
+from encodingcom.encoding_utils import iter_medias
+from encodingcom.exception import EncodingErrors, OutcomeUnknown
+from encodingcom.response_helper import get_media_id
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    :param values: list
+        Samples, in any order
+    :param fraction: float
+        Percentile as a fraction, ie. 0.99
+    :return: nearest rank percentile of the samples, None without samples
+    :rtype: float
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def censored_percentile(samples: list, fraction: float) -> float:
+    """
+    Kaplan-Meier estimate of a percentile, from durations some of which were cut short
+
+    :param samples: list
+        (duration, observed) pairs, observed is False for a duration cut short: the real one is longer
+    :param fraction: float
+        Percentile as a fraction, ie. 0.99
+    :return: percentile of the durations (nearest rank without cut short samples), the longest sample when the
+        cut short samples leave the percentile unknown, None without samples
+    :rtype: float
+    """
+    if not samples:
+        return None
+    # at the same duration, the observed samples are counted before the ones cut short
+    ordered = sorted(samples, key=lambda sample: (sample[0], not sample[1]))
+    at_risk = len(ordered)
+    survival = 1.0
+    for duration, observed in ordered:
+        if observed:
+            survival *= 1.0 - 1.0 / at_risk
+            if 1.0 - survival > fraction:
+                return duration
+        at_risk -= 1
+    return ordered[-1][0]
+
+
+class SpeculativeRunner(object):
+    """
+    Duplicates jobs running past a percentile of the expected duration, first copy to finish wins
+    """
+
+    def __init__(self, service: Encoding, percentile: float=0.9, expected: float=None, min_samples: int=20,
+                 max_duplicates: int=5, chunk_size: int=100, on_finished=None):
+        """
+        :param service: Encoding
+            Encoding service class
+        :param percentile: float
+            Percentile of the observed completion times past which a job is duplicated
+        :param expected: float
+            Seconds past which a job is duplicated until min_samples completions are observed,
+            no duplicate is submitted before that when not specified
+        :param min_samples: int
+            Completions observed before the percentile is used
+        :param max_duplicates: int
+            Maximum number of duplicates running at once
+        :param chunk_size: int
+            Number of mediaids per GetStatus call
+        :param on_finished:
+            Callback invoked with media_id (of the original job), winner (media_id of the winning copy),
+            status, duration once a job is over
+        """
+        self.service = service
+        self.percentile = percentile
+        self.expected = expected
+        self.min_samples = min_samples
+        self.max_duplicates = max_duplicates
+        self.batcher = Batcher(service, chunk_size=chunk_size)
+        self.on_finished = on_finished
+
+        # original media_id -> [submitted_at, source, format, kwargs, running duplicate media_id, duplicates submitted]
+        self._jobs = {}
+        # media_id of any copy -> original media_id
+        self._copies = {}
+        # (duration, observed) of the originals, observed False when cut short by a winning duplicate
+        self._durations = deque(maxlen=1000)
+
+        self.duplicates = 0
+        self.duplicate_wins = 0
+        self.cancelled = 0
+
+    def running_duplicates(self) -> int:
+        """
+        :return: number of duplicates currently running
+        :rtype: int
+        """
+        return sum(1 for job in self._jobs.values() if job[4])
+
+    def threshold(self) -> float:
+        """
+        :return: seconds past which a job is duplicated, None if not known yet
+        :rtype: float
+        """
+        if len(self._durations) >= self.min_samples:
+            return censored_percentile(list(self._durations), self.percentile)
+        return self.expected
+
+    def add(self, source, format, **kwargs) -> str:
+        """
+        Submit a job through add_media and follow it
+
+        :param source:
+            Source as given to add_media
+        :param format:
+            Format as given to add_media
+        :param kwargs:
+            Other arguments given to add_media
+        :return: media_id of the job
+        :rtype: str
+        """
+        status, result = self.service.add_media(source=source, format=format, **kwargs)
+        media_id = get_media_id(result)
+        self.track(media_id, source, format, **kwargs)
+        return media_id
+
+    def track(self, media_id: str, source, format, submitted_at: float=None, **kwargs):
+        """
+        Follow a job already submitted
+
+        :param media_id: str
+        :param source:
+            Source the job was submitted with
+        :param format:
+            Format the job was submitted with
+        :param submitted_at: float
+            Submission time (epoch seconds), defaults to current time
+        :param kwargs:
+            Other arguments the job was submitted with
+        :return: None
+        """
+        self._jobs[media_id] = [time() if submitted_at is None else submitted_at, source, format, kwargs, None, 0]
+        self._copies[media_id] = media_id
+
+    def pending(self) -> int:
+        """
+        :return: number of jobs not over yet
+        :rtype: int
+        """
+        return len(self._jobs)
+
+    def step(self, now: float=None):
+        """
+        Poll all the copies, settle the finished jobs and duplicate the stragglers within the budget
+
+        :param now: float
+            Current time (epoch seconds), defaults to current time
+        :return: None
+        """
+        if now is None:
+            now = time()
+        if not self._copies:
+            return
+
+        result = self.batcher.dispatch('get_status', list(self._copies))
+        for media_id, job in result.responses.items():
+            status = job.get('status')
+            original = self._copies.get(media_id)
+            if original is None or original not in self._jobs:
+                continue
+            if status == 'Finished':
+                self._settle(original, media_id, status, now)
+            elif status in Encoding.EXIT_STATUSES:
+                self._failed(original, media_id, status, now)
+
+        threshold = self.threshold()
+        if threshold is None:
+            return
+
+        budget = self.max_duplicates - self.running_duplicates()
+        stragglers = sorted((job[0], media_id) for media_id, job in self._jobs.items()
+                            if not job[5] and now - job[0] > threshold)
+        for submitted_at, media_id in stragglers[:max(0, budget)]:
+            if not self._duplicate(media_id):
+                break
+
+    def run(self, interval: float=30):
+        """
+        Step until all the jobs are over
+
+        :param interval: float
+            Seconds between two steps
+        :return: None
+        """
+        while self._jobs:
+            self.step()
+            if self._jobs:
+                sleep(interval)
+
+    def _duplicate(self, media_id: str) -> bool:
+        """
+        :return: False when encoding.com could not be reached, the other stragglers wait for the next step
+        :rtype: bool
+        """
+        job = self._jobs[media_id]
+        try:
+            status, result = self.service.add_media(source=job[1], format=job[2], **job[3])
+            duplicate = get_media_id(result)
+        except EncodingErrors:
+            return True
+        except self.service.transport.errors:
+            return False
+        except OutcomeUnknown:
+            # never a third copy, the one possibly created is followed if found
+            job[5] += 1
+            duplicate = self._lookup(media_id)
+            if duplicate is None:
+                return True
+        else:
+            job[5] += 1
+
+        job[4] = duplicate
+        self._copies[duplicate] = media_id
+        self.duplicates += 1
+        return True
+
+    def _lookup(self, media_id: str) -> str:
+        """
+        :param media_id: str
+            Original job
+        :return: media_id of the only job of the queue with the same source not followed yet, None if there are
+            none or several
+        :rtype: str
+        """
+        source = self._jobs[media_id][1]
+        try:
+            candidates = [media['mediaid'] for media in iter_medias(self.service)
+                          if media.get('mediafile') == source and media['mediaid'] not in self._copies]
+        except (EncodingErrors,) + self.service.transport.errors:
+            return None
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _settle(self, original: str, winner: str, status: str, now: float):
+        job = self._jobs.pop(original)
+        duration = now - job[0]
+        # the original cancelled when its duplicate wins would have taken longer
+        self._durations.append((duration, winner == original))
+
+        for copy in (original, job[4]):
+            if copy is None:
+                continue
+            self._copies.pop(copy, None)
+            if copy != winner:
+                try:
+                    self.service.cancel_media(mediaid=copy)
+                    self.cancelled += 1
+                except EncodingErrors:
+                    pass
+
+        if winner != original:
+            self.duplicate_wins += 1
+        if self.on_finished:
+            self.on_finished(media_id=original, winner=winner, status=status, duration=duration)
+
+    def _failed(self, original: str, media_id: str, status: str, now: float):
+        job = self._jobs[original]
+        self._copies.pop(media_id, None)
+        other = job[4] if media_id == original else original
+        if other and other in self._copies:
+            # the other copy may still finish, a failed duplicate is not submitted again (job[5])
+            if media_id == job[4]:
+                job[4] = None
+            return
+
+        del self._jobs[original]
+        if self.on_finished:
+            self.on_finished(media_id=original, winner=media_id, status=status, duration=now - job[0])
+
+
+def simulate(jobs: int=10000, arrival_rate: float=1.0, median: float=300, sigma: float=0.3,
+             slow_probability: float=0.03, slow_factor: float=5.0, percentile_threshold: float=0.9,
+             max_duplicates: int=20, expected: float=None, min_samples: int=20, seed: int=1) -> dict:
+    """
+    Simulate job completion times with and without speculative duplicates.
+
+    Durations are log-normal around median, a slow_probability share of the copies land on a slow node
+    and take slow_factor times longer.  As SpeculativeRunner does, the threshold is learned from the jobs
+    completed so far (censored_percentile of the originals, cut short when their duplicate won): a job still
+    running at the threshold known when it was submitted gets a duplicate (independent duration) if fewer
+    than max_duplicates duplicates are running.
+
+    :param jobs: int
+        Number of jobs
+    :param arrival_rate: float
+        Jobs submitted per second
+    :param median: float
+        Median duration of a copy on a normal node, in seconds
+    :param sigma: float
+        Log-normal shape of the durations
+    :param slow_probability: float
+        Probability of a copy landing on a slow node
+    :param slow_factor: float
+        Slowdown of a copy landing on a slow node
+    :param percentile_threshold: float
+        Percentile of the durations past which a job is duplicated
+    :param max_duplicates: int
+        Maximum number of duplicates running at once
+    :param expected: float
+        Seconds past which a job is duplicated until min_samples jobs completed, none duplicated before if None
+    :param min_samples: int
+        Jobs completed before the learned threshold is used
+    :param seed: int
+        Random seed, for repeatable results
+    :return: dict with the baseline and speculative p50/p99/p999 completion times, duplicates submitted
+        and the last threshold
+    :rtype: dict
+    """
+    rng = Random(seed)
+
+    def duration():
+        value = rng.lognormvariate(0, sigma) * median
+        return value * slow_factor if rng.random() < slow_probability else value
+
+    primaries = [duration() for _ in range(jobs)]
+
+    # (completion time, duration, observed) of the jobs not completed yet, then samples of the completed ones
+    completions = []
+    samples = deque(maxlen=1000)
+    threshold = expected
+
+    speculative = []
+    running = []
+    duplicates = 0
+    for index, primary in enumerate(primaries):
+        arrival = index / arrival_rate
+        learned = False
+        while completions and completions[0][0] <= arrival:
+            samples.append(heappop(completions)[1:])
+            learned = True
+        if learned and len(samples) >= min_samples:
+            threshold = censored_percentile(list(samples), percentile_threshold)
+
+        completion, observed = primary, True
+        if threshold is not None and primary > threshold:
+            launch = arrival + threshold
+            while running and running[0] <= launch:
+                heappop(running)
+            if len(running) < max_duplicates:
+                # the duplicate runs until either copy finishes
+                copy = threshold + duration()
+                completion, observed = min(primary, copy), primary <= copy
+                heappush(running, arrival + completion)
+                duplicates += 1
+
+        speculative.append(completion)
+        heappush(completions, (arrival + completion, completion, observed))
+
+    result = {'duplicates': duplicates, 'threshold': threshold}
+    for name, durations in (('baseline', primaries), ('speculative', speculative)):
+        result[name] = {'p50': percentile(durations, 0.5), 'p99': percentile(durations, 0.99),
+                        'p999': percentile(durations, 0.999)}
+    return result
@@ -0,0 +1,126 @@
+"""
+Track the state of mediaids across successive GetStatus calls.
+
+Encoding.com only reports the current state of a job.
+StateTracker timestamps each state change observed so clients can tell how long a job has been in a state.
+
+"""
+
+from time import time
+
+
+class StateTracker(object):
+    """
+    Keeps the current state of each mediaid along with the time it entered that state.
+
+    Times are the time the change was observed by the client (epoch seconds),
+    so the precision depends on the polling interval.
+    """
+
+    def __init__(self):
+        # media_id -> [status, entered_at, first_seen]
+        self._states = {}
+
+    def __contains__(self, media_id: str) -> bool:
+        return media_id in self._states
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def media_ids(self) -> [str]:
+        """
+        :return: list of the mediaids tracked
+        :rtype: list
+        """
+        return list(self._states)
+
+    def update(self, media_id: str, status: str, now: float=None) -> str:
+        """
+        Record the status observed for the given media_id
+
+        :param media_id: str
+            MediaID associated with the job
+        :param status: str
+            State reported by encoding.com (see Encoding.STATES)
+        :param now: float
+            Time of the observation (epoch seconds), defaults to current time
+        :return: prior status if the state changed ('' for a new media_id), None if unchanged
+        :rtype: str
+        """
+        if now is None:
+            now = time()
+
+        entry = self._states.get(media_id)
+        if entry is None:
+            self._states[media_id] = [status, now, now]
+            return ''
+        if entry[0] == status:
+            return None
+
+        previous = entry[0]
+        entry[0] = status
+        entry[1] = now
+        return previous
+
+    def status(self, media_id: str) -> str:
+        """
+        :param media_id: str
+        :return: last known state of the media_id, '' if not tracked
+        :rtype: str
+        """
+        entry = self._states.get(media_id)
+        return entry[0] if entry else ''
+
+    def entered(self, media_id: str) -> float:
+        """
+        :param media_id: str
+        :return: time (epoch seconds) the media_id was first observed in its current state, None if not tracked
+        :rtype: float
+        """
+        entry = self._states.get(media_id)
+        return entry[1] if entry else None
+
+    def time_in_state(self, media_id: str, now: float=None) -> float:
+        """
+        :param media_id: str
+        :param now: float
+            Reference time (epoch seconds), defaults to current time
+        :return: seconds the media_id has been in its current state, None if not tracked
+        :rtype: float
+        """
+        entry = self._states.get(media_id)
+        if entry is None:
+            return None
+        return (time() if now is None else now) - entry[1]
+
+    def age(self, media_id: str, now: float=None) -> float:
+        """
+        :param media_id: str
+        :param now: float
+            Reference time (epoch seconds), defaults to current time
+        :return: seconds since the media_id was first tracked, None if not tracked
+        :rtype: float
+        """
+        entry = self._states.get(media_id)
+        if entry is None:
+            return None
+        return (time() if now is None else now) - entry[2]
+
+    def remove(self, media_id: str):
+        """
+        Stop tracking the given media_id
+
+        :param media_id: str
+        :return: None
+        """
+        self._states.pop(media_id, None)
+
+    def counts(self) -> dict:
+        """
+        :return: number of tracked mediaids per state
+        :rtype: dict
+        """
+        result = {}
+        for status, _, _ in self._states.values():
+            result[status] = result.get(status, 0) + 1
+        return result
@@ -0,0 +1,145 @@
+"""
+In memory stand in for encoding.com used by the unit tests that do not need live access
+
+"""
+
+from itertools import count
+from json import loads
+from threading import Lock
+
+from encodingcom.encoding import Encoding
+
+
+class FakeEncoding(Encoding):
+    """
+    Encoding service answering the actions from an in memory queue of medias.
+
+    Each media can be given a script of statuses, every GetStatus call on the media moves it to the next one.
+    All the queries received are kept in calls for assertions.
+    """
+
+    def __init__(self, user_id: str='user', user_key: str='key', **kwargs):
+        super().__init__(user_id, user_key, **kwargs)
+        self.medias = {}
+        self.scripts = {}
+        self.calls = []
+        self.info = {}
+        self._ids = count(1000)
+        self._lock = Lock()
+
+    def add(self, media_id: str='', status: str='New', source: str='http://host/source.mov',
+            createdate: str='2016-01-01 00:00:00', statuses: [str]=None) -> str:
+        """
+        Add a media in the fake queue
+
+        :param media_id: str
+            MediaID, generated if not specified
+        :param status: str
+            Initial state of the media
+        :param source: str
+            Source file url
+        :param createdate: str
+            Creation date in encoding.com format
+        :param statuses: [str]
+            States the media goes through on successive GetStatus calls
+        :return: media_id
+        :rtype: str
+        """
+        media_id = media_id or str(next(self._ids))
+        self.medias[media_id] = {'mediaid': media_id, 'mediafile': source,
+                                 'mediastatus': status, 'createdate': createdate}
+        if statuses:
+            self.scripts[media_id] = list(statuses)
+        return media_id
+
+    def actions(self, action: str) -> [dict]:
+        """
+        :param action: str
+        :return: queries received for the given action
+        :rtype: list
+        """
+        return [query for query in self.calls if query['action'] == action]
+
+    def _post_request(self, json_data, header='') -> (int, dict):
+        query = loads(json_data)['query']
+        with self._lock:
+            self.calls.append(query)
+            handler = getattr(self, '_' + query['action'])
+            return 200, {'response': handler(query)}
+
+    def _ids_of(self, query: dict) -> [str]:
+        return [media_id for media_id in str(query.get('mediaid', '')).split(',') if media_id]
+
+    def _missing(self, media_ids: [str]) -> dict:
+        return {'errors': {'error': 'Media ID %s not found' % ','.join(media_ids)}}
+
+    def _AddMedia(self, query: dict) -> dict:
+        media_id = self.add(source=str(query['source']))
+        return {'message': 'Added', 'MediaID': media_id}
+
+    def _AddMediaBenchmark(self, query: dict) -> dict:
+        return self._AddMedia(query)
+
+    def _GetMediaList(self, query: dict) -> dict:
+        return {'media': [dict(media) for media in self.medias.values()]}
+
+    def _GetStatus(self, query: dict) -> dict:
+        media_ids = self._ids_of(query)
+        missing = [media_id for media_id in media_ids if media_id not in self.medias]
+        if missing or not media_ids:
+            return self._missing(missing)
+
+        jobs = []
+        for media_id in media_ids:
+            media = self.medias[media_id]
+            script = self.scripts.get(media_id)
+            if script:
+                media['mediastatus'] = script.pop(0)
+            jobs.append({'id': media_id, 'status': media['mediastatus'],
+                         'sourcefile': media['mediafile'], 'progress': '0'})
+
+        if len(media_ids) == 1 and query.get('extended') != 'yes':
+            return jobs[0]
+        return {'job': jobs}
+
+    def _GetMediaInfo(self, query: dict) -> dict:
+        media_ids = self._ids_of(query)
+        if len(media_ids) != 1 or media_ids[0] not in self.medias:
+            return self._missing(media_ids)
+        return dict(self.info.get(media_ids[0], {'duration': '60', 'size': '1920x1080', 'bitrate': '5000k'}))
+
+    def _GetMediaInfoEx(self, query: dict) -> dict:
+        return self._GetMediaInfo(query)
+
+    def _set_status(self, query: dict, status: str, message: str) -> dict:
+        media_ids = self._ids_of(query)
+        missing = [media_id for media_id in media_ids if media_id not in self.medias]
+        if missing or not media_ids:
+            return self._missing(missing)
+        for media_id in media_ids:
+            self.medias[media_id]['mediastatus'] = status
+            self.scripts.pop(media_id, None)
+        return {'message': message}
+
+    def _CancelMedia(self, query: dict) -> dict:
+        media_ids = self._ids_of(query)
+        result = self._set_status(query, 'Stopped', 'Deleted')
+        if 'errors' not in result:
+            for media_id in media_ids:
+                del self.medias[media_id]
+        return result
+
+    def _StopMedia(self, query: dict) -> dict:
+        return self._set_status(query, 'Stopped', 'Stopped')
+
+    def _RestartMedia(self, query: dict) -> dict:
+        return self._set_status(query, 'New', 'Restarted')
+
+    def _RestartMediaErrors(self, query: dict) -> dict:
+        return self._set_status(query, 'New', 'Restarted')
+
+    def _ProcessMedia(self, query: dict) -> dict:
+        return self._set_status(query, 'Processing', 'Started')
+
+    def _UpdateMedia(self, query: dict) -> dict:
+        return self._set_status(query, 'New', 'Updated')
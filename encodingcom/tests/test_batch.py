@@ -0,0 +1,116 @@
+"""
+Provide set of unit tests for the chunked fan out of mediaid list actions
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.batch import Batcher
+from encodingcom.exception import TransportError
+from encodingcom.string_utils import list_to_str
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class BatchTests(TestCase):
+    """
+    Coverage for Batcher against an in memory encoding.com
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.media_ids = [self.encoding.add(status='Processing') for _ in range(250)]
+
+    def test_list_to_str(self):
+        """
+        Any iterable of ids is converted, strings are returned as is
+
+        :return:
+        """
+        self.assertEqual('1,2,3', list_to_str(['1', '2', '3']))
+        self.assertEqual('1,2', list_to_str(('1', '2')))
+        self.assertEqual('1,2', list_to_str(str(i) for i in (1, 2)))
+        self.assertEqual('1,2', list_to_str('1,2'))
+
+    def test_get_status_fixed_chunks(self):
+        """
+        Statuses merged per mediaid from a generator of mediaids
+
+        :return:
+        """
+        batcher = Batcher(self.encoding, chunk_size=100, workers=3)
+        result = batcher.dispatch('get_status', (media_id for media_id in self.media_ids))
+
+        self.assertEqual(set(self.media_ids), set(result.responses))
+        self.assertEqual({}, result.errors)
+        self.assertEqual(3, result.calls)
+        self.assertEqual('Processing', result.responses[self.media_ids[0]]['status'])
+
+    def test_auto_tuned_chunks(self):
+        """
+        Fast chunks grow the chunk size up to its upper bound
+
+        :return:
+        """
+        batcher = Batcher(self.encoding, workers=1, min_chunk_size=10, max_chunk_size=80)
+        result = batcher.dispatch('get_status', self.media_ids)
+
+        self.assertEqual(250, len(result.responses))
+        self.assertEqual(80, batcher.chunk_size)
+        self.assertLess(result.calls, 10)
+
+    def test_errors_isolated(self):
+        """
+        A failing chunk is split until the unknown mediaids are isolated
+
+        :return:
+        """
+        batcher = Batcher(self.encoding, chunk_size=50, workers=2)
+        seen = []
+        result = batcher.dispatch('stop_media', self.media_ids[:99] + ['unknown'], split=True,
+                                  on_chunk=lambda chunk, response, errors: seen.extend(chunk))
+
+        self.assertEqual(['unknown'], list(result.errors))
+        self.assertEqual(99, len(result.responses))
+        self.assertEqual(100, len(seen))
+        self.assertEqual('Stopped', self.encoding.medias[self.media_ids[0]]['mediastatus'])
+
+        with self.assertRaises(ValueError):
+            batcher.dispatch('add_media', self.media_ids)
+
+    def test_split_limits(self):
+        """
+        Actions not safe to repeat, transport errors and the retry budget stop the split
+
+        :return:
+        """
+        batcher = Batcher(self.encoding, chunk_size=50, workers=2)
+        result = batcher.dispatch('cancel_media', self.media_ids[:49] + ['unknown'])
+        self.assertEqual(1, result.calls)
+        self.assertEqual(50, len(result.errors))
+
+        batcher = Batcher(self.encoding, chunk_size=50, workers=1, max_retries=2)
+        result = batcher.dispatch('get_status', self.media_ids[50:149] + ['unknown'])
+        # 2 chunks, the failing one split twice: 50 -> 25 -> 13 mediaids reported in error
+        self.assertEqual(6, result.calls)
+        self.assertEqual(13, len(result.errors))
+        self.assertIn('unknown', result.errors)
+
+        class Outage(FakeEncoding):
+            def _post_request(self, json_data, header='') -> (int, dict):
+                raise TransportError('Connection refused')
+
+        batcher = Batcher(Outage(), chunk_size=50, workers=2)
+        result = batcher.dispatch('get_status', self.media_ids)
+        self.assertEqual(5, result.calls)
+        self.assertEqual(250, len(result.errors))
+        self.assertIn('Connection refused', result.errors[self.media_ids[0]][0])
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
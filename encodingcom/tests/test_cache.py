@@ -0,0 +1,127 @@
+"""
+Provide set of unit tests for the transcode result cache
+
+"""
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from encodingcom.cache import ResultCache, JsonFileResultStore, format_hash
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class CacheTests(TestCase):
+    """
+    Coverage for canonical format hashing and cached add_media
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.format = {'output': 'mp4', 'video_codec': 'libx264', 'bitrate': '3000k',
+                       'destination': 'http://host/first.mp4'}
+        self.directory = TemporaryDirectory()
+        self.path = join(self.directory.name, 'results.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_format_hash(self):
+        """
+        Key order, value types, defaults and destinations do not change the hash
+
+        :return:
+        """
+        same = {'bitrate': '3000k', 'video_codec': 'libx264', 'output': 'mp4', 'keep_aspect_ratio': 'yes',
+                'turbo': False, 'destination': 'http://host/other.mp4'}
+        self.assertEqual(format_hash(self.format), format_hash(same))
+        self.assertEqual(format_hash([self.format, {'output': 'thumbnail'}]),
+                         format_hash([{'output': 'thumbnail'}, same]))
+        self.assertNotEqual(format_hash(self.format), format_hash(dict(self.format, bitrate='2000k')))
+
+    def test_cached_add_media(self):
+        """
+        Only finished jobs are served, to requests expecting the same destinations, until they expire
+
+        :return:
+        """
+        cache = ResultCache(JsonFileResultStore(self.path))
+
+        status, result = self.encoding.add_media(cache=cache, source='http://host/src.mov', format=self.format)
+        media_id = result['response']['MediaID']
+
+        # not finished yet, submitted again
+        self.encoding.add_media(cache=cache, source='http://host/src.mov', format=self.format)
+        self.assertEqual(2, len(self.encoding.actions('AddMedia')))
+
+        cache.poller_callback(media_id=media_id, status='Finished', response={})
+        status, result = self.encoding.add_media(cache=cache, source='http://host/src.mov',
+                                                 format=dict(self.format, turbo=False))
+        self.assertEqual(2, len(self.encoding.actions('AddMedia')))
+        self.assertEqual(media_id, result['response']['MediaID'])
+        self.assertEqual(['http://host/first.mp4'], result['response']['destination'])
+
+        # the outputs of the cached job are not where this request expects them
+        status, result = self.encoding.add_media(cache=cache, source='http://host/src.mov',
+                                                 format=dict(self.format, destination='http://host/again.mp4'))
+        self.assertEqual(3, len(self.encoding.actions('AddMedia')))
+        self.assertNotEqual(media_id, result['response']['MediaID'])
+
+        # persisted store, other source is a miss
+        cache = ResultCache(JsonFileResultStore(self.path))
+        self.assertIsNotNone(cache.lookup(self.encoding, 'http://host/src.mov', self.format))
+        self.assertIsNone(cache.lookup(self.encoding, 'http://host/other.mov', self.format))
+
+        expired = ResultCache(JsonFileResultStore(self.path), ttl=-1)
+        self.assertIsNone(expired.lookup(self.encoding, 'http://host/src.mov', self.format))
+
+    def test_destinations_per_format(self):
+        """
+        Destinations swapped between the formats of a ladder are another request
+
+        :return:
+        """
+        cache = ResultCache()
+        high = {'output': 'mp4', 'size': '1920x1080', 'destination': 'http://host/1080.mp4'}
+        low = {'output': 'mp4', 'size': '640x360', 'destination': 'http://host/360.mp4'}
+        status, result = self.encoding.add_media(cache=cache, source='http://host/src.mov', format=[high, low])
+        cache.finished(result['response']['MediaID'])
+
+        self.assertIsNotNone(cache.lookup(self.encoding, 'http://host/src.mov', [low, high]))
+        swapped = [dict(high, destination=low['destination']), dict(low, destination=high['destination'])]
+        self.assertIsNone(cache.lookup(self.encoding, 'http://host/src.mov', swapped))
+
+    def test_validated_lookup(self):
+        """
+        Entries of mediaids no longer known by encoding.com are dropped
+
+        :return:
+        """
+        cache = ResultCache(validate=True)
+        status, result = self.encoding.add_media(cache=cache, source='http://host/src.mov', format=self.format)
+        cache.finished(result['response']['MediaID'])
+
+        self.assertIsNotNone(cache.lookup(self.encoding, 'http://host/src.mov', self.format))
+        self.encoding.medias.clear()
+        self.assertIsNone(cache.lookup(self.encoding, 'http://host/src.mov', self.format))
+
+    def test_submitted_without_media_id(self):
+        """
+        A response without MediaID is not remembered as a pending job
+
+        :return:
+        """
+        cache = ResultCache()
+        cache.submitted(None, 'http://host/src.mov', self.format)
+        cache.submitted('', 'http://host/src.mov', self.format)
+        self.assertEqual({}, cache._pending)
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
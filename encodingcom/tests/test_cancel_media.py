@@ -0,0 +1,111 @@
+"""
+Provide set of unit tests for the bulk mode of the cancel_media tool
+
+"""
+
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from encodingcom.tests.fakes import FakeEncoding
+from encodingcom.cli import cancel_media
+
+
+class CancelMediaTests(TestCase):
+    """
+    Coverage for dry runs, checkpoint resumption and the per mediaid error report
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object with medias in error and a processing one
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.errored = [self.encoding.add(status='Error') for _ in range(6)]
+        self.processing = self.encoding.add(status='Processing')
+        self.directory = TemporaryDirectory()
+        self.checkpoint = join(self.directory.name, 'cancel.ckpt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_tool(self, *argv: str) -> (str, str):
+        """
+        Run the tool against the fake encoding.com
+
+        :return: stdout, stderr
+        :rtype: (str, str)
+        """
+        parser = ArgumentParser()
+        cancel_media.add_arguments(parser)
+        out, err = StringIO(), StringIO()
+        with redirect_stdout(out), patch.object(cancel_media, 'stderr', err):
+            cancel_media.main(parser.parse_args(['--user=user', '--key=key'] + list(argv)), encoding=self.encoding)
+        return out.getvalue(), err.getvalue()
+
+    def test_dry_run(self):
+        """
+        A dry run lists the selected medias without dispatching any action
+
+        :return:
+        """
+        out, err = self.run_tool('--state=Error', '--dry-run')
+
+        self.assertEqual(sorted('cancel %s' % media_id for media_id in self.errored), sorted(out.splitlines()))
+        self.assertIn('6 medias selected, 0 already in checkpoint', err)
+        self.assertEqual(['GetMediaList'], [query['action'] for query in self.encoding.calls])
+
+    def test_resume_from_checkpoint(self):
+        """
+        Medias recorded in the checkpoint are skipped, the ones handled are appended to it
+
+        :return:
+        """
+        with open(self.checkpoint, 'w') as checkpoint:
+            checkpoint.write('\n'.join(self.errored[:2]) + '\n')
+
+        self.run_tool('--state=Error', '--chunk-size=2', '--checkpoint=' + self.checkpoint)
+
+        cancelled = [media_id for query in self.encoding.actions('CancelMedia') for media_id in
+                     query['mediaid'].split(',')]
+        self.assertEqual(sorted(self.errored[2:]), sorted(cancelled))
+        self.assertEqual(set(self.errored), cancel_media.load_checkpoint(self.checkpoint))
+        self.assertIn(self.processing, self.encoding.medias)
+
+        # nothing left to do on the next run
+        self.run_tool('--state=Error', '--checkpoint=' + self.checkpoint)
+        self.assertEqual(2, len(self.encoding.actions('CancelMedia')))
+
+    def test_error_report(self):
+        """
+        Each mediaid of a failing chunk is reported with the errors of the chunk, the other chunks go through
+
+        :return:
+        """
+        errors = cancel_media.bulk_action(self.encoding, 'cancel', self.errored[:2] + ['unknown'], chunk_size=2)
+        self.assertEqual(['unknown'], list(errors))
+        self.assertNotIn(self.errored[0], self.encoding.medias)
+
+        original = self.encoding._CancelMedia
+
+        def rejected(query):
+            if self.errored[2] in query['mediaid'].split(','):
+                return {'errors': {'error': ['Media is locked', 'Retry later']}}
+            return original(query)
+
+        self.encoding._CancelMedia = rejected
+        out, err = self.run_tool('--state=Error', '--chunk-size=1')
+        # errors are not always strings, ie. a list of messages
+        self.assertIn("*** cancel failed for %s: ['Media is locked', 'Retry later']" % self.errored[2], err)
+        self.assertEqual(1, err.count('*** cancel failed'))
+        self.assertEqual([self.errored[2]], [media_id for media_id in self.errored if media_id in self.encoding.medias])
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
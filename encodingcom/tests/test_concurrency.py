@@ -0,0 +1,76 @@
+"""
+Provide set of unit tests for the adaptive concurrency controller
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.concurrency import AIMDController
+from encodingcom.scheduler import SubmissionScheduler
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class ConcurrencyTests(TestCase):
+    """
+    Coverage for AIMD adjustments from observed queue times
+    """
+
+    def test_additive_increase(self):
+        """
+        Jobs leaving the queue under the target raise the limit by one each
+
+        :return:
+        """
+        controller = AIMDController(target=60, initial=10)
+        for index in range(5):
+            media_id = str(index)
+            controller.observe(media_id, 'Waitingforencoder', now=100)
+            controller.observe(media_id, 'Processing', now=130)
+
+        self.assertEqual(15, controller.limit)
+        self.assertEqual(30, controller.metrics()['mean_queue_time'])
+        self.assertEqual(5, controller.metrics()['increases'])
+
+    def test_multiplicative_decrease(self):
+        """
+        Jobs waiting past the target halve the limit, once per cooldown
+
+        :return:
+        """
+        controller = AIMDController(target=60, initial=40, cooldown=100)
+        controller.observe('1', 'Ready to process', now=0)
+        controller.observe('2', 'Waitingforencoder', now=0)
+
+        # still waiting past the target
+        controller.observe('1', 'Waitingforencoder', now=70)
+        self.assertEqual(20, controller.limit)
+
+        # within cooldown, no further decrease
+        controller.observe('2', 'Processing', now=90)
+        self.assertEqual(20, controller.limit)
+
+        controller.observe('3', 'Waitingforencoder', now=200)
+        controller.observe('3', 'Processing', now=300)
+        self.assertEqual(10, controller.limit)
+        self.assertEqual(2, controller.metrics()['decreases'])
+
+    def test_scheduler_limit(self):
+        """
+        Scheduler follows the controller limit
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        controller = AIMDController(initial=2)
+        scheduler = SubmissionScheduler(encoding, controller=controller)
+        for index in range(5):
+            scheduler.submit('http://host/%d.mov' % index, {'output': 'mp4'})
+
+        scheduler.step()
+        self.assertEqual(2, scheduler.in_flight())
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
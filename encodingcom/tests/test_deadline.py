@@ -0,0 +1,141 @@
+"""
+Provide set of unit tests for call timeouts and end to end deadlines
+
+"""
+
+from time import sleep
+from unittest import TestCase
+
+from encodingcom.batch import Batcher
+from encodingcom.deadline import Deadline, current_deadline
+from encodingcom.encoding import Encoding
+from encodingcom.exception import DeadlineExceeded, OutcomeUnknown, TransportTimeout
+from encodingcom.poller import Poller
+from encodingcom.tests.fakes import FakeEncoding
+from encodingcom.transport import InProcessTransport
+
+
+class RecordingSession(object):
+    """
+    Session keeping the timeouts it is given, answering every post with an empty GetMediaList
+    """
+
+    class Response(object):
+        status_code = 200
+        content = b'{"response": {"media": []}}'
+
+    def __init__(self):
+        self.timeouts = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.timeouts.append(timeout)
+        return RecordingSession.Response()
+
+
+class DeadlineTests(TestCase):
+    """
+    Coverage for timeouts of each call, deadlines through calls, batches and polling
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object with a job that never finishes
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.media_id = self.encoding.add(status='Processing')
+
+    def test_call_timeouts(self):
+        """
+        Every call has connect and read timeouts, cut by the active deadline
+
+        :return:
+        """
+        encoding = Encoding('user', 'key', timeout=(2.0, 20.0))
+        session = encoding.transport._pool = RecordingSession()
+
+        encoding.get_media_list()
+        self.assertEqual((2.0, 20.0), session.timeouts[-1])
+
+        with Deadline(1.0):
+            encoding.get_media_list()
+        connect, read = session.timeouts[-1]
+        self.assertLessEqual(connect, 1.0)
+        self.assertLessEqual(read, 1.0)
+
+        self.assertEqual((5.0, 60.0), Encoding('user', 'key').timeout)
+
+    def test_expired_deadline_refuses_calls(self):
+        """
+        Nested deadlines, the earliest applies; no call once it ran out
+
+        :return:
+        """
+        with Deadline(60) as outer:
+            with Deadline(0) as inner:
+                self.assertIs(inner, current_deadline())
+                with self.assertRaises(DeadlineExceeded):
+                    self.encoding.get_status(mediaid=self.media_id)
+            self.assertIs(outer, current_deadline())
+        self.assertIsNone(current_deadline())
+        self.assertEqual([], self.encoding.actions('GetStatus'))
+
+    def test_poller_reports_last_state(self):
+        """
+        Polling stops at the deadline with the last known state
+
+        :return:
+        """
+        with self.assertRaises(DeadlineExceeded) as context:
+            Poller.poll_till_status(self.encoding, self.media_id, interval=0.01, deadline=0.1)
+        self.assertEqual(self.media_id, context.exception.media_id)
+        self.assertEqual('Processing', context.exception.last_state['status'])
+        self.assertIn('last known state: Processing', str(context.exception))
+
+        other = self.encoding.add(status='Saving')
+        with self.assertRaises(DeadlineExceeded) as context:
+            Poller.poll_statuses(self.encoding, [self.media_id, other], interval=0.01, deadline=Deadline(0.1))
+        self.assertEqual('Saving', context.exception.last_state[other]['status'])
+
+    def test_batcher_carries_deadline(self):
+        """
+        Worker threads of a batch run under the deadline of the dispatching thread
+
+        :return:
+        """
+        batcher = Batcher(self.encoding, chunk_size=1, workers=2)
+        with Deadline(0.05):
+            batcher.dispatch('get_status', [self.media_id])
+            sleep(0.1)
+            with self.assertRaises(DeadlineExceeded):
+                batcher.dispatch('get_status', [self.media_id] * 4)
+        self.assertEqual(1, len(self.encoding.actions('GetStatus')))
+
+    def test_submission_outcome_unknown(self):
+        """
+        A submission running out of time may have created the job, it raises OutcomeUnknown instead of the timeout
+
+        :return:
+        """
+        transport = InProcessTransport(lambda url, body, headers: (200, b'{"response": {"MediaID": "1"}}'),
+                                       latency=0.2)
+        encoding = Encoding('user', 'key', timeout=(1.0, 0.05), transport=transport)
+
+        with self.assertRaises(OutcomeUnknown) as context:
+            encoding.add_media(source='http://host/a.mov', format={'output': 'mp4'})
+        self.assertEqual('AddMedia', context.exception.action)
+        self.assertIsInstance(context.exception.error, TransportTimeout)
+        with self.assertRaises(TransportTimeout):
+            encoding.get_status(mediaid='1')
+
+        encoding.timeout = (1.0, 5.0)
+        with self.assertRaises(OutcomeUnknown) as context:
+            with Deadline(0.05):
+                encoding.add_media_benchmark(source='http://host/a.mov', format={'output': 'mp4'})
+        self.assertIsInstance(context.exception.error, DeadlineExceeded)
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,120 @@
+"""
+Provide set of unit tests for the job ETA model
+
+"""
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from encodingcom.eta import ETAModel, parse_media_info
+from encodingcom.poller import Poller
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class ETAModelTests(TestCase):
+    """
+    Coverage for per state samples, normalization by job attributes, bands and persistence
+    """
+
+    def train(self, model: ETAModel, jobs: int=10):
+        """
+        Feed jobs with 1 minute sources whose processing takes 100 to 100 * jobs seconds
+        """
+        for index in range(jobs):
+            media_id = 'job%d' % index
+            model.set_info(media_id, {'duration': '60', 'size': '1920x1080', 'bitrate': '8000k'})
+            model.observe(media_id, 'Waitingforencoder', 0)
+            model.observe(media_id, 'Processing', 30)
+            model.observe(media_id, 'Saving', 30 + 100 * (index + 1))
+            model.observe(media_id, 'Finished', 40 + 100 * (index + 1))
+
+    def test_parse_media_info(self):
+        """
+        Units of work from GetMediaInfo
+
+        :return:
+        """
+        units = parse_media_info({'duration': '120', 'size': '960x540', 'bitrate': '4000k'}, outputs=2)
+        self.assertEqual(60, units['Downloading'])
+        self.assertEqual(60, units['Processing'])
+        self.assertEqual(2, units['Saving'])
+
+    def test_eta(self):
+        """
+        Remaining time sums the states ahead, the current state accounts for the time spent in it
+
+        :return:
+        """
+        model = ETAModel()
+        self.train(model)
+
+        model.set_info('new', {'duration': '60', 'size': '1920x1080', 'bitrate': '8000k'})
+        model.observe('new', 'Waitingforencoder', 1000)
+        estimate = model.eta('new', now=1000)
+        self.assertEqual('Waitingforencoder', estimate['status'])
+        self.assertLess(estimate['low'], estimate['expected'])
+        self.assertLess(estimate['expected'], estimate['high'])
+        # 30s queue + 600s processing (median) + 10s saving
+        self.assertEqual(640, estimate['expected'])
+
+        # a source twice as long is expected to process twice as long
+        model.set_info('long', {'duration': '120', 'size': '1920x1080', 'bitrate': '8000k'})
+        model.observe('long', 'Processing', 1000)
+        self.assertEqual(1210, model.eta('long', now=1000)['expected'])
+
+        # remaining time among the jobs that processed longer than the 500s already spent
+        self.assertEqual(910, model.eta('long', now=1500)['expected'])
+        self.assertIsNone(model.eta('unknown'))
+
+    def test_persistence(self):
+        """
+        Samples survive a save and reload
+
+        :return:
+        """
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'eta.json')
+            model = ETAModel(path)
+            self.train(model)
+            model.save()
+
+            reloaded = ETAModel(path)
+            reloaded.observe('new', 'Saving', 0)
+            self.assertEqual(10, reloaded.eta('new', now=0)['expected'])
+
+    def test_poller_sleeps_until_eta(self):
+        """
+        poll_till_status feeds the model and sleeps on the low estimate
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        media_id = encoding.add(statuses=['Processing', 'Saving', 'Finished'])
+        model = ETAModel()
+
+        response = Poller.poll_till_status(encoding, media_id, interval=0, eta_model=model, max_interval=0)
+        self.assertEqual('Finished', response['status'])
+        self.assertEqual(1, len(model.durations('Saving')))
+        self.assertEqual(1, len(encoding.actions('GetMediaInfo')))
+
+    def test_poller_eta_only_for_finished(self):
+        """
+        Waiting for an earlier state than Finished polls every interval, the completion estimate is not used
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        media_id = encoding.add(statuses=['Processing', 'Saving', 'Finished'])
+        model = ETAModel()
+        self.train(model)
+
+        response = Poller.poll_till_status(encoding, media_id, status='Saving', interval=0, eta_model=model)
+        self.assertEqual('Saving', response['status'])
+        self.assertEqual(0, len(encoding.actions('GetMediaInfo')))
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -8,7 +8,7 @@ from logging import getLogger
 from unittest import TestCase
 
 from encodingcom.format import Format
-from encodingcom.exception import EncodingErrors
+from encodingcom.exception import EncodingErrors, InvalidParameterError
 
 
 class FormatTests(TestCase):
@@ -40,6 +40,56 @@ class FormatTests(TestCase):
             if item not in thumbnail:
                 self.fail('Expected key in the thumbnail not found: %s' % item)
 
+    def test_abr_ladder(self):
+        """
+        Ladder renditions share GOP alignment and carry their own size/bitrate/destination
+
+        :return:
+        """
+        ladder = Format.abr_ladder('s3://bucket/title/{name}.mp4', framerate=25, segment_duration=4)
+
+        self.assertEqual(len(Format.DEFAULT_LADDER), len(ladder))
+        self.assertEqual({'100'}, set(rendition['keyframe'] for rendition in ladder))
+        self.assertEqual({'cgop'}, set(rendition['gop'] for rendition in ladder))
+        self.assertEqual('s3://bucket/title/720p_3000k.mp4', ladder[1]['destination'])
+        self.assertEqual('1280x720', ladder[1]['size'])
+        self.assertEqual('3300k', ladder[1]['maxrate'])
+
+    def test_abr_ladder_validation(self):
+        """
+        Inconsistent ladders are rejected locally
+
+        :return:
+        """
+        invalid = [
+            {'renditions': []},
+            {'renditions': [(1280, 720, 3000), (1920, 1080, 2000)]},
+            {'renditions': [(1280, 720, 3000), (640, 360, 3000)]},
+            {'renditions': [(1281, 720, 3000)]},
+            {'renditions': [(1280, 720, 3000)], 'profile': 'extended'},
+            {'renditions': [(1280, 720, 3000)], 'framerate': 29.97},
+        ]
+        for kwargs in invalid:
+            with self.assertRaises(InvalidParameterError):
+                Format.abr_ladder('dest', **kwargs)
+
+    def test_thumbnails(self):
+        """
+        Many thumbnails in one format, with one templated destination per time
+
+        :return:
+        """
+        format, manifest = Format.thumbnails('http://website/thumb_{index:02d}_{label}.jpg', times=[5, '50%'])
+
+        self.assertEqual('thumbnail', format['output'])
+        self.assertEqual('5,50%', format['time'])
+        self.assertEqual(['http://website/thumb_00_5s.jpg', 'http://website/thumb_01_50pct.jpg'],
+                         format['destination'])
+        self.assertEqual([item['destination'] for item in manifest], format['destination'])
+
+        format, manifest = Format.thumbnails('http://website/{index}.jpg', count=4)
+        self.assertEqual(['12.5%', '37.5%', '62.5%', '87.5%'], [item['time'] for item in manifest])
+
 
 if __name__ == '__main__':
     from unittest import main
@@ -0,0 +1,150 @@
+"""
+Provide set of unit tests for hedged read requests
+
+"""
+
+from threading import current_thread
+from time import perf_counter, sleep
+from unittest import TestCase
+
+from encodingcom.exception import TransportError, TransportTimeout
+from encodingcom.hedging import HedgePolicy
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class SlowEncoding(FakeEncoding):
+    """
+    Fake encoding.com whose successive requests take the given latencies, a (latency, error) pair raises
+    the error once the latency elapsed
+    """
+
+    def __init__(self, latencies: list, **kwargs):
+        super().__init__(**kwargs)
+        self.latencies = list(latencies)
+        self.threads = []
+
+    def _post_request(self, json_data, header='') -> (int, dict):
+        with self._lock:
+            latency = self.latencies.pop(0) if self.latencies else 0
+            self.threads.append(current_thread())
+        error = None
+        if isinstance(latency, tuple):
+            latency, error = latency
+        sleep(latency)
+        if error is not None:
+            raise error
+        return super()._post_request(json_data, header)
+
+
+class HedgingTests(TestCase):
+    """
+    Coverage for hedge delay, first response wins, budget and read only actions
+    """
+
+    def test_hedge_wins(self):
+        """
+        A slow first request is hedged after the delay, the hedge answers when the first request fails
+
+        :return:
+        """
+        policy = HedgePolicy(initial_delay=0.05)
+        encoding = SlowEncoding([(0.3, TransportTimeout('Read timed out')), 0.0], hedge=policy)
+        media_id = encoding.add(status='Processing')
+
+        status, response = encoding.get_status(mediaid=media_id)
+        self.assertEqual('Processing', response['response']['status'])
+        stats = policy.stats()
+        self.assertEqual(1, stats['hedged'])
+        self.assertEqual(1, stats['hedge_wins'])
+        self.assertEqual(1.0, stats['win_rate'])
+
+        # both failing, the error of the first request is raised
+        encoding.latencies = [(0.3, TransportTimeout('Read timed out')), (0.0, TransportError('Refused'))]
+        with self.assertRaises(TransportTimeout):
+            encoding.get_status(mediaid=media_id)
+
+    def test_first_response_wins(self):
+        """
+        A slow request succeeding is not waited out once its hedge answered
+
+        :return:
+        """
+        policy = HedgePolicy(initial_delay=0.02)
+        encoding = SlowEncoding([0.5, 0.0], hedge=policy)
+        media_id = encoding.add(status='Processing')
+
+        started = perf_counter()
+        status, response = encoding.get_status(mediaid=media_id)
+        self.assertLess(perf_counter() - started, 0.3)
+        self.assertEqual('Processing', response['response']['status'])
+        self.assertEqual(1, policy.stats()['hedge_wins'])
+        self.assertEqual(0, policy.stats()['primary_wins'])
+
+    def test_request_wins(self):
+        """
+        The request answering before its hedge is returned without waiting for the hedge,
+        only the latencies of the requests set the delay
+
+        :return:
+        """
+        policy = HedgePolicy(initial_delay=0.02, min_samples=1)
+        encoding = SlowEncoding([0.1, 0.5], hedge=policy)
+        media_id = encoding.add(status='Processing')
+
+        started = perf_counter()
+        encoding.get_status(mediaid=media_id)
+        self.assertLess(perf_counter() - started, 0.4)
+        self.assertNotIn(current_thread(), encoding.threads)
+        self.assertEqual(1, policy.stats()['primary_wins'])
+        self.assertEqual(1, len(policy._latencies['GetStatus']))
+        self.assertLess(policy.delay('GetStatus'), 0.5)
+
+    def test_fast_requests_not_hedged(self):
+        """
+        No hedge for answers under the delay, nor for actions with side effects
+
+        :return:
+        """
+        policy = HedgePolicy(initial_delay=0.05)
+        encoding = SlowEncoding([0.0, 0.2, 0.0], hedge=policy)
+        media_id = encoding.add(status='Processing')
+
+        encoding.get_status(mediaid=media_id)
+        encoding.stop_media(mediaid=media_id)
+        self.assertEqual(0, policy.stats()['hedged'])
+        self.assertEqual(1, policy.stats()['requests'])
+        self.assertEqual(2, len(encoding.calls))
+
+    def test_budget(self):
+        """
+        Hedges stop once the credits are spent, and come back with the traffic
+
+        :return:
+        """
+        policy = HedgePolicy(initial_delay=0.01, budget=0.5, max_credits=1)
+        encoding = SlowEncoding([0.1, 0.0] + [0.05] * 10, hedge=policy)
+        media_id = encoding.add(status='Processing')
+
+        for _ in range(3):
+            encoding.get_status(mediaid=media_id)
+        # 1 credit to start with, 0.5 earned per request
+        self.assertEqual(2, policy.stats()['hedged'])
+        self.assertEqual(3, policy.stats()['requests'])
+
+    def test_percentile_delay(self):
+        """
+        The delay follows the observed latencies once enough samples
+
+        :return:
+        """
+        policy = HedgePolicy(percentile=0.9, initial_delay=1.0, min_samples=10)
+        self.assertEqual(1.0, policy.delay('GetStatus'))
+        for index in range(10):
+            policy.call('GetStatus', lambda: sleep(0.001 * index))
+        self.assertLess(policy.delay('GetStatus'), 0.1)
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
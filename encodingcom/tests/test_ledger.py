@@ -0,0 +1,192 @@
+"""
+Provide set of unit tests for the SQLite job ledger
+
+"""
+
+import sqlite3
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import sleep
+from unittest import TestCase
+
+from encodingcom.cache import ResultCache
+from encodingcom.ledger import JobLedger
+from encodingcom.poller import Poller
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class LedgerTests(TestCase):
+    """
+    Coverage for write through, transitions, batched commits and rehydration
+    """
+
+    def setUp(self):
+        """
+        Setup a ledger file in a temporary directory
+        :return:
+        """
+        self.directory = TemporaryDirectory()
+        self.path = join(self.directory.name, 'jobs.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_through(self):
+        """
+        Submissions, statuses and responses of the Encoding actions land in the ledger
+
+        :return:
+        """
+        ledger = JobLedger(self.path, batch_size=1000, flush_interval=60)
+        encoding = FakeEncoding(ledger=ledger)
+
+        status, result = encoding.add_media(source='http://host/a.mov', format={'output': 'mp4'})
+        media_id = result['response']['MediaID']
+        encoding.scripts[media_id] = ['Downloading', 'Downloading', 'Processing', 'Finished']
+        Poller.poll_till_status(encoding, media_id, interval=0)
+
+        job = ledger.job(media_id)
+        self.assertEqual('Finished', job['status'])
+        self.assertTrue(job['final'])
+        self.assertEqual({'output': 'mp4'}, job['format'])
+        self.assertEqual(['New', 'Downloading', 'Processing', 'Finished'],
+                         [status for status, at in ledger.transitions(media_id)])
+        self.assertEqual('Finished', ledger.last_response(media_id, 'GetStatus')['status'])
+
+        encoding.stop_media(mediaid=media_id)
+        self.assertEqual('Stopped', ledger.last_response(media_id, 'StopMedia')['message'])
+        ledger.close()
+
+    def test_rehydrate(self):
+        """
+        A new process only gets the jobs not final yet, with their state and entered time
+
+        :return:
+        """
+        ledger = JobLedger(self.path, batch_size=1000, flush_interval=60)
+        ledger.record_submission('1', 'AddMedia', 'http://host/a.mov', {'output': 'mp4'}, now=10)
+        ledger.record_submission('2', 'AddMedia', 'http://host/b.mov', {'output': 'webm'}, now=10)
+        ledger.record_status('1', 'Processing', now=20)
+        ledger.record_status('2', 'Finished', now=30)
+
+        # writes are batched, nothing is committed yet
+        reader = sqlite3.connect(self.path)
+        self.assertEqual(0, reader.execute('SELECT COUNT(*) FROM jobs').fetchone()[0])
+        ledger.close()
+        self.assertEqual(2, reader.execute('SELECT COUNT(*) FROM jobs').fetchone()[0])
+        reader.close()
+
+        restarted = JobLedger(self.path)
+        tracker = restarted.rehydrate()
+        self.assertEqual(['1'], tracker.media_ids())
+        self.assertEqual('Processing', tracker.status('1'))
+        self.assertEqual(20, tracker.entered('1'))
+        self.assertEqual(['1'], restarted.pending_media_ids())
+
+        cache = ResultCache()
+        self.assertEqual(1, restarted.rehydrate_cache(cache))
+        self.assertIn('1', cache._pending)
+
+        # an already known status is not a new transition
+        restarted.record_status('1', 'Processing', now=40)
+        self.assertEqual(2, len(restarted.transitions('1')))
+        restarted.close()
+
+    def test_batched_statuses(self):
+        """
+        Statuses of jobs first seen, or final, are looked up without committing the queued writes,
+        a status seen again adds no transition
+
+        :return:
+        """
+        ledger = JobLedger(self.path, batch_size=100, flush_interval=60)
+        commits = []
+        flush = ledger.flush
+
+        def counted_flush():
+            if ledger._pending:
+                commits.append(len(ledger._pending))
+            flush()
+
+        ledger.flush = counted_flush
+        for index in range(50):
+            ledger.record_status(str(index), 'Processing', now=10)
+        # 3 writes per new job: the batch of 100 is committed once
+        self.assertEqual(1, len(commits))
+
+        ledger.record_status('1', 'Processing', now=20)
+        ledger.record_status('2', 'Finished', now=20)
+        ledger.record_status('2', 'Finished', now=30)
+        self.assertEqual(1, len(commits))
+        self.assertEqual([('Processing', 10), ('Finished', 20)], ledger.transitions('2'))
+        self.assertEqual([('Processing', 10)], ledger.transitions('1'))
+
+        # committed final job seen again
+        ledger.record_status('2', 'Finished', now=40)
+        self.assertEqual([('Processing', 10), ('Finished', 20)], ledger.transitions('2'))
+        self.assertNotIn('2', ledger._status)
+        ledger.close()
+
+    def test_best_effort(self):
+        """
+        A locked database does not fail the action, the writes are committed once it is released
+
+        :return:
+        """
+        ledger = JobLedger(self.path, batch_size=1, flush_interval=60)
+        ledger._connection.execute('PRAGMA busy_timeout=0')
+        encoding = FakeEncoding(ledger=ledger)
+
+        locker = sqlite3.connect(self.path)
+        locker.execute('BEGIN EXCLUSIVE')
+        with self.assertLogs('encodingcom.encoding', 'ERROR'):
+            status, result = encoding.add_media(source='http://host/a.mov', format={'output': 'mp4'})
+        media_id = result['response']['MediaID']
+        self.assertEqual(1, len(encoding.actions('AddMedia')))
+        locker.rollback()
+        locker.close()
+
+        self.assertEqual('New', ledger.job(media_id)['status'])
+        ledger.close()
+
+    def test_flush_on_timer(self):
+        """
+        Queued writes are committed flush_interval seconds later, without any further write
+
+        :return:
+        """
+        ledger = JobLedger(self.path, batch_size=1000, flush_interval=0.05)
+        ledger.record_submission('1', 'AddMedia', 'http://host/a.mov', {'output': 'mp4'})
+
+        reader = sqlite3.connect(self.path)
+        for attempt in range(100):
+            if reader.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]:
+                break
+            sleep(0.01)
+        self.assertEqual(1, reader.execute('SELECT COUNT(*) FROM jobs').fetchone()[0])
+        reader.close()
+        ledger.close()
+
+    def test_forked(self):
+        """
+        A forked child opens its own connection, the writes queued by the parent are left to it
+
+        :return:
+        """
+        ledger = JobLedger(self.path, batch_size=1000, flush_interval=60)
+        ledger.record_submission('1', 'AddMedia', 'http://host/a.mov', {'output': 'mp4'})
+        parent = ledger._connection
+
+        # as seen by the child
+        ledger._pid = -1
+        ledger.record_submission('2', 'AddMedia', 'http://host/b.mov', {'output': 'mp4'})
+        self.assertIsNot(parent, ledger._connection)
+        self.assertEqual(['2'], ledger.pending_media_ids())
+        ledger.close()
+        parent.close()
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,108 @@
+"""
+Provide set of unit tests for the verbose report of the ls_queue tool
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from json import loads
+from threading import Lock
+from time import sleep
+from unittest import TestCase
+from unittest.mock import patch
+
+from encodingcom.cli import ls_queue
+from encodingcom.exception import TransportError
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class LsQueueTests(TestCase):
+    """
+    Coverage for the bounded number of calls in flight and the per media error report
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object with a queue of medias, GetMediaInfoEx raising TransportError
+        for the mediaids in failing
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.media_ids = [self.encoding.add(status='Processing') for _ in range(20)]
+        self.failing = set()
+
+        get_media_info = self.encoding.get_media_info
+
+        def failing_get_media_info(**kwargs):
+            sleep(0.002)
+            if kwargs['mediaid'] in self.failing:
+                raise TransportError('Connection reset by peer')
+            return get_media_info(**kwargs)
+
+        self.encoding.get_media_info = failing_get_media_info
+
+    def report(self, **kwargs) -> dict:
+        """
+        Run the verbose report, the most calls submitted and not done yet are kept in most_in_flight
+
+        :return: mediaid -> JSON line written by the verbose report
+        :rtype: dict
+        """
+        test = self
+        self.in_flight = 0
+        self.most_in_flight = 0
+        lock = Lock()
+
+        def done(future):
+            with lock:
+                test.in_flight -= 1
+
+        class CountingExecutor(ThreadPoolExecutor):
+            def submit(self, *args, **kwargs):
+                with lock:
+                    test.in_flight += 1
+                    test.most_in_flight = max(test.most_in_flight, test.in_flight)
+                future = super().submit(*args, **kwargs)
+                future.add_done_callback(done)
+                return future
+
+        out = StringIO()
+        with patch.object(ls_queue, 'ThreadPoolExecutor', CountingExecutor):
+            self.stats = ls_queue.verbose_report(self.encoding, out=out, **kwargs)
+        records = [loads(line) for line in out.getvalue().splitlines()]
+        return {record['mediaid']: record for record in records}
+
+    def test_calls_in_flight(self):
+        """
+        At most workers calls are in flight, GetMediaInfoEx calls of a chunk included
+
+        :return:
+        """
+        records = self.report(chunk_size=10, workers=3)
+
+        self.assertEqual(sorted(self.media_ids), sorted(records))
+        self.assertLessEqual(self.most_in_flight, 3)
+        self.assertEqual(2, self.stats.status_calls)
+        self.assertEqual(20, self.stats.info_calls)
+        self.assertTrue(all('media_info' in record for record in records.values()))
+
+    def test_transport_errors(self):
+        """
+        A transport error is reported in the line of the media, the other medias are still reported
+
+        :return:
+        """
+        self.failing.add(self.media_ids[0])
+
+        records = self.report(chunk_size=5, workers=4)
+
+        self.assertEqual(sorted(self.media_ids), sorted(records))
+        self.assertTrue(records[self.media_ids[0]]['error'].startswith('Connection reset by peer'))
+        self.assertEqual(1, self.stats.errors)
+        self.assertEqual(19, sum('media_info' in record for record in records.values()))
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
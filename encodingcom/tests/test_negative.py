@@ -5,7 +5,7 @@ Negative Unit test for Actions via Encoding class
 from os import getenv
 from unittest import TestCase
 
-from encodingcom.encoding import Encoding
+from encodingcom.cassette import from_environment
 from encodingcom.exception import EncodingErrors
 
 
@@ -21,7 +21,7 @@ class EncodingNegative(TestCase):
         """
         user_id = getenv('ENCODING_USER_ID')
         user_key = getenv('ENCODING_USER_KEY')
-        self.encoding = Encoding(user_id, user_key)
+        self.encoding = from_environment(user_id, user_key)
 
     def tearDown(self):
         pass
@@ -0,0 +1,96 @@
+"""
+Provide set of unit tests for the AddMediaBenchmark -> ProcessMedia pipeline
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from json import loads
+from unittest import TestCase
+
+from encodingcom.exception import TransportError
+from encodingcom.pipeline import BenchmarkPipeline
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class PipelineTests(TestCase):
+    """
+    Coverage for bulk benchmark submission and format decision once downloaded
+    """
+
+    def test_pipeline(self):
+        """
+        Jobs are processed with their own formats once downloaded, jobs failing to download are reported
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        decided = {}
+
+        def decide(source, media_id, media_info):
+            decided[media_id] = media_info
+            return {'output': 'mp4', 'size': media_info['size'], 'destination': source + '.mp4'}
+
+        pipeline = BenchmarkPipeline(encoding, decide, interval=0)
+        added = pipeline.add_all(['http://host/%d.mov' % index for index in range(6)])
+        self.assertEqual(6, len(encoding.actions('AddMediaBenchmark')))
+
+        media_ids = list(added.values())
+        for media_id in media_ids[:5]:
+            encoding.scripts[media_id] = ['Downloading', 'Downloading', 'Ready to process']
+        encoding.scripts[media_ids[5]] = ['Downloading', 'Error']
+
+        results = pipeline.run()
+
+        self.assertEqual(['Started'] * 5, [results[media_id] for media_id in media_ids[:5]])
+        self.assertIsInstance(results[media_ids[5]], list)
+        self.assertEqual(set(media_ids[:5]), set(decided))
+        self.assertEqual('1920x1080', decided[media_ids[0]]['size'])
+
+        processed = encoding.actions('ProcessMedia')
+        self.assertEqual(5, len(processed))
+        self.assertTrue(all(query['format']['destination'].endswith('.mov.mp4') for query in processed))
+        # status polled in batches, not per job
+        self.assertEqual(3, len(encoding.actions('GetStatus')))
+
+
+    def test_transport_errors(self):
+        """
+        A source failing in the transport is reported without aborting the bulk submission,
+        jobs the transport failed to poll are polled again
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        pipeline = BenchmarkPipeline(encoding, lambda source, media_id, media_info: {'output': 'mp4'},
+                                     media_info=False, interval=0)
+        answer = encoding._post_request
+        # queries failing in the transport
+        failing = [lambda query: query.get('source') == 'http://host/1.mov']
+
+        def post_request(json_data, header=''):
+            if failing[0](loads(json_data)['query']):
+                raise TransportError('Connection reset by peer')
+            return answer(json_data, header)
+
+        encoding._post_request = post_request
+        added = pipeline.add_all(['http://host/%d.mov' % index for index in range(3)])
+        self.assertIsInstance(added['http://host/1.mov'], list)
+        self.assertEqual(2, pipeline.pending())
+
+        for media_id in pipeline._downloading:
+            encoding.scripts[media_id] = ['Ready to process']
+        failing[0] = lambda query: query['action'] == 'GetStatus'
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual([], pipeline.step(executor))
+        self.assertEqual(2, pipeline.pending())
+        self.assertEqual({}, pipeline.results)
+
+        failing[0] = lambda query: False
+        results = pipeline.run()
+        self.assertEqual(['Started', 'Started'], list(results.values()))
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
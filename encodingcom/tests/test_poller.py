@@ -0,0 +1,97 @@
+"""
+Provide set of unit tests for the Poller and state tracking
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.poller import Poller
+from encodingcom.state_tracker import StateTracker
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class PollerTests(TestCase):
+    """
+    Coverage for polling against an in memory encoding.com
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object
+        :return:
+        """
+        self.encoding = FakeEncoding()
+
+    def test_state_tracker(self):
+        """
+        State changes and time in state
+
+        :return:
+        """
+        tracker = StateTracker()
+        self.assertEqual('', tracker.update('1', 'New', now=10))
+        self.assertIsNone(tracker.update('1', 'New', now=12))
+        self.assertEqual('New', tracker.update('1', 'Downloading', now=15))
+
+        self.assertEqual('Downloading', tracker.status('1'))
+        self.assertEqual(5, tracker.time_in_state('1', now=20))
+        self.assertEqual(10, tracker.age('1', now=20))
+        self.assertEqual({'Downloading': 1}, tracker.counts())
+
+    def test_poll_statuses(self):
+        """
+        One batched GetStatus per tick, finished jobs are no longer polled
+
+        :return:
+        """
+        fast = self.encoding.add(statuses=['Downloading', 'Finished'])
+        slow = self.encoding.add(statuses=['Downloading', 'Processing', 'Saving', 'Error'])
+
+        changes = []
+        ticks = []
+
+        def callback(media_id, status, response):
+            changes.append((media_id, status))
+
+        def tick(tracker, jobs):
+            ticks.append(len(jobs))
+
+        tracker = Poller.poll_statuses(self.encoding, [fast, slow], callback=callback, tick_callback=tick,
+                                       interval=0, chunk_size=10)
+
+        self.assertEqual('Finished', tracker.status(fast))
+        self.assertEqual('Error', tracker.status(slow))
+        self.assertEqual(4, len(ticks))
+        self.assertEqual(4, len(self.encoding.actions('GetStatus')))
+        self.assertIn((slow, 'Saving'), changes)
+
+        # first tick dispatches both mediaids in a single extended call
+        self.assertEqual('yes', self.encoding.actions('GetStatus')[0]['extended'])
+        self.assertEqual(slow, self.encoding.actions('GetStatus')[-1]['mediaid'])
+
+    def test_poll_statuses_errors(self):
+        """
+        Mediaids answered with an error are dropped, the others are still polled to their exit status
+
+        :return:
+        """
+        known = self.encoding.add(statuses=['Downloading', 'Processing', 'Finished'])
+        deleted = self.encoding.add(statuses=['Downloading', 'Processing', 'Finished'])
+        errors = {}
+
+        def tick(tracker, jobs):
+            self.encoding.medias.pop(deleted, None)
+
+        tracker = Poller.poll_statuses(self.encoding, [known, deleted, 'unknown'], tick_callback=tick, interval=0,
+                                       error_callback=lambda media_id, **kwargs: errors.update({media_id: kwargs}))
+
+        self.assertEqual('Finished', tracker.status(known))
+        self.assertEqual('Downloading', tracker.status(deleted))
+        self.assertEqual(sorted([deleted, 'unknown']), sorted(errors))
+        self.assertIn('unknown', errors['unknown']['errors'][0])
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -6,7 +6,7 @@ from logging import getLogger
 from os import getenv
 from unittest import TestCase
 
-from encodingcom.encoding import Encoding
+from encodingcom.cassette import from_environment
 from encodingcom.exception import EncodingErrors
 from encodingcom.response_helper import get_response
 
@@ -26,7 +26,7 @@ class EncodingPositive(TestCase):
 
         user_id = getenv('ENCODING_USER_ID')
         user_key = getenv('ENCODING_USER_KEY')
-        self.encoding = Encoding(user_id, user_key)
+        self.encoding = from_environment(user_id, user_key)
 
         self.source = getenv('ENCODING_TEST_SOURCE') # Does not accept local file paths - Use http(s)://<PATH TO FILE> or FTP url
 
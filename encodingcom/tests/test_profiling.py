@@ -0,0 +1,103 @@
+"""
+Provide set of unit tests for the profiling mode
+
+"""
+
+from io import StringIO
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import sleep
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from encodingcom import profiling
+from encodingcom.profiling import Profiler, SamplingProfiler
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class ProfilingTests(TestCase):
+    """
+    Coverage for per action/phase timing, report and sampled stacks
+    """
+
+    def test_phases(self):
+        """
+        Each action records its phases, nothing is recorded without a profiler
+
+        :return:
+        """
+        profiler = Profiler()
+        encoding = FakeEncoding(profiler=profiler)
+        media_id = encoding.add(status='Processing')
+        for _ in range(3):
+            encoding.get_status(mediaid=media_id)
+
+        stats = profiler.stats()
+        for phase in ('build', 'serialize', 'network', 'error_check'):
+            self.assertEqual(3, stats[('GetStatus', phase)]['calls'])
+        self.assertIsNone(profiler.current())
+
+        with profiler.measure('tool', 'output'):
+            sleep(0.01)
+        self.assertGreaterEqual(profiler.stats()[('tool', 'output')]['wall'], 0.01)
+
+        out = StringIO()
+        profiler.report(out)
+        self.assertIn('GetStatus', out.getvalue())
+        self.assertIn('total', out.getvalue())
+
+        self.assertIsNone(FakeEncoding().profiler)
+
+    def test_sampling_profiler(self):
+        """
+        Collapsed stacks of the busy threads
+
+        :return:
+        """
+        def busy():
+            end = 0
+            for index in range(2000000):
+                end += index
+            return end
+
+        sampler = SamplingProfiler(interval=0.001)
+        sampler.start()
+        busy()
+        sampler.stop()
+
+        self.assertTrue(any('busy' in stack for stack in sampler.stacks))
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'stacks.txt')
+            sampler.write(path)
+            with open(path) as stacks:
+                line = stacks.readline()
+        stack, count = line.rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn(';', stack)
+
+
+    def test_measure_disabled(self):
+        """
+        Disabled, measure() only reads the environment on the first call, enable() still applies afterwards
+
+        :return:
+        """
+        environ = MagicMock(wraps={})
+        with patch.object(profiling, 'environ', environ), patch.object(profiling, '_profiler', None), \
+                patch.object(profiling, '_environment_read', False), patch.object(profiling, 'register'):
+            for _ in range(100):
+                with profiling.measure('tool', 'output'):
+                    pass
+            self.assertEqual(2, environ.get.call_count)
+            self.assertIsNone(profiling.get_profiler())
+
+            profiler = profiling.enable()
+            with profiling.measure('tool', 'output'):
+                pass
+            self.assertEqual(1, profiler.stats()[('tool', 'output')]['calls'])
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
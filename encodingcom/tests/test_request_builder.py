@@ -0,0 +1,102 @@
+"""
+Provide set of unit tests for the precompiled request builder
+
+"""
+
+from json import dumps
+from unittest import TestCase
+from urllib.parse import urlencode
+
+from encodingcom.encoding import Encoding
+from encodingcom.request_builder import RequestBuilder
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class RequestBuilderTests(TestCase):
+    """
+    Compiled bodies are identical to the dict/json.dumps/urlencode path
+    """
+
+    def setUp(self):
+        """
+        Setup a client with credentials needing url encoding
+        :return:
+        """
+        self.encoding = Encoding('user id', 'key&=/+ü')
+
+    def expected(self, action: str, arguments: dict) -> (str, str):
+        query = dumps(self.encoding._setup_request(action, **arguments))
+        return query, urlencode({'json': query})
+
+    def test_identical_bodies(self):
+        """
+        JSON query and form body match the generic path for any argument types
+
+        :return:
+        """
+        builder = self.encoding._builder('AddMedia')
+        for arguments in ({},
+                          {'mediaid': '1,2,3'},
+                          {'source': ['http://host/a b.mov'], 'format': [{'output': 'mp4', 'bitrate': '1000k'}],
+                           'instant': 'no', 'count': 3, 'ratio': 1.5, 'empty': None, 'title': 'été'},
+                          {'userid': 'other', 'mediaid': '1'}):
+            self.assertEqual(self.expected('AddMedia', arguments), builder.build(arguments))
+
+    def test_builder_cache(self):
+        """
+        One builder per action, rebuilt when the credentials change
+
+        :return:
+        """
+        self.assertIs(self.encoding._builder('GetStatus'), self.encoding._builder('GetStatus'))
+        self.assertIsNot(self.encoding._builder('GetStatus'), self.encoding._builder('GetMediaInfo'))
+
+        builder = self.encoding._builder('GetStatus')
+        self.encoding.user_key = 'other'
+        self.assertIsNot(builder, self.encoding._builder('GetStatus'))
+        self.assertIn('other', self.encoding._builder('GetStatus').build({})[0])
+
+    def test_actions_use_builder(self):
+        """
+        Actions post the compiled query
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        media_id = encoding.add(status='Processing')
+        status, response = encoding.get_status(mediaid=media_id)
+        self.assertEqual('Processing', response['response']['status'])
+        self.assertEqual({'userid': 'user', 'userkey': 'key', 'notify_format': 'json', 'action': 'GetStatus',
+                          'mediaid': media_id}, encoding.calls[0])
+        self.assertIsInstance(RequestBuilder('u', 'k', 'json', 'GetStatus').build({})[1], str)
+
+    def test_post_request_override(self):
+        """
+        Subclasses overriding _post_request(json_data, header='') still get every request,
+        the others send the compiled body without encoding it again
+
+        :return:
+        """
+        sent = []
+
+        class Intercepting(Encoding):
+            def _post_request(self, json_data, header=''):
+                sent.append(json_data)
+                return 200, {'response': {'status': 'Processing'}}
+
+        class Sending(Encoding):
+            def _send(self, body, header=''):
+                sent.append(body)
+                return 200, {'response': {'status': 'Processing'}}
+
+        arguments = {'mediaid': '123'}
+        query, body = self.expected('GetStatus', arguments)
+        Intercepting('user id', 'key&=/+ü').get_status(**arguments)
+        Sending('user id', 'key&=/+ü').get_status(**arguments)
+        self.assertEqual([query, body], sent)
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,74 @@
+"""
+Provide set of unit tests for the account queue sampler
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.sampler import QueueSampler
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class QueueSamplerTests(TestCase):
+    """
+    Coverage for per state counts, rates and the bounded GetStatus cost
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object with a finished backlog and active jobs
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.finished = [self.encoding.add(status='Finished') for _ in range(20)]
+        self.active = [self.encoding.add(status='Processing', statuses=['Processing', 'Finished'])
+                       for _ in range(3)]
+
+    def polled(self) -> int:
+        return sum(len(query['mediaid'].split(',')) for query in self.encoding.actions('GetStatus'))
+
+    def test_samples(self):
+        """
+        Counts per state, arrivals and completions per minute, final jobs only polled on the first pass
+
+        :return:
+        """
+        sampler = QueueSampler(self.encoding, capacity=2, chunk_size=10)
+        first = sampler.sample(now=0)
+        self.assertEqual({'Finished': 20, 'Processing': 3}, first['counts'])
+        self.assertIsNone(first['completion_rate'])
+        self.assertEqual(23, self.polled())
+
+        self.encoding.add(status='New')
+        second = sampler.sample(now=60)
+        self.assertEqual({'Finished': 23, 'New': 1}, second['counts'])
+        self.assertEqual(1, second['arrivals'])
+        self.assertEqual(3, second['completions'])
+        self.assertEqual(3.0, second['completion_rate'])
+        # 3 active jobs and the new one
+        self.assertEqual(23 + 4, self.polled())
+
+        # purged jobs leave the counts, the ring buffer keeps the last samples
+        del self.encoding.medias[self.finished[0]]
+        sampler.sample(now=120)
+        self.assertEqual(22, sampler.latest()['counts']['Finished'])
+        self.assertEqual([(60, 23), (120, 22)], sampler.series('Finished'))
+        self.assertEqual([(60, 3.0), (120, 0.0)], sampler.series('completion_rate'))
+
+    def test_thread(self):
+        """
+        The background thread samples until stopped
+
+        :return:
+        """
+        sampler = QueueSampler(self.encoding, interval=0.01)
+        sampler.start()
+        sampler.stop(timeout=5)
+        self.assertIsNone(sampler.last_error)
+        self.assertGreater(len(sampler.samples), 0)
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
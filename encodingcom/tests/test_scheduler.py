@@ -0,0 +1,167 @@
+"""
+Provide set of unit tests for the submission scheduler
+
+"""
+
+from json import loads
+from unittest import TestCase
+
+from encodingcom.exception import TransportError, TransportTimeout
+from encodingcom.scheduler import SubmissionScheduler
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class SchedulerTests(TestCase):
+    """
+    Coverage for in flight cap, priorities and tenant fairness
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object, submitted jobs finish after two status polls
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.order = []
+
+        def submitted(token, media_id):
+            self.order.append(token)
+            self.encoding.scripts[media_id] = ['Processing', 'Finished']
+
+        self.submitted = submitted
+
+    def test_in_flight_cap(self):
+        """
+        Never more than max_in_flight jobs in non final states
+
+        :return:
+        """
+        finished = []
+        scheduler = SubmissionScheduler(self.encoding, max_in_flight=3, interval=0, on_submitted=self.submitted,
+                                        on_finished=lambda token, media_id, status: finished.append(status))
+        format = {'output': 'mp4'}
+        for index in range(10):
+            scheduler.submit('http://host/%d.mov' % index, dict(format))
+
+        while len(scheduler) or scheduler.in_flight():
+            scheduler.step()
+            self.assertLessEqual(scheduler.in_flight(), 3)
+
+        self.assertEqual(10, len(self.encoding.actions('AddMedia')))
+        self.assertEqual(['Finished'] * 10, finished)
+        # identical formats are kept once
+        self.assertEqual(1, len(scheduler._formats))
+
+    def test_priorities_and_weights(self):
+        """
+        Urgent jobs first, then tenants served in proportion to their weight
+
+        :return:
+        """
+        scheduler = SubmissionScheduler(self.encoding, max_in_flight=100, weights={'partner': 3},
+                                        on_submitted=self.submitted)
+        bulk = [scheduler.submit('http://host/bulk.mov', {'output': 'mp4'}, tenant='backfill') for _ in range(8)]
+        partner = [scheduler.submit('http://host/p.mov', {'output': 'mp4'}, tenant='partner') for _ in range(8)]
+        urgent = scheduler.submit('http://host/urgent.mov', {'output': 'mp4'}, tenant='backfill', priority=0)
+
+        scheduler.step()
+
+        self.assertEqual(urgent, self.order[0])
+        first_eight = self.order[1:9]
+        self.assertEqual(6, len([token for token in first_eight if token in partner]))
+        self.assertEqual(2, len([token for token in first_eight if token in bulk]))
+
+    def test_errored_jobs(self):
+        """
+        Jobs encoding.com no longer knows leave the jobs in flight through on_error,
+        jobs the transport failed to reach stay in flight
+
+        :return:
+        """
+        dropped = []
+        scheduler = SubmissionScheduler(self.encoding, max_in_flight=2, chunk_size=1,
+                                        on_error=lambda token, errors: dropped.append(token))
+        first = scheduler.submit('http://host/a.mov', {'output': 'mp4'})
+        scheduler.submit('http://host/b.mov', {'output': 'mp4'})
+        scheduler.step()
+        self.assertEqual(2, scheduler.in_flight())
+
+        deleted, unreachable = sorted(scheduler._in_flight, key=scheduler._in_flight.get)
+        del self.encoding.medias[deleted]
+        answer = self.encoding._post_request
+
+        def flaky(json_data, header=''):
+            if loads(json_data)['query'].get('mediaid') == unreachable:
+                raise TransportError('Connection reset')
+            return answer(json_data, header)
+
+        self.encoding._post_request = flaky
+        scheduler.refresh()
+        self.assertEqual([first], dropped)
+        self.assertEqual([unreachable], list(scheduler._in_flight))
+
+    def test_submission_transport_error(self):
+        """
+        A submission failing in the transport is requeued, not lost, and ends the step
+
+        :return:
+        """
+        scheduler = SubmissionScheduler(self.encoding, max_in_flight=10)
+        tokens = [scheduler.submit('http://host/%d.mov' % index, {'output': 'mp4'}) for index in range(3)]
+        accepted = self.encoding._post_request
+
+        def unreachable(json_data, header=''):
+            raise TransportError('Connection refused')
+
+        self.encoding._post_request = unreachable
+        self.assertEqual([], scheduler.step())
+        self.assertEqual(3, len(scheduler))
+
+        self.encoding._post_request = accepted
+        self.assertEqual(tokens, scheduler.step())
+        self.assertEqual(0, len(scheduler))
+
+    def test_submission_outcome_unknown(self):
+        """
+        A submission timing out may have created the job, it is reported and not submitted again
+
+        :return:
+        """
+        rejected = []
+        scheduler = SubmissionScheduler(self.encoding, max_in_flight=10,
+                                        on_error=lambda token, errors: rejected.append(token))
+        token = scheduler.submit('http://host/a.mov', {'output': 'mp4'})
+
+        def timeout(json_data, header=''):
+            raise TransportTimeout('Read timed out')
+
+        self.encoding._post_request = timeout
+        self.assertEqual([], scheduler.step())
+        self.assertEqual([token], rejected)
+        self.assertEqual(0, len(scheduler))
+
+
+    def test_submission_local_error(self):
+        """
+        A job failing before any request (ie. strict validation) is reported and dropped,
+        the jobs queued behind it are still submitted
+
+        :return:
+        """
+        rejected = []
+        scheduler = SubmissionScheduler(self.encoding, max_in_flight=10,
+                                        on_error=lambda token, errors: rejected.append(token))
+        invalid = scheduler.submit('http://host/a.mov', {'output': 'mp4', 'gop': 'zzz'}, strict=True)
+        valid = scheduler.submit('http://host/b.mov', {'output': 'mp4'}, strict=True)
+
+        self.assertEqual([valid], scheduler.step())
+        self.assertEqual([invalid], rejected)
+        self.assertEqual(0, len(scheduler))
+        self.assertEqual(1, scheduler.in_flight())
+        self.assertEqual(1, len(self.encoding.actions('AddMedia')))
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,165 @@
+"""
+Provide set of unit tests for the speculative duplicate submission of stragglers
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.exception import TransportError, TransportTimeout
+from encodingcom.speculative import SpeculativeRunner, censored_percentile, percentile, simulate
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class SpeculativeTests(TestCase):
+    """
+    Coverage for straggler duplication, first finished wins and the duplicate budget
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object and a runner duplicating jobs past 100 seconds
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.finished = []
+        self.runner = SpeculativeRunner(self.encoding, expected=100, max_duplicates=1,
+                                        on_finished=self.on_finished)
+
+    def on_finished(self, media_id, winner, status, duration):
+        self.finished.append((media_id, winner, status, duration))
+
+    def test_duplicate_wins(self):
+        """
+        A straggler is duplicated within the budget, the duplicate finishing first wins and the original is cancelled
+
+        :return:
+        """
+        slow = self.runner.add('http://host/slow.mov', {'output': 'mp4'})
+        other = self.runner.add('http://host/other.mov', {'output': 'mp4'})
+        self.runner._jobs[slow][0] = 0
+        self.runner._jobs[other][0] = 10
+
+        self.runner.step(now=50)
+        self.assertEqual(0, self.runner.duplicates)
+
+        self.runner.step(now=150)
+        self.assertEqual(1, self.runner.duplicates)
+        duplicate = self.runner._jobs[slow][4]
+        self.assertEqual('http://host/slow.mov', self.encoding.medias[duplicate]['mediafile'])
+        self.assertIsNone(self.runner._jobs[other][4])
+
+        self.encoding.medias[duplicate]['mediastatus'] = 'Finished'
+        self.runner.step(now=200)
+
+        self.assertEqual([(slow, duplicate, 'Finished', 200)], self.finished)
+        self.assertEqual(1, self.runner.duplicate_wins)
+        self.assertEqual([slow], [query['mediaid'] for query in self.encoding.actions('CancelMedia')])
+        # the cancelled original would have taken longer than 200 seconds
+        self.assertEqual([(200, False)], list(self.runner._durations))
+
+        # the budget is free again for the remaining straggler
+        self.assertIsNotNone(self.runner._jobs[other][4])
+
+    def test_original_wins_and_error(self):
+        """
+        The original finishing first cancels the duplicate, a failed duplicate leaves the original running
+        and is not submitted again
+
+        :return:
+        """
+        media_id = self.runner.add('http://host/a.mov', {'output': 'mp4'})
+        self.runner._jobs[media_id][0] = 0
+        self.runner.step(now=150)
+        duplicate = self.runner._jobs[media_id][4]
+
+        self.encoding.medias[duplicate]['mediastatus'] = 'Error'
+        self.runner.step(now=160)
+        self.assertEqual([], self.finished)
+        self.assertEqual(1, self.runner.pending())
+
+        # a failed duplicate is not submitted again
+        self.runner.step(now=165)
+        self.assertEqual(1, self.runner.duplicates)
+        self.assertEqual(0, self.runner.running_duplicates())
+
+        self.encoding.medias[media_id]['mediastatus'] = 'Finished'
+        self.runner.step(now=170)
+        self.assertEqual([(media_id, media_id, 'Finished', 170)], self.finished)
+        self.assertEqual(0, self.runner.duplicate_wins)
+        # the original finishing first gives its full duration
+        self.assertEqual([(170, True)], list(self.runner._durations))
+
+    def test_censored_percentile(self):
+        """
+        Durations cut short do not lower the percentile, without them it is the nearest rank percentile
+
+        :return:
+        """
+        complete = [10 * index for index in range(1, 11)]
+        self.assertEqual(percentile(complete, 0.9), censored_percentile([(value, True) for value in complete], 0.9))
+        self.assertEqual(percentile(complete, 0.5), censored_percentile([(value, True) for value in complete], 0.5))
+
+        # the 2 slowest jobs cut short at 85: their real durations are past 85
+        samples = [(value, True) for value in complete[:8]] + [(85, False), (85, False)]
+        self.assertEqual(85, censored_percentile(samples, 0.9))
+        self.assertGreater(censored_percentile(samples, 0.9), percentile(complete[:8], 0.9))
+        self.assertIsNone(censored_percentile([], 0.9))
+
+    def test_duplicate_errors(self):
+        """
+        A duplicate not sent is tried again on the next step, one whose outcome is unknown is looked up
+        in the queue, followed and cancelled when the original wins
+
+        :return:
+        """
+        media_id = self.runner.add('http://host/a.mov', {'output': 'mp4'})
+        self.runner._jobs[media_id][0] = 0
+        answer = self.encoding._post_request
+        error = [TransportError('Connection refused')]
+
+        def post_request(json_data, header=''):
+            if '"AddMedia"' in json_data and error[0] is not None:
+                if isinstance(error[0], TransportTimeout):
+                    # created at encoding.com, the response is lost
+                    answer(json_data, header)
+                raise error[0]
+            return answer(json_data, header)
+
+        self.encoding._post_request = post_request
+        self.runner.step(now=150)
+        self.assertEqual(0, self.runner.duplicates)
+        self.assertEqual(0, self.runner._jobs[media_id][5])
+
+        error[0] = TransportTimeout('Read timed out')
+        self.runner.step(now=160)
+        duplicate = self.runner._jobs[media_id][4]
+        self.assertIsNotNone(duplicate)
+        self.assertEqual('http://host/a.mov', self.encoding.medias[duplicate]['mediafile'])
+        self.assertEqual(1, self.runner.duplicates)
+
+        # never a third copy
+        self.runner.step(now=170)
+        self.assertEqual(2, len(self.encoding.medias))
+
+        self.encoding.medias[media_id]['mediastatus'] = 'Finished'
+        self.runner.step(now=180)
+        self.assertEqual([duplicate], [query['mediaid'] for query in self.encoding.actions('CancelMedia')])
+
+    def test_simulate(self):
+        """
+        Duplicates cut the tail without moving the median
+
+        :return:
+        """
+        result = simulate(jobs=2000)
+        self.assertGreater(result['duplicates'], 0)
+        # the learned threshold does not drift down: about the 10% slowest jobs are duplicated
+        self.assertLess(result['duplicates'], 2000 * 0.2)
+        self.assertEqual(result['baseline']['p50'], result['speculative']['p50'])
+        self.assertLess(result['speculative']['p99'], result['baseline']['p99'])
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,104 @@
+"""
+Provide set of unit tests for sharing an Encoding instance across threads and forked processes
+
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, skipUnless
+
+from encodingcom.encoding import Encoding
+from encodingcom.tests.fakes import FakeEncoding
+
+
+class ThreadSafetyTests(TestCase):
+    """
+    Coverage for per instance config, untouched arguments and the fork safe session
+    """
+
+    def test_per_instance_config(self):
+        """
+        Class defaults are captured at construction, setters replace the config and the compiled requests
+
+        :return:
+        """
+        encoding = Encoding('user', 'key')
+        config = encoding.config
+        builder = encoding._builder('GetStatus')
+
+        saved = Encoding.default_instant
+        try:
+            Encoding.default_instant = 'yes'
+            self.assertEqual('no', encoding.instant)
+            self.assertEqual('yes', Encoding('user', 'key').instant)
+        finally:
+            Encoding.default_instant = saved
+
+        encoding.instant = 'yes'
+        self.assertEqual('no', config.instant)
+        self.assertEqual('yes', encoding.config.instant)
+
+        encoding.user_key = 'other'
+        self.assertIsNot(builder, encoding._builder('GetStatus'))
+        with self.assertRaises(AttributeError):
+            encoding.config.user_key = 'immutable'
+
+    def test_shared_across_threads(self):
+        """
+        Concurrent actions on one instance, the caller's arguments are left as given
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        media_ids = [encoding.add(status='Processing') for _ in range(50)]
+        arguments = {'mediaid': media_ids[:3]}
+        format = {'output': 'mp4'}
+
+        def call(index):
+            status, response = encoding.get_status(mediaid=[media_ids[index]])
+            encoding.add_media(source='http://host/%d.mov' % index, format=format)
+            encoding.get_status(**arguments)
+            return response['response']['id']
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(media_ids, list(executor.map(call, range(50))))
+
+        self.assertEqual({'mediaid': media_ids[:3]}, arguments)
+        self.assertEqual({'output': 'mp4'}, format)
+
+    def test_session_shared_by_threads(self):
+        """
+        One pooled session per process
+
+        :return:
+        """
+        encoding = Encoding('user', 'key', pool_size=4)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            sessions = set(id(session) for session in
+                           executor.map(lambda _: encoding.transport._get_pool(), range(32)))
+        self.assertEqual(1, len(sessions))
+        self.assertEqual(4, encoding.transport._get_pool().get_adapter('https://manage.encoding.com')._pool_maxsize)
+
+    @skipUnless(hasattr(os, 'fork'), 'fork() not available')
+    def test_session_rebuilt_after_fork(self):
+        """
+        A forked child gets its own session, the parent keeps its own
+
+        :return:
+        """
+        encoding = Encoding('user', 'key')
+        parent = encoding.transport._get_pool()
+
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if encoding.transport._get_pool() is not parent else 1)
+
+        pid, status = os.waitpid(pid, 0)
+        self.assertEqual(0, os.WEXITSTATUS(status))
+        self.assertIs(parent, encoding.transport._get_pool())
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
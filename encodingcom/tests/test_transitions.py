@@ -0,0 +1,82 @@
+"""
+Provide set of unit tests for the transition recorder and its histograms
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.poller import Poller
+from encodingcom.tests.fakes import FakeEncoding
+from encodingcom.transitions import Histogram, TransitionRecorder
+
+
+class TransitionTests(TestCase):
+    """
+    Coverage for histogram precision, stage accounting and labels
+    """
+
+    def test_histogram(self):
+        """
+        Percentiles within the relative error, merge and compact round trip
+
+        :return:
+        """
+        histogram = Histogram(sub_buckets=32)
+        for value in range(1, 1001):
+            histogram.record(float(value))
+
+        self.assertEqual(1000, histogram.count)
+        self.assertAlmostEqual(500.5, histogram.mean())
+        for fraction, expected in ((0.5, 500), (0.9, 900), (0.99, 990)):
+            self.assertLess(abs(histogram.percentile(fraction) - expected) / expected, 1.0 / 32)
+        self.assertEqual(1000, histogram.percentile(1.0))
+
+        copy = Histogram.from_dict(histogram.to_dict())
+        copy.merge(histogram)
+        self.assertEqual(2000, copy.count)
+        self.assertEqual(histogram.percentile(0.5), copy.percentile(0.5))
+        self.assertLess(len(histogram.counts), 250)
+
+    def test_stages(self):
+        """
+        Consecutive queue states are one stage, durations are recorded per output and host
+
+        :return:
+        """
+        recorder = TransitionRecorder()
+        recorder.start('1', source='http://origin.example.com/a.mov', format={'output': 'mp4'})
+        for now, status in ((0, 'New'), (5, 'Downloading'), (65, 'Downloaded'), (70, 'Waitingforencoder'),
+                            (100, 'Processing'), (400, 'Saving'), (420, 'Finished')):
+            recorder.observe('1', status, now=now)
+
+        summary = recorder.summary(by=('stage', 'host'))
+        self.assertEqual(60, summary[('download', 'origin.example.com')].max)
+        self.assertEqual(35, summary[('queue', 'origin.example.com')].max)
+        self.assertEqual(300, summary[('processing', 'origin.example.com')].max)
+        self.assertEqual(20, summary[('save', 'origin.example.com')].max)
+
+        exported = recorder.export()
+        self.assertEqual({'mp4'}, set(entry['output'] for entry in exported))
+        self.assertEqual(4, len(exported))
+
+    def test_poll_status(self):
+        """
+        poll_status feeds the recorder, labels come from the GetStatus response
+
+        :return:
+        """
+        encoding = FakeEncoding()
+        media_id = encoding.add(source='http://cdn.example.com/b.mov',
+                                statuses=['Downloading', 'Processing', 'Saving', 'Finished'])
+        recorder = TransitionRecorder()
+        Poller.poll_status(encoding, media_id, interval=0, recorder=recorder)
+
+        summary = recorder.summary(by=('stage', 'host'))
+        self.assertEqual({('download', 'cdn.example.com'), ('processing', 'cdn.example.com'),
+                          ('save', 'cdn.example.com')}, set(summary))
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
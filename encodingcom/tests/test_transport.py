@@ -0,0 +1,172 @@
+"""
+Provide set of unit tests for the HTTP transports
+
+"""
+
+from json import dumps, loads
+from unittest import TestCase
+
+from encodingcom.batch import Batcher
+from encodingcom.deadline import Deadline
+from encodingcom.encoding import Encoding
+from encodingcom.exception import DeadlineExceeded, EncodingErrors, TransportError, TransportTimeout
+from encodingcom.local_server import LocalServer
+from encodingcom.transport import InProcessTransport, PooledTransport, RequestsTransport, Transport, Urllib3Transport
+
+
+RESPONSE = b'{"response": {"id": "1", "status": "Processing", "progress": "50"}}'
+
+
+class TransportTests(TestCase):
+    """
+    Coverage for the transports, through a local server
+    """
+
+    def test_send_and_stream(self):
+        """
+        Each transport posts the body and returns the status and content, at once or streamed
+
+        :return:
+        """
+        with LocalServer(RESPONSE * 1000) as server:
+            for transport in (RequestsTransport(), Urllib3Transport()):
+                status, content = transport.send(server.url, 'json=%7B%7D', Encoding.API_HEADER, (1.0, 5.0))
+                self.assertEqual((200, RESPONSE * 1000), (status, content))
+
+                status, chunks = transport.stream(server.url, 'json=%7B%7D', Encoding.API_HEADER, (1.0, 5.0),
+                                                  chunk_size=1024)
+                chunks = list(chunks)
+                self.assertEqual(200, status)
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual(RESPONSE * 1000, b''.join(chunks))
+                transport.close()
+
+    def test_encoding(self):
+        """
+        Encoding sends the same body through any transport
+
+        :return:
+        """
+        with LocalServer(RESPONSE) as server:
+            for transport in (RequestsTransport(), Urllib3Transport()):
+                encoding = Encoding('user', 'key', transport=transport)
+                encoding.url = server.url
+                status, response = encoding.get_status(mediaid='1')
+                self.assertEqual('Processing', response['response']['status'])
+
+            self.assertEqual(server.bodies[0], server.bodies[1])
+            self.assertEqual('GetStatus', loads(server.bodies[0])['query']['action'])
+
+        bodies = []
+
+        def handler(url, body, headers):
+            bodies.append(body)
+            return 200, RESPONSE
+
+        encoding = Encoding('user', 'key', transport=InProcessTransport(handler))
+        self.assertEqual('Processing', encoding.get_status(mediaid='1')[1]['response']['status'])
+        self.assertEqual(1, len(bodies))
+
+    def test_errors(self):
+        """
+        Timeouts are reported by each transport, cut by deadlines, and batched calls report transport errors
+
+        :return:
+        """
+        with LocalServer(RESPONSE, delay=0.5) as server:
+            transport = Urllib3Transport()
+            with self.assertRaises(TransportTimeout):
+                transport.send(server.url, '', Encoding.API_HEADER, (1.0, 0.05))
+
+            for transport in (RequestsTransport(), Urllib3Transport(), InProcessTransport(None, latency=0.5)):
+                encoding = Encoding('user', 'key', transport=transport)
+                encoding.url = server.url
+                encoding.timeout = (1.0, 0.05)
+                with self.assertRaises(transport.timeouts):
+                    encoding.get_status(mediaid='1')
+
+                encoding.timeout = (1.0, 5.0)
+                with self.assertRaises(DeadlineExceeded):
+                    with Deadline(0.05):
+                        encoding.get_status(mediaid='1')
+
+        encoding = Encoding('user', 'key', transport=Urllib3Transport())
+        encoding.url = 'http://127.0.0.1:9/'
+        with self.assertRaises(TransportError):
+            encoding.get_status(mediaid='1')
+        result = Batcher(encoding, chunk_size=1).dispatch('get_status', ['1', '2'])
+        self.assertEqual(['1', '2'], sorted(result.errors))
+
+    def test_interface(self):
+        """
+        Transports missing stream, or _create_pool for the pooled ones, cannot be created,
+        and Encoding.pool_size reports the pool size of its transport
+
+        :return:
+        """
+        class Incomplete(Transport):
+            pass
+
+        class IncompletePool(PooledTransport):
+            def stream(self, url: str, body: str, headers: dict, timeout, chunk_size: int=65536) -> (int, iter):
+                return 200, iter([RESPONSE])
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+        with self.assertRaises(TypeError):
+            IncompletePool()
+
+        self.assertEqual(4, Encoding('user', 'key', pool_size=4).pool_size)
+        self.assertEqual(2, Encoding('user', 'key', transport=Urllib3Transport(2)).pool_size)
+        self.assertIsNone(Encoding('user', 'key', transport=InProcessTransport(None)).pool_size)
+
+    def test_media_list(self):
+        """
+        iter_media_list decodes each media as its chunks are streamed, a single media or errors as a whole
+
+        :return:
+        """
+        medias = [{'mediaid': str(index), 'mediastatus': 'Finished'} for index in range(50)]
+        responses = []
+
+        class Chunked(InProcessTransport):
+            def stream(self, url: str, body: str, headers: dict, timeout, chunk_size: int=65536) -> (int, iter):
+                status, chunks = super().stream(url, body, headers, timeout, chunk_size=7)
+                self.read = 0
+
+                def counted():
+                    for chunk in chunks:
+                        self.read += 1
+                        yield chunk
+
+                return status, counted()
+
+        transport = Chunked(lambda url, body, headers: (200, responses.pop(0)))
+        encoding = Encoding('user', 'key', transport=transport)
+
+        content = dumps({'response': {'media': medias}}).encode('utf-8')
+        responses.append(content)
+        listed = encoding.iter_media_list()
+        self.assertEqual(medias[0], next(listed))
+        # the rest of the response is still to be read
+        self.assertLess(transport.read, 20)
+        self.assertEqual(medias[1:], list(listed))
+        self.assertEqual(-(-len(content) // 7), transport.read)
+
+        responses.append(dumps({'response': {'media': medias[0]}}).encode('utf-8'))
+        self.assertEqual(medias[:1], list(encoding.iter_media_list()))
+        responses.append(b'{"response": {"media": []}}')
+        self.assertEqual([], list(encoding.iter_media_list()))
+
+        responses.append(b'{"response": {"errors": {"error": "Wrong user id or key!"}}}')
+        with self.assertRaises(EncodingErrors):
+            list(encoding.iter_media_list())
+        responses.append(content[:-40])
+        with self.assertRaises(ValueError):
+            list(encoding.iter_media_list())
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
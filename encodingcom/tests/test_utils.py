@@ -0,0 +1,100 @@
+"""
+Provide set of unit tests for the response helpers and encoding utils
+
+"""
+
+from datetime import datetime, timedelta, timezone
+from subprocess import check_output
+from sys import executable
+from unittest import TestCase
+
+from encodingcom.encoding_utils import iter_chunks, media_filter, MEDIA_DATE_FORMAT
+from encodingcom.response_helper import get_jobs, get_medias
+
+
+class UtilsTests(TestCase):
+    """
+    Coverage for helpers that do not need access to encoding.com
+    """
+
+    def test_iter_chunks(self):
+        """
+        Chunks are built lazily from any iterable, last chunk holds the remainder
+
+        :return:
+        """
+        chunks = list(iter_chunks((str(i) for i in range(7)), 3))
+        self.assertEqual([['0', '1', '2'], ['3', '4', '5'], ['6']], chunks)
+        self.assertEqual([], list(iter_chunks([], 3)))
+
+        with self.assertRaises(ValueError):
+            list(iter_chunks([1], 0))
+
+    def test_media_filter(self):
+        """
+        State, age and source pattern filters on GetMediaList entries
+
+        :return:
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        recent = (now - timedelta(hours=1)).strftime(MEDIA_DATE_FORMAT)
+        old = (now - timedelta(days=3)).strftime(MEDIA_DATE_FORMAT)
+
+        medias = [
+            {'mediaid': '1', 'mediastatus': 'Error', 'mediafile': 'http://host/a.mov', 'createdate': recent},
+            {'mediaid': '2', 'mediastatus': 'Finished', 'mediafile': 'http://host/b.mp4', 'createdate': old},
+            {'mediaid': '3', 'mediastatus': 'Error', 'mediafile': 'http://host/c.mp4', 'createdate': old},
+        ]
+
+        def selected(select):
+            return [media['mediaid'] for media in medias if select(media)]
+
+        self.assertEqual(['1', '2', '3'], selected(media_filter()))
+        self.assertEqual(['1', '3'], selected(media_filter(states=['Error'])))
+        self.assertEqual(['2', '3'], selected(media_filter(source_pattern='*.mp4')))
+        self.assertEqual(['1'], selected(media_filter(max_age=24 * 3600)))
+        self.assertEqual(['3'], selected(media_filter(states=['Error'], min_age=24 * 3600)))
+
+    def test_get_jobs(self):
+        """
+        GetStatus single and extended response variants
+
+        :return:
+        """
+        single = {'response': {'id': '1', 'status': 'New'}}
+        self.assertEqual([{'id': '1', 'status': 'New'}], get_jobs(single))
+
+        extended = {'response': {'job': [{'id': '1', 'status': 'New'}, {'id': '2', 'status': 'Error'}]}}
+        self.assertEqual(['1', '2'], [job['id'] for job in get_jobs(extended)])
+
+        collapsed = {'response': {'job': {'id': '1', 'status': 'New'}}}
+        self.assertEqual(['1'], [job['id'] for job in get_jobs(collapsed)])
+
+        self.assertEqual([], get_jobs({}))
+
+    def test_get_medias(self):
+        """
+        GetMediaList single and multiple media variants
+
+        :return:
+        """
+        self.assertEqual([{'mediaid': '1'}], get_medias({'response': {'media': {'mediaid': '1'}}}))
+        self.assertEqual(2, len(get_medias({'response': {'media': [{'mediaid': '1'}, {'mediaid': '2'}]}})))
+        self.assertEqual([], get_medias({'response': {}}))
+
+    def test_lazy_requests(self):
+        """
+        requests is not imported until a request is sent
+
+        :return:
+        """
+        loaded = check_output([executable, '-c', 'import sys\n'
+                                                 'from encodingcom.batch import Batcher\n'
+                                                 'print("requests" in sys.modules)'])
+        self.assertEqual(b'False', loaded.strip())
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,80 @@
+"""
+Provide set of unit tests for the offline request validation (strict mode)
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.exception import InvalidParameterError
+from encodingcom.format import Format
+from encodingcom.tests.fakes import FakeEncoding
+from encodingcom.validator import get_errors, validate
+
+
+class ValidatorTests(TestCase):
+    """
+    Coverage for requests validated against the compiled request template
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object
+        :return:
+        """
+        self.encoding = FakeEncoding()
+
+    def test_valid_formats(self):
+        """
+        Formats built by the package helpers are valid
+
+        :return:
+        """
+        self.assertTrue(validate({'source': 'http://host/source.mov', 'format': Format.abr_ladder('dest/{name}')}))
+        self.assertTrue(validate({'source': 'http://host/source.mov', 'format': Format.thumbnail('dest')}))
+        format, manifest = Format.thumbnails('dest/{index}.jpg', count=4, width=160)
+        self.assertTrue(validate({'source': 'http://host/source.mov', 'format': format}))
+
+    def test_invalid_formats(self):
+        """
+        Unknown keys, enums and ranges are reported with their path
+
+        :return:
+        """
+        errors = get_errors({'source': 'src', 'format': {
+            'gop': 'xgop',
+            'profile': 'extended',
+            'rotate': '45',
+            'turbo': 'maybe',
+            'audio_normalization': '150',
+            'bitrate': 'fast',
+            'colour': 'red',
+            'overlay': [{'overlay_source': 'http://host/logo.png', 'overlay_spin': '1'}],
+        }})
+
+        self.assertEqual(8, len(errors))
+        self.assertIn('format.colour: unknown key', errors)
+        self.assertIn('format.overlay.overlay_spin: unknown key', errors)
+        self.assertTrue(any(error.startswith('format.gop: xgop') for error in errors))
+
+    def test_strict_mode(self):
+        """
+        Strict mode rejects the request before any call, and is never sent to encoding.com
+
+        :return:
+        """
+        with self.assertRaises(InvalidParameterError):
+            self.encoding.add_media(strict=True, source='src', format={'output': 'mp4', 'gop': 'xgop'})
+        self.assertEqual([], self.encoding.calls)
+
+        self.encoding.add_media(strict=True, source='src', format={'output': 'mp4', 'gop': 'cgop'})
+        self.assertNotIn('strict', self.encoding.actions('AddMedia')[0])
+
+        # not strict, left to encoding.com to decide
+        self.encoding.add_media(source='src', format={'output': 'mp4', 'gop': 'xgop'})
+        self.assertEqual(2, len(self.encoding.actions('AddMedia')))
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,143 @@
+"""
+Provide set of unit tests for the stuck job watchdog
+
+"""
+
+from unittest import TestCase
+
+from encodingcom.exception import TransportError
+from encodingcom.tests.fakes import FakeEncoding
+from encodingcom.watchdog import Watchdog
+
+
+class WatchdogTests(TestCase):
+    """
+    Coverage for stuck job detection, policy and restart storm protection
+    """
+
+    def setUp(self):
+        """
+        Setup a fake encoding.com object with jobs stuck downloading
+        :return:
+        """
+        self.encoding = FakeEncoding()
+        self.media_ids = [self.encoding.add(status='Downloading') for _ in range(10)]
+        self.actions = []
+
+    def on_action(self, media_id, status, action, outcome):
+        self.actions.append((media_id, status, action, outcome))
+
+    def test_rate_limited_restarts(self):
+        """
+        Flagged jobs are restarted within the burst, then at the refill rate
+
+        :return:
+        """
+        watchdog = Watchdog(self.encoding, thresholds={'Downloading': 100}, rate=6, burst=3, stagger=0,
+                            on_action=self.on_action)
+        watchdog.watch(self.media_ids)
+
+        self.assertEqual([], watchdog.step(now=1000))
+        flagged = watchdog.step(now=1200)
+        self.assertEqual(10, len(flagged))
+        self.assertEqual(3, len(self.actions))
+        self.assertEqual(('restart_media', 'done'), self.actions[0][2:])
+        self.assertEqual(3, len(self.encoding.actions('RestartMedia')))
+
+        # 6 per minute, 10 seconds later a single token is back
+        watchdog.step(now=1210)
+        self.assertEqual(4, len(self.actions))
+
+    def test_max_attempts_and_dry_run(self):
+        """
+        Dry run only reports, jobs are acted upon at most max_attempts times
+
+        :return:
+        """
+        watchdog = Watchdog(self.encoding, thresholds={'Downloading': 100}, rate=600, burst=100, stagger=0,
+                            max_attempts=1, dry_run=True, on_action=self.on_action)
+        watchdog.watch(self.media_ids[:2])
+
+        watchdog.step(now=0)
+        watchdog.step(now=200)
+        watchdog.step(now=400)
+
+        self.assertEqual(2, len(self.actions))
+        self.assertEqual({'dry run'}, set(action[3] for action in self.actions))
+        self.assertEqual([], self.encoding.actions('RestartMedia'))
+
+    def test_learned_threshold(self):
+        """
+        Percentile of the observed durations replaces the fixed threshold once enough samples
+
+        :return:
+        """
+        watchdog = Watchdog(self.encoding, thresholds={'Downloading': 1000}, percentile=0.9, margin=2,
+                            min_samples=5)
+        self.assertEqual(1000, watchdog.threshold('Downloading'))
+
+        for index, media_id in enumerate(self.media_ids):
+            watchdog._observe(media_id, 'Downloading', 0)
+            watchdog._observe(media_id, 'Downloaded', 10 * (index + 1))
+
+        self.assertEqual(200, watchdog.threshold('Downloading'))
+
+    def test_errored_jobs(self):
+        """
+        Mediaids encoding.com no longer knows are reported and no longer watched, so run() ends
+
+        :return:
+        """
+        errors = {}
+        watchdog = Watchdog(self.encoding, thresholds={'Downloading': 10000}, stagger=0,
+                            on_error=lambda media_id, **kwargs: errors.update({media_id: kwargs['errors']}))
+        watchdog.watch(self.media_ids)
+        watchdog.step(now=1000)
+
+        for media_id in self.media_ids[:2]:
+            del self.encoding.medias[media_id]
+        watchdog.step(now=1200)
+        self.assertEqual(sorted(self.media_ids[:2]), sorted(errors))
+        self.assertEqual(8, len(watchdog._watched))
+        self.assertEqual(8, len(watchdog.tracker.media_ids()))
+
+        for media_id in self.media_ids[2:]:
+            del self.encoding.medias[media_id]
+        watchdog.run(interval=0)
+        self.assertEqual(10, len(errors))
+
+
+    def test_transport_error(self):
+        """
+        An action the transport failed to send is reported, uses neither a token nor an attempt,
+        and is sent first on the next step
+
+        :return:
+        """
+        watchdog = Watchdog(self.encoding, thresholds={'Downloading': 100}, rate=6, burst=2, stagger=0,
+                            max_attempts=1, on_action=self.on_action)
+        watchdog.watch(self.media_ids)
+        watchdog.step(now=1000)
+        answer = self.encoding._post_request
+
+        def unreachable(json_data, header=''):
+            if 'RestartMedia' in json_data:
+                raise TransportError('Connection refused')
+            return answer(json_data, header)
+
+        self.encoding._post_request = unreachable
+        watchdog.step(now=1200)
+        self.assertEqual(1, len(self.actions))
+        self.assertTrue(self.actions[0][3].startswith('not sent: Connection refused'))
+        self.assertEqual({}, watchdog._attempts)
+
+        self.encoding._post_request = answer
+        watchdog.step(now=1200)
+        self.assertEqual([self.actions[0][0], self.actions[0][0]], [action[0] for action in self.actions[:2]])
+        self.assertEqual(['done', 'done'], [action[3] for action in self.actions[1:]])
+
+
+if __name__ == '__main__':
+    from unittest import main
+
+    main()
@@ -0,0 +1,294 @@
+"""
+Per stage latency histograms from recorded state transitions.
+
+TransitionRecorder timestamps the state changes of jobs (ie. as seen by Poller.poll_status) and records
+how long each job spent in each stage:
+* download: Downloading
+* queue: Downloaded, Ready to process, Waitingforencoder
+* processing: Processing
+* save: Saving
+
+Durations are kept per stage, output format and source host in Histogram, a compact HDR style histogram
+(log linear buckets with a bounded relative error), so the slowness can be attributed to the sources
+(download), encoding.com's queue (queue, processing) or the destinations (save).
+
+"""
+
+from math import frexp
+from threading import Lock
+from time import time
+from urllib.parse import urlparse
+
+from encodingcom.encoding import Encoding
+from encodingcom.state_tracker import StateTracker
+
+
+# state -> stage, consecutive states of a stage are accounted together
+STAGES = {
+    'Downloading': 'download',
+    'Downloaded': 'queue',
+    'Ready to process': 'queue',
+    'Waitingforencoder': 'queue',
+    'Processing': 'processing',
+    'Saving': 'save',
+}
+
+
+class Histogram(object):
+    """
+    HDR style histogram of durations: values are counted in log linear buckets, each power of 2 split in
+    sub_buckets linear buckets, so percentiles are within 1/sub_buckets relative error whatever the scale.
+    Only the non empty buckets are stored.
+    """
+
+    def __init__(self, sub_buckets: int=32, unit: float=0.001):
+        """
+        :param sub_buckets: int
+            Linear buckets per power of 2, the relative error is 1/sub_buckets
+        :param unit: float
+            Resolution of the values, in seconds (defaults to milliseconds)
+        """
+        self.sub_buckets = sub_buckets
+        self.unit = unit
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value: float, count: int=1):
+        """
+        :param value: float
+            Duration in seconds
+        :param count: int
+            Number of occurrences of the value
+        :return: None
+        """
+        key = self._bucket(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'Histogram'):
+        """
+        Add the counts of another histogram with the same sub_buckets and unit
+
+        :param other: Histogram
+        :return: None
+        """
+        if (other.sub_buckets, other.unit) != (self.sub_buckets, self.unit):
+            raise ValueError('Cannot merge histograms of different resolutions')
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def mean(self) -> float:
+        """
+        :return: mean duration in seconds, None if empty
+        :rtype: float
+        """
+        return self.total / self.count if self.count else None
+
+    def percentile(self, fraction: float) -> float:
+        """
+        :param fraction: float
+            Percentile as a fraction, ie. 0.99
+        :return: duration in seconds (upper bound of the bucket), None if empty
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return min(self.max, self._upper(key))
+        return self.max
+
+    def to_dict(self) -> dict:
+        """
+        :return: compact JSON friendly representation
+        :rtype: dict
+        """
+        return {'sub_buckets': self.sub_buckets, 'unit': self.unit, 'count': self.count, 'total': self.total,
+                'min': self.min, 'max': self.max, 'buckets': sorted(self.counts.items())}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'Histogram':
+        """
+        :param data: dict
+            Output of to_dict()
+        :return: histogram
+        :rtype: Histogram
+        """
+        histogram = Histogram(data['sub_buckets'], data['unit'])
+        histogram.counts = dict((key, count) for key, count in data['buckets'])
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+    def _bucket(self, value: float) -> int:
+        units = int(value / self.unit)
+        if units < self.sub_buckets:
+            return units
+        mantissa, exponent = frexp(units)
+        # mantissa in [0.5, 1): linear position within the power of 2
+        return exponent * self.sub_buckets + int((mantissa * 2 - 1) * self.sub_buckets)
+
+    def _upper(self, key: int) -> float:
+        if key < self.sub_buckets:
+            return (key + 1) * self.unit
+        exponent, sub = divmod(key, self.sub_buckets)
+        return (1 + (sub + 1) / self.sub_buckets) * 2 ** (exponent - 1) * self.unit
+
+
+def get_host(source) -> str:
+    """
+    :param source:
+        Source url (or list of urls) of a job
+    :return: host of the (first) source, '' if unknown
+    :rtype: str
+    """
+    if isinstance(source, (list, tuple)):
+        source = source[0] if source else ''
+    return urlparse(str(source or '')).hostname or ''
+
+
+def get_output(format) -> str:
+    """
+    :param format:
+        Format (or list of formats) of a job, as submitted or as reported by GetStatus
+    :return: output(s) of the format, ie. 'mp4' or 'advanced_hls+mp4'
+    :rtype: str
+    """
+    formats = format if isinstance(format, (list, tuple)) else [format]
+    return '+'.join(sorted(set(str(item.get('output', '')) for item in formats if isinstance(item, dict))))
+
+
+class TransitionRecorder(object):
+    """
+    Records state transitions and builds per stage duration histograms by output format and source host
+
+    Usage:
+        recorder = TransitionRecorder()
+        Poller.poll_status(service, media_id, recorder=recorder)
+        recorder.export()
+    """
+
+    def __init__(self, sub_buckets: int=32):
+        """
+        :param sub_buckets: int
+            Resolution of the histograms, see Histogram
+        """
+        self.sub_buckets = sub_buckets
+        self.tracker = StateTracker()
+        # (stage, output, host) -> Histogram
+        self.histograms = {}
+        # media_id -> [output, host, stage, stage entered at]
+        self._jobs = {}
+        self._lock = Lock()
+
+    def start(self, media_id: str, source=None, format=None):
+        """
+        Label a job with its output format and source host, ie. right after add_media
+
+        :param media_id: str
+        :param source:
+            Source the job was submitted with
+        :param format:
+            Format the job was submitted with
+        :return: None
+        """
+        with self._lock:
+            job = self._jobs.setdefault(media_id, ['', '', None, None])
+            job[0] = get_output(format)
+            job[1] = get_host(source)
+
+    def observe(self, media_id: str, status: str, now: float=None, response: dict=None):
+        """
+        Record a status observed for a job, the duration of a stage is recorded when the job leaves it
+
+        :param media_id: str
+        :param status: str
+        :param now: float
+            Time of the observation (epoch seconds), defaults to current time
+        :param response: dict
+            GetStatus response of the job, labels the job when start() was not called
+        :return: None
+        """
+        if now is None:
+            now = time()
+
+        with self._lock:
+            if self.tracker.update(media_id, status, now) is None:
+                return
+
+            job = self._jobs.get(media_id)
+            if job is None:
+                response = response or {}
+                job = [get_output(response.get('format', {})), get_host(response.get('sourcefile')), None, None]
+                self._jobs[media_id] = job
+
+            stage = STAGES.get(status)
+            if stage != job[2]:
+                if job[2] is not None:
+                    self._record(job[2], job[0], job[1], now - job[3])
+                job[2] = stage
+                job[3] = now
+
+            if status in Encoding.EXIT_STATUSES:
+                del self._jobs[media_id]
+                self.tracker.remove(media_id)
+
+    def poller_callback(self, **kwargs):
+        """
+        Poller callback feeding the recorder: Poller.poll_statuses(service, media_ids, callback=recorder.poller_callback)
+
+        :param kwargs: media_id, status, response
+        :return: None
+        """
+        self.observe(kwargs['media_id'], kwargs['status'], response=kwargs.get('response'))
+
+    def summary(self, by: tuple=('stage',)) -> dict:
+        """
+        Merge the histograms along the given dimensions
+
+        :param by: tuple
+            Dimensions kept among 'stage', 'output', 'host'
+        :return: dict of tuple of the dimension values -> Histogram
+        :rtype: dict
+        """
+        positions = [('stage', 'output', 'host').index(name) for name in by]
+        merged = {}
+        with self._lock:
+            for key, histogram in self.histograms.items():
+                group = tuple(key[position] for position in positions)
+                if group not in merged:
+                    merged[group] = Histogram(self.sub_buckets)
+                merged[group].merge(histogram)
+        return merged
+
+    def export(self) -> [dict]:
+        """
+        :return: list of dict of stage, output, host and histogram (Histogram.to_dict)
+        :rtype: list
+        """
+        with self._lock:
+            return [{'stage': stage, 'output': output, 'host': host, 'histogram': histogram.to_dict()}
+                    for (stage, output, host), histogram in sorted(self.histograms.items())]
+
+    def _record(self, stage: str, output: str, host: str, duration: float):
+        key = (stage, output, host)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(self.sub_buckets)
+        histogram.record(duration)
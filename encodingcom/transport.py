@@ -0,0 +1,270 @@
+"""
+HTTP transports Encoding sends its requests through.
+
+A transport posts a form url encoded body and returns the HTTP status code and the raw response bytes,
+either at once (send) or as an iterator of chunks (stream).  Encoding decodes the responses, applies the
+deadlines and handles the encoding.com errors, so any transport can replace another:
+* RequestsTransport (default): pooled requests Session
+* Urllib3Transport: raw urllib3 PoolManager, less work per call than requests
+* InProcessTransport: a python function answers the requests, for tests and simulations
+
+Transports are shared by the threads using an Encoding instance, and start over in a forked child process.
+Their errors are listed by errors (any failure to get a response) and timeouts (timeouts only), so callers
+catch them without knowing the transport:
+    try:
+        service.get_status(mediaid=media_id)
+    except service.transport.errors:
+        ...
+
+See tools/transport_benchmark.py for their per call overhead and throughput.
+
+"""
+
+from abc import ABC, abstractmethod
+from os import getpid
+from threading import Lock
+from time import sleep
+
+from encodingcom.exception import TransportError, TransportTimeout
+
+
+class Transport(ABC):
+    """
+    Interface of the transports, stream is the only method a transport has to implement
+    """
+
+    def send(self, url: str, body: str, headers: dict, timeout) -> (int, bytes):
+        """
+        Post the body
+
+        :param url: str
+        :param body: str
+            Form url encoded body
+        :param headers: dict
+        :param timeout:
+            (connect, read) timeouts in seconds, or a single value for both
+        :return: HTTP status code, response content
+        :rtype: (int, bytes)
+        """
+        status, chunks = self.stream(url, body, headers, timeout)
+        return status, b''.join(chunks)
+
+    @abstractmethod
+    def stream(self, url: str, body: str, headers: dict, timeout, chunk_size: int=65536) -> (int, iter):
+        """
+        Post the body, the response content is read as it is consumed
+
+        :param url: str
+        :param body: str
+            Form url encoded body
+        :param headers: dict
+        :param timeout:
+            (connect, read) timeouts in seconds, or a single value for both
+        :param chunk_size: int
+            Maximum number of bytes per chunk
+        :return: HTTP status code, iterator of the response content chunks
+        :rtype: (int, iter)
+        """
+
+    @property
+    def errors(self) -> tuple:
+        """
+        :return: exceptions raised when no response could be received
+        :rtype: tuple
+        """
+        return TransportError,
+
+    @property
+    def timeouts(self) -> tuple:
+        """
+        :return: exceptions raised when a timeout ran out
+        :rtype: tuple
+        """
+        return TransportTimeout,
+
+    def close(self):
+        """
+        Release the pooled connections
+
+        :return: None
+        """
+        pass
+
+
+class PooledTransport(Transport):
+    """
+    Transport holding a connection pool per process, created on first use and again in a forked child
+    """
+
+    def __init__(self, pool_size: int=10):
+        """
+        :param pool_size: int
+            Maximum number of pooled connections, ie. the number of threads sharing the transport
+        """
+        self.pool_size = pool_size
+        self._pool = None
+        self._lock = Lock()
+        self._pid = getpid()
+
+    def _get_pool(self):
+        """
+        :return: connection pool of the current process
+        """
+        if self._pid != getpid():
+            # forked: the parent's connections (and a lock possibly held by another parent thread) are left behind
+            self._pool = None
+            self._lock = Lock()
+            self._pid = getpid()
+
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                pool = self._pool
+                if pool is None:
+                    pool = self._pool = self._create_pool()
+        return pool
+
+    @abstractmethod
+    def _create_pool(self):
+        """
+        :return: new connection pool, called once per process
+        """
+
+    def _close_pool(self, pool):
+        pool.close()
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            self._close_pool(pool)
+
+
+class RequestsTransport(PooledTransport):
+    """
+    Pooled requests Session, requests is imported once the first request is sent so the tools start
+    without loading it.  requests exceptions are raised as is
+    """
+
+    def send(self, url: str, body: str, headers: dict, timeout) -> (int, bytes):
+        response = self._get_pool().post(url, data=body, headers=headers, timeout=timeout)
+        return response.status_code, response.content
+
+    def stream(self, url: str, body: str, headers: dict, timeout, chunk_size: int=65536) -> (int, iter):
+        response = self._get_pool().post(url, data=body, headers=headers, timeout=timeout, stream=True)
+
+        def chunks():
+            try:
+                for chunk in response.iter_content(chunk_size):
+                    yield chunk
+            finally:
+                response.close()
+
+        return response.status_code, chunks()
+
+    @property
+    def errors(self) -> tuple:
+        from requests.exceptions import RequestException
+        return RequestException, TransportError
+
+    @property
+    def timeouts(self) -> tuple:
+        from requests.exceptions import Timeout
+        return Timeout, TransportTimeout
+
+    def _create_pool(self):
+        from requests import Session
+        from requests.adapters import HTTPAdapter
+
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+
+class Urllib3Transport(PooledTransport):
+    """
+    Raw urllib3 PoolManager, without the requests layers.  urllib3 errors are raised as TransportError,
+    TransportTimeout for the timeouts
+    """
+
+    def send(self, url: str, body: str, headers: dict, timeout) -> (int, bytes):
+        response = self._request(url, body, headers, timeout, True)
+        return response.status, response.data
+
+    def stream(self, url: str, body: str, headers: dict, timeout, chunk_size: int=65536) -> (int, iter):
+        response = self._request(url, body, headers, timeout, False)
+
+        def chunks():
+            try:
+                for chunk in response.stream(chunk_size):
+                    yield chunk
+            except Exception as ex:
+                raise self._error(ex)
+            finally:
+                response.release_conn()
+
+        return response.status, chunks()
+
+    def _request(self, url: str, body: str, headers: dict, timeout, preload: bool):
+        from urllib3 import Timeout
+
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        try:
+            return self._get_pool().request('POST', url, body=body.encode('utf-8'), headers=headers,
+                                            timeout=Timeout(connect=connect, read=read),
+                                            retries=False, preload_content=preload)
+        except Exception as ex:
+            raise self._error(ex)
+
+    @staticmethod
+    def _error(error: Exception) -> Exception:
+        from urllib3.exceptions import HTTPError, TimeoutError
+
+        if isinstance(error, TimeoutError):
+            return TransportTimeout(str(error))
+        if isinstance(error, HTTPError):
+            return TransportError(str(error))
+        return error
+
+    def _create_pool(self):
+        from urllib3 import PoolManager
+
+        return PoolManager(num_pools=1, maxsize=self.pool_size, block=False)
+
+    def _close_pool(self, pool):
+        pool.clear()
+
+
+class InProcessTransport(Transport):
+    """
+    Requests answered by a python function, nothing leaves the process.
+
+    Usage, answering every GetStatus with a canned response:
+        transport = InProcessTransport(lambda url, body, headers: (200, b'{"response": {...}}'))
+        service = Encoding(user_id, user_key, transport=transport)
+    """
+
+    def __init__(self, handler, latency: float=0.0):
+        """
+        :param handler:
+            Function called with url, body, headers and returning the HTTP status code and response content
+        :param latency: float
+            Seconds slept per request, to simulate the network
+        """
+        self.handler = handler
+        self.latency = latency
+
+    def send(self, url: str, body: str, headers: dict, timeout) -> (int, bytes):
+        if self.latency:
+            connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+            if read is not None and self.latency > read:
+                sleep(read)
+                raise TransportTimeout('Read timed out after %ss' % read)
+            sleep(self.latency)
+        return self.handler(url, body, headers)
+
+    def stream(self, url: str, body: str, headers: dict, timeout, chunk_size: int=65536) -> (int, iter):
+        status, content = self.send(url, body, headers, timeout)
+        return status, iter([content[index:index + chunk_size] for index in range(0, len(content), chunk_size)])
@@ -0,0 +1,201 @@
+"""
+Offline validation of requests against the encoding.com request template.
+
+The request template (encodingcom/request_template.py) is compiled once at import time into nested
+key sets and value checks, so validating a request costs a few dict lookups per key instead of
+a round trip to encoding.com.
+
+Checks performed:
+* key names, at the query level and within format (and its nested logo, overlay, metadata...)
+* enum valued fields documented in the template, ie. gop [cgop|sgop], profile [high/main/baseline],
+    rotate def|0|90|270, video_sync, yes/no flags
+* numeric ranges documented in the template, ie. audio_normalization [0-100], audio_sync [1..N]
+* value formats of common numeric fields (bitrates, size, framerate, keyframe)
+
+Validation is opt-in: Encoding.add_media/add_media_benchmark/process_media/update_media(strict=True, ...)
+
+"""
+
+from re import compile as re_compile
+
+from encodingcom.exception import InvalidParameterError
+from encodingcom.request_template import request_template
+
+
+# keys valid for encoding.com but not detailed in the request template
+EXTRA_KEYS = {
+    'query': frozenset(['instant', 'extended', 'taskid']),
+    'format': frozenset(['width', 'time', 'file_extension', 'two_pass', 'cbr', 'deinterlacing']),
+}
+
+# value formats of fields the template only describes in prose
+PATTERNS = {
+    'bitrate': r'^\d+k?$',
+    'audio_bitrate': r'^\d+k?$',
+    'minrate': r'^\d+k?$',
+    'maxrate': r'^\d+k?$',
+    'bufsize': r'^\d+k?$',
+    'audio_sample_rate': r'^\d+$',
+    'audio_channels_number': r'^\d+$',
+    'size': r'^\d+x\d+$',
+    'framerate': r'^\d+(\.\d+)?$',
+    'keyframe': r'^\d+$',
+    'width': r'^\d+$',
+}
+
+# template placeholder forms carrying a constraint
+_ENUM = re_compile(r'^\[?([a-z0-9_]+(?:[|/][a-z0-9_]+)+)\]?$')
+_RANGE = re_compile(r'^\[(\d+)-(\d+)\]$')
+_MINIMUM = re_compile(r'^\[(\d+)\.\.N\]$')
+
+
+def _enum_check(allowed: frozenset):
+    def check(value) -> str:
+        if str(value) not in allowed:
+            return '%s, expected one of %s' % (value, '|'.join(sorted(allowed)))
+        return ''
+    return check
+
+
+def _range_check(low: int, high: int=None):
+    def check(value) -> str:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return '%s, expected a number' % value
+        if number < low or (high is not None and number > high):
+            return '%s, expected within [%s..%s]' % (value, low, 'N' if high is None else high)
+        return ''
+    return check
+
+
+def _pattern_check(pattern: str):
+    regex = re_compile(pattern)
+
+    def check(value) -> str:
+        if not regex.match(str(value)):
+            return '%s, expected to match %s' % (value, pattern)
+        return ''
+    return check
+
+
+def _compile_value(key: str, placeholder):
+    """
+    Build the check of a template leaf
+
+    :param key: str
+        Key of the leaf
+    :param placeholder:
+        Template value of the leaf
+    :return: check function returning an error string ('' if valid), None if unconstrained
+    """
+    if key in PATTERNS:
+        return _pattern_check(PATTERNS[key])
+    if not isinstance(placeholder, str):
+        return None
+
+    match = _RANGE.match(placeholder)
+    if match:
+        return _range_check(int(match.group(1)), int(match.group(2)))
+    match = _MINIMUM.match(placeholder)
+    if match:
+        return _range_check(int(match.group(1)))
+    match = _ENUM.match(placeholder)
+    if match:
+        return _enum_check(frozenset(match.group(1).replace('/', '|').split('|')))
+    return None
+
+
+def _compile(name: str, template: dict) -> dict:
+    """
+    Compile a dict node of the template
+
+    :param name: str
+        Name of the node, used to look up EXTRA_KEYS
+    :param template: dict
+        Template node
+    :return: compiled node: {'keys': frozenset, 'checks': {key: check}, 'children': {key: compiled node}}
+    :rtype: dict
+    """
+    node = {'keys': frozenset(template) | EXTRA_KEYS.get(name, frozenset()), 'checks': {}, 'children': {}}
+
+    for key in node['keys']:
+        value = template.get(key)
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            # list of dicts (ie. overlay), any item may use any key documented in the template items
+            merged = {}
+            for item in value:
+                merged.update(item)
+            value = merged
+        if isinstance(value, dict):
+            node['children'][key] = _compile(key, value)
+        else:
+            check = _compile_value(key, value)
+            if check:
+                node['checks'][key] = check
+
+    return node
+
+
+_QUERY = _compile('query', request_template['query'])
+
+
+def _validate(node: dict, data: dict, path: str, errors: list):
+    """
+    Validate a request dict against its compiled node, appending the problems found to errors
+    """
+    keys = node['keys']
+    checks = node['checks']
+    children = node['children']
+
+    for key, value in data.items():
+        if key not in keys:
+            errors.append('%s%s: unknown key' % (path, key))
+            continue
+
+        child = children.get(key)
+        if child is not None:
+            items = value if isinstance(value, list) else [value]
+            for item in items:
+                if isinstance(item, dict):
+                    _validate(child, item, '%s%s.' % (path, key), errors)
+                else:
+                    errors.append('%s%s: %s, expected a dict' % (path, key, item))
+            continue
+
+        check = checks.get(key)
+        if check is not None:
+            for item in (value if isinstance(value, list) else [value]):
+                error = check(item)
+                if error:
+                    errors.append('%s%s: %s' % (path, key, error))
+
+
+def get_errors(query: dict) -> [str]:
+    """
+    Validate the query arguments of a request against the request template
+
+    :param query: dict
+        Arguments of the query, as given to the Encoding actions (ie. source, format, mediaid...)
+    :return: list of the problems found, [] if the query is valid
+    :rtype: list
+    """
+    errors = []
+    _validate(_QUERY, query, '', errors)
+    return errors
+
+
+def validate(query: dict) -> bool:
+    """
+    Validate the query arguments of a request against the request template.
+    Throws an exception detailing all the problems found.
+
+    :param query: dict
+        Arguments of the query, as given to the Encoding actions (ie. source, format, mediaid...)
+    :return: True if the query is valid
+    :rtype: bool
+    """
+    errors = get_errors(query)
+    if errors:
+        raise InvalidParameterError('; '.join(errors))
+    return True
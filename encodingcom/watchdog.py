@@ -0,0 +1,280 @@
+"""
+Watchdog for jobs stuck in a state.
+
+Jobs sometimes sit in Downloading or Waitingforencoder far longer than normal.  Watchdog follows the time
+in state of a set of mediaids (batched GetStatus), flags the jobs past a per state threshold and applies
+the action the policy details for that state (restart_media, restart_media_errors, stop_media).
+
+Thresholds are either fixed, or learned: a percentile of the durations observed for the state,
+multiplied by a margin, once enough transitions have been observed.
+
+Actions are rate limited (token bucket) and staggered (minimum spacing), so a mass incident flagging
+thousands of jobs at once does not turn into a restart storm, and each mediaid is only acted upon
+max_attempts times.
+
+"""
+
+from collections import deque
+from time import sleep, time
+
+from encodingcom.batch import Batcher
+from encodingcom.encoding import Encoding
+from encodingcom.exception import EncodingErrors
+from encodingcom.state_tracker import StateTracker
+
+
+class Watchdog(object):
+    """
+    Flags jobs stuck in a state and restarts/stops them according to a policy
+    """
+
+    # seconds in state before a job is flagged, states not listed are never flagged
+    DEFAULT_THRESHOLDS = {
+        'New': 600,
+        'Downloading': 3600,
+        'Ready to process': 1800,
+        'Waitingforencoder': 1800,
+        'Saving': 1800,
+    }
+
+    # state -> Encoding method applied to the flagged jobs
+    DEFAULT_POLICY = {
+        'New': 'restart_media',
+        'Downloading': 'restart_media',
+        'Ready to process': 'restart_media',
+        'Waitingforencoder': 'restart_media',
+        'Saving': 'restart_media_errors',
+    }
+
+    ACTIONS = frozenset(['restart_media', 'restart_media_errors', 'stop_media'])
+
+    def __init__(self, service: Encoding, thresholds: dict=None, policy: dict=None,
+                 percentile: float=None, margin: float=2.0, min_samples: int=20,
+                 rate: float=10.0, burst: int=5, stagger: float=2.0, max_attempts: int=2,
+                 chunk_size: int=100, dry_run: bool=False, on_action=None, on_error=None):
+        """
+        :param service: Encoding
+            Encoding service class
+        :param thresholds: dict
+            state -> seconds in state before a job is flagged, defaults to DEFAULT_THRESHOLDS
+        :param policy: dict
+            state -> Encoding method (one of ACTIONS) applied to flagged jobs, defaults to DEFAULT_POLICY.
+            Flagged jobs of a state without policy are only reported
+        :param percentile: float
+            When given (ie. 0.99), learn the thresholds: percentile of the observed durations times margin.
+            Fixed thresholds apply to a state until min_samples of its durations are observed
+        :param margin: float
+            Multiplier of the learned percentile
+        :param min_samples: int
+            Durations observed for a state before its threshold is learned
+        :param rate: float
+            Actions allowed per minute
+        :param burst: int
+            Actions allowed at once
+        :param stagger: float
+            Seconds waited between two consecutive actions of a step
+        :param max_attempts: int
+            Maximum number of actions applied to a mediaid
+        :param chunk_size: int
+            Number of mediaids per GetStatus call
+        :param dry_run: bool
+            Flag and report only, no action is dispatched
+        :param on_action:
+            Callback invoked with media_id, status, action, outcome for each action ('dry run' when dry_run,
+            'not sent: <error>' when the transport failed, the action is tried again on the next step)
+        :param on_error:
+            Callback invoked with media_id, errors when encoding.com answers GetStatus with an error
+            (ie. unknown or deleted mediaid), the mediaid is no longer watched
+        """
+        self.service = service
+        self.thresholds = dict(Watchdog.DEFAULT_THRESHOLDS if thresholds is None else thresholds)
+        self.policy = dict(Watchdog.DEFAULT_POLICY if policy is None else policy)
+        for action in self.policy.values():
+            if action not in Watchdog.ACTIONS:
+                raise ValueError('Unsupported watchdog action: %s' % action)
+
+        self.percentile = percentile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.rate = rate / 60.0
+        self.burst = burst
+        self.stagger = stagger
+        self.max_attempts = max_attempts
+        self.dry_run = dry_run
+        self.on_action = on_action
+        self.on_error = on_error
+
+        self.batcher = Batcher(service, chunk_size=chunk_size)
+        self.tracker = StateTracker()
+
+        # state -> recent durations
+        self._durations = {}
+        # media_id -> actions applied
+        self._attempts = {}
+        # flagged media_ids waiting for the rate limiter
+        self._queue = deque()
+        self._queued = set()
+        self._watched = set()
+
+        self._tokens = float(burst)
+        self._refilled = None
+
+    def watch(self, media_ids):
+        """
+        Add mediaids to follow, mediaids reaching an exit status or answered with an error are no longer followed
+
+        :param media_ids:
+            Iterable of media ids
+        :return: None
+        """
+        self._watched.update(media_ids)
+
+    def threshold(self, status: str) -> float:
+        """
+        :param status: str
+        :return: seconds in the given state before a job is flagged, None if never flagged
+        :rtype: float
+        """
+        fixed = self.thresholds.get(status)
+        if fixed is None or self.percentile is None:
+            return fixed
+
+        durations = self._durations.get(status)
+        if not durations or len(durations) < self.min_samples:
+            return fixed
+
+        ordered = sorted(durations)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return ordered[index] * self.margin
+
+    def step(self, now: float=None) -> [tuple]:
+        """
+        Refresh the watched jobs, flag the stuck ones and dispatch the actions the rate limiter allows
+
+        :param now: float
+            Current time (epoch seconds), defaults to current time
+        :return: list of (media_id, status, seconds in state) flagged during this step
+        :rtype: list
+        """
+        if now is None:
+            now = time()
+
+        if self._watched:
+            result = self.batcher.dispatch('get_status', list(self._watched))
+            for media_id, job in result.responses.items():
+                self._observe(media_id, job.get('status'), now)
+            for media_id, errors in result.errors.items():
+                if media_id not in result.unreachable:
+                    # encoding.com does not know the job (anymore), the transport errors are retried next step
+                    self._forget(media_id)
+                    if self.on_error:
+                        self.on_error(media_id=media_id, errors=errors)
+
+        # thresholds are computed once per state per step
+        limits = {}
+        flagged = []
+        for media_id in self.tracker.media_ids():
+            status = self.tracker.status(media_id)
+            if status not in limits:
+                limits[status] = self.threshold(status)
+            threshold = limits[status]
+            in_state = self.tracker.time_in_state(media_id, now)
+            if threshold is None or in_state <= threshold:
+                continue
+
+            flagged.append((media_id, status, in_state))
+            if media_id not in self._queued and self._attempts.get(media_id, 0) < self.max_attempts:
+                self._queue.append(media_id)
+                self._queued.add(media_id)
+
+        self._dispatch(now, limits)
+        return flagged
+
+    def run(self, interval: float=60):
+        """
+        Step until all the watched jobs reached an exit status
+
+        :param interval: float
+            Seconds between two steps
+        :return: None
+        """
+        while self._watched:
+            self.step()
+            if self._watched:
+                sleep(interval)
+
+    def _observe(self, media_id: str, status: str, now: float):
+        entered = self.tracker.entered(media_id)
+        previous = self.tracker.update(media_id, status, now)
+        if previous:
+            # a full duration of the previous state has been observed
+            self._durations.setdefault(previous, deque(maxlen=1000)).append(now - entered)
+
+        if status in Encoding.EXIT_STATUSES:
+            self._forget(media_id)
+
+    def _forget(self, media_id: str):
+        """
+        Stop following a mediaid, a queued action is dropped by _dispatch as its state is no longer known
+
+        :param media_id: str
+        :return: None
+        """
+        self._watched.discard(media_id)
+        self.tracker.remove(media_id)
+        self._attempts.pop(media_id, None)
+
+    def _dispatch(self, now: float, limits: dict):
+        """
+        Apply the policy to the queued flagged jobs, within the rate limit and stagger
+
+        :param now: float
+        :param limits: dict
+            state -> threshold of this step
+        :return: None
+        """
+        acted = False
+        if self._refilled is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+        while self._queue and self._tokens >= 1:
+            media_id = self._queue.popleft()
+            self._queued.discard(media_id)
+            status = self.tracker.status(media_id)
+            action = self.policy.get(status)
+            threshold = limits.get(status)
+            if action is None or threshold is None or self.tracker.time_in_state(media_id, now) <= threshold:
+                # no longer stuck, or nothing to do for this state
+                continue
+
+            if acted:
+                sleep(self.stagger)
+            acted = True
+            self._tokens -= 1
+            self._attempts[media_id] = self._attempts.get(media_id, 0) + 1
+
+            if self.dry_run:
+                outcome = 'dry run'
+            else:
+                try:
+                    getattr(self.service, action)(mediaid=media_id)
+                    outcome = 'done'
+                    # the job starts over, its time in state as well
+                    self.tracker.remove(media_id)
+                except EncodingErrors as ex:
+                    outcome = ', '.join(str(error) for error in ex.errors)
+                except self.service.transport.errors as ex:
+                    # not sent: neither the token nor the attempt is used, the job is first in line on the next step
+                    self._tokens += 1
+                    self._attempts[media_id] -= 1
+                    if not self._attempts[media_id]:
+                        del self._attempts[media_id]
+                    self._queue.appendleft(media_id)
+                    self._queued.add(media_id)
+                    if self.on_action:
+                        self.on_action(media_id=media_id, status=status, action=action, outcome='not sent: %s' % ex)
+                    break
+
+            if self.on_action:
+                self.on_action(media_id=media_id, status=status, action=action, outcome=outcome)
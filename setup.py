@@ -15,12 +15,17 @@ setup(
     author="Ryan Stubblefield, David Hwu",
     author_email="pypi@studionow.com",
     packages=find_packages(
-        exclude=["*.tests", "*.tests.*", "tests.*", "tests", "*.examples", "example*"]),
+        exclude=["*.tests", "*.tests.*", "tests.*", "tests", "tools", "tools.*", "*.examples", "example*"]),
     long_description='Encoding.com service handling (c) StudioNow 2015',
     include_package_data=True,
     install_requires=[
         'requests>=2.5.1'
     ],
+    entry_points={
+        'console_scripts': [
+            'encodingcom=encodingcom.cli:main',
+        ],
+    },
     data_files = ['README.md'],
     classifiers=[
         "Development Status :: 3 - Alpha",
@@ -0,0 +1,125 @@
+#! /usr/bin/env python
+"""
+Compare submitting an ABR ladder as a single AddMedia (Format.abr_ladder) against one AddMedia per rendition.
+
+The comparison is a model, no call is made to encoding.com:
+* every job downloads the source, jobs submitted at the same time share the source origin bandwidth
+* every job waits queue_wait seconds for an encoder once downloaded
+* renditions of a job are encoded in parallel, a rendition encode time scales with its pixel count
+
+USAGE:
+    python ladder_comparison.py
+    * Compares the Format.DEFAULT_LADDER with the default model values
+
+    python ladder_comparison.py --source-size=8000 --bandwidth=50 --queue-wait=60 --encode-time=600
+
+"""
+
+from argparse import ArgumentParser, Namespace
+
+from encodingcom.format import Format
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    arguments = {
+        '--source-size': {
+            'required': False,
+            'type': float,
+            'default': 4000.0,
+            'help': 'Source file size in MB (defaults to 4000)'
+        },
+
+        '--bandwidth': {
+            'required': False,
+            'type': float,
+            'default': 40.0,
+            'help': 'Source origin bandwidth in MB/s, shared by concurrent downloads (defaults to 40)'
+        },
+
+        '--queue-wait': {
+            'required': False,
+            'type': float,
+            'default': 30.0,
+            'help': 'Seconds a job waits for an encoder once downloaded (defaults to 30)'
+        },
+
+        '--encode-time': {
+            'required': False,
+            'type': float,
+            'default': 300.0,
+            'help': 'Seconds to encode the 1920x1080 rendition, other renditions scale by pixel count '
+                    '(defaults to 300)'
+        },
+
+    }
+
+    parser = ArgumentParser()
+    for argument in arguments.keys():
+        parser.add_argument(argument, **arguments[argument])
+
+    return parser.parse_args()
+
+
+def compare(renditions: list, source_size: float, bandwidth: float, queue_wait: float, encode_time: float) -> dict:
+    """
+    Model the single job and the job per rendition submissions of the ladder
+
+    :param renditions: list
+        Ladder as given to Format.abr_ladder()
+    :param source_size: float
+        Source file size in MB
+    :param bandwidth: float
+        Source origin bandwidth in MB/s
+    :param queue_wait: float
+        Seconds waited for an encoder
+    :param encode_time: float
+        Seconds to encode a 1920x1080 rendition
+    :return: dict of submission mode -> dict of jobs, downloaded MB, first output and last output seconds
+    :rtype: dict
+    """
+    encodes = [encode_time * width * height / (1920 * 1080) for width, height in (r[:2] for r in renditions)]
+    download = source_size / bandwidth
+
+    result = {}
+    for mode, jobs in (('single AddMedia', 1), ('AddMedia per rendition', len(renditions))):
+        # concurrent downloads share the origin bandwidth
+        ready = download * jobs + queue_wait
+        result[mode] = {
+            'jobs': jobs,
+            'downloaded_mb': source_size * jobs,
+            'first_output': ready + min(encodes),
+            'last_output': ready + max(encodes),
+        }
+    return result
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+    renditions = Format.DEFAULT_LADDER
+    Format.validate_ladder(renditions)
+
+    result = compare(renditions, args.source_size, args.bandwidth, args.queue_wait, args.encode_time)
+
+    print('%d renditions: %s' % (len(renditions), ', '.join('%dp' % r[1] for r in renditions)))
+    print('%-24s %6s %14s %14s %14s' % ('SUBMISSION', 'JOBS', 'DOWNLOADED MB', 'FIRST OUTPUT', 'LAST OUTPUT'))
+    for mode, values in result.items():
+        print('%-24s %6d %14.0f %13.0fs %13.0fs' % (mode, values['jobs'], values['downloaded_mb'],
+                                                     values['first_output'], values['last_output']))
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
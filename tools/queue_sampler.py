@@ -0,0 +1,125 @@
+#! /usr/bin/env python
+"""
+Sample the account queue depth (jobs per state) and throughput (arrivals, completions per minute).
+
+Each sample is one GetMediaList plus chunked GetStatus calls on the jobs not yet final (see encodingcom/sampler.py).
+One line is printed per sample.
+
+USAGE:
+    python queue_sampler.py --user=1234 --key=abcde
+    Sample every 60 seconds until interrupted
+
+    python queue_sampler.py --user=1234 --key=abcde --interval=10 --samples=30 --json > samples.jsonl
+    30 samples 10 seconds apart, as JSON lines
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from json import dumps
+from time import sleep, strftime, localtime, time
+
+from encodingcom.encoding import Encoding
+from encodingcom.sampler import QueueSampler
+
+
+# states reported in the columns, in the order a job goes through them
+COLUMNS = ('New', 'Downloading', 'Downloaded', 'Ready to process', 'Waitingforencoder', 'Processing', 'Saving',
+           'Finished', 'Error', 'Stopped')
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    arguments = {
+        '--user': {
+            'required': True,
+            'help': 'Designate a required UserID needed to access encoding.com'
+        },
+
+        '--key': {
+            'required': True,
+            'help': 'Designate a required User Key to access encoding.com'
+        },
+
+        '--interval': {
+            'required': False,
+            'type': float,
+            'default': 60.0,
+            'help': 'Seconds between two samples (defaults to 60)'
+        },
+
+        '--samples': {
+            'required': False,
+            'type': int,
+            'default': 0,
+            'help': 'Number of samples to take, 0 (default) samples until interrupted'
+        },
+
+        '--chunk-size': {
+            'required': False,
+            'type': int,
+            'default': 100,
+            'help': 'Number of mediaids per GetStatus call (defaults to 100)'
+        },
+
+        '--json': {
+            'required': False,
+            'action': 'store_true',
+            'help': 'Print each sample as a JSON line'
+        },
+
+    }
+
+    parser = ArgumentParser()
+    for argument in arguments.keys():
+        parser.add_argument(argument, **arguments[argument])
+
+    return parser.parse_args()
+
+
+def format_sample(sample: dict) -> str:
+    """
+    :param sample: dict
+        Sample from QueueSampler.sample()
+    :return: one line of the sample: time, jobs per state, arrivals and completions per minute
+    :rtype: str
+    """
+    rates = ['%8s' % ('-' if sample[name] is None else '%.1f' % sample[name])
+             for name in ('arrival_rate', 'completion_rate')]
+    counts = ['%6d' % sample['counts'].get(state, 0) for state in COLUMNS]
+    return ' '.join([strftime('%H:%M:%S', localtime(sample['time']))] + counts + rates)
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+    encoding = Encoding(user_id=args.user, user_key=args.key)
+    sampler = QueueSampler(encoding, interval=args.interval, chunk_size=args.chunk_size)
+
+    if not args.json:
+        headers = ['%6s' % state[:6] for state in COLUMNS] + ['%8s' % 'IN/MIN', '%8s' % 'OUT/MIN']
+        print(' '.join(['%8s' % 'TIME'] + headers))
+
+    taken = 0
+    while not args.samples or taken < args.samples:
+        started = time()
+        sample = sampler.sample(started)
+        taken += 1
+        print(dumps(sample) if args.json else format_sample(sample), flush=True)
+        if not args.samples or taken < args.samples:
+            sleep(max(0.0, args.interval - (time() - started)))
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
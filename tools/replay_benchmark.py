@@ -0,0 +1,126 @@
+#! /usr/bin/env python
+"""
+Replay a recorded cassette (see encodingcom/cassette.py) through Encoding, offline and repeatable.
+
+Every recorded exchange is issued again through the full Encoding call path (request building, error
+checks...), the responses come from the cassette.  At full speed the run measures the CPU spent per
+call, with --realtime the recorded latencies are slept, measuring a realistic concurrent throughput.
+
+Record a cassette with the live tests or any script using from_environment:
+    ENCODING_RECORD=live.jsonl.gz python -m pytest encodingcom/tests/test_positive.py
+
+USAGE:
+    python replay_benchmark.py --cassette=live.jsonl.gz
+    python replay_benchmark.py --cassette=live.jsonl.gz --realtime --threads=16 --repeat=10
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from json import loads
+from time import perf_counter, process_time
+
+from encodingcom.cassette import Cassette, ReplayEncoding
+from encodingcom.exception import EncodingErrors
+from encodingcom.request_builder import CORE_KEYS
+from encodingcom.speculative import percentile
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    arguments = {
+        '--cassette': {
+            'required': True,
+            'type': str,
+            'help': 'Cassette file to replay'
+        },
+
+        '--realtime': {
+            'required': False,
+            'action': 'store_true',
+            'help': 'Sleep the recorded latencies instead of replaying at full speed'
+        },
+
+        '--speed': {
+            'required': False,
+            'type': float,
+            'default': 1.0,
+            'help': 'Speed factor applied to the recorded latencies with --realtime (defaults to 1.0)'
+        },
+
+        '--threads': {
+            'required': False,
+            'type': int,
+            'default': 1,
+            'help': 'Number of threads sharing the service (defaults to 1)'
+        },
+
+        '--repeat': {
+            'required': False,
+            'type': int,
+            'default': 1,
+            'help': 'Number of times the cassette is replayed (defaults to 1)'
+        },
+
+    }
+
+    parser = ArgumentParser()
+    for argument in arguments.keys():
+        parser.add_argument(argument, **arguments[argument])
+
+    return parser.parse_args()
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+    cassette = Cassette.load(args.cassette)
+    service = ReplayEncoding(cassette, realtime=args.realtime, speed=args.speed, pool_size=args.threads)
+
+    # action, arguments of each recorded query, the envelope is rebuilt by the service
+    calls = []
+    for key, status, response, latency in cassette.exchanges:
+        query = loads(key)
+        calls.append((query['action'], {name: value for name, value in query.items() if name not in CORE_KEYS}))
+
+    def call(index: int) -> (float, bool):
+        action, arguments = calls[index % len(calls)]
+        start = perf_counter()
+        try:
+            service._request(action, [], **arguments)
+            failed = False
+        except EncodingErrors:
+            # recorded error responses are replayed as such
+            failed = True
+        return perf_counter() - start, failed
+
+    total = len(calls) * args.repeat
+    started, cpu = perf_counter(), process_time()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(call, range(total)))
+    elapsed, cpu = perf_counter() - started, process_time() - cpu
+
+    latencies = [latency for latency, failed in results]
+    print('%d calls (%d recorded exchanges x %d), %d thread(s), %s' % (
+        total, len(calls), args.repeat, args.threads, 'realtime x%g' % args.speed if args.realtime else 'full speed'))
+    print('throughput:       %10.1f calls/s' % (total / elapsed))
+    print('CPU per call:     %10.2f us' % (cpu * 1e6 / total))
+    print('latency p50:      %10.2f ms' % (percentile(latencies, 0.5) * 1000))
+    print('latency p99:      %10.2f ms' % (percentile(latencies, 0.99) * 1000))
+    print('error responses:  %10d' % sum(1 for latency, failed in results if failed))
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
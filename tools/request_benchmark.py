@@ -0,0 +1,124 @@
+#! /usr/bin/env python
+"""
+Measure the CPU spent per call building requests, for a high rate get_status loop.
+
+No call is made to encoding.com, the network is replaced by a canned response.  Compares:
+* legacy: query dict copy, json.dumps and form url encoding of the whole query (the pre RequestBuilder path)
+* compiled: RequestBuilder, cached serialized and url encoded prefix, only the arguments encoded per call
+* get_status: the full Encoding.get_status call (builder, error checks) without the network
+
+USAGE:
+    python request_benchmark.py
+    python request_benchmark.py --calls=200000 --mediaids=100
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from json import dumps
+from time import process_time
+from urllib.parse import urlencode
+
+from encodingcom.encoding import Encoding
+from encodingcom.request_builder import RequestBuilder
+
+
+class OfflineEncoding(Encoding):
+    """
+    Encoding answering every request with a canned GetStatus response
+    """
+
+    RESPONSE = {'response': {'id': '1', 'status': 'Processing', 'progress': '50'}}
+
+    def _send(self, body: str, header='') -> (int, dict):
+        return 200, OfflineEncoding.RESPONSE
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    arguments = {
+        '--calls': {
+            'required': False,
+            'type': int,
+            'default': 100000,
+            'help': 'Number of calls measured per variant (defaults to 100000)'
+        },
+
+        '--mediaids': {
+            'required': False,
+            'type': int,
+            'default': 1,
+            'help': 'Number of mediaids per get_status call (defaults to 1)'
+        },
+
+    }
+
+    parser = ArgumentParser()
+    for argument in arguments.keys():
+        parser.add_argument(argument, **arguments[argument])
+
+    return parser.parse_args()
+
+
+def legacy(service: Encoding, arguments: dict) -> str:
+    """
+    Request body as built before RequestBuilder
+
+    :param service: Encoding
+    :param arguments: dict
+    :return: url encoded form body
+    :rtype: str
+    """
+    request = service._setup_request('GetStatus', **arguments)
+    return urlencode({'json': dumps(request)})
+
+
+def measure(function, calls: int) -> float:
+    """
+    :param function:
+        Function called without arguments
+    :param calls: int
+    :return: CPU microseconds per call
+    :rtype: float
+    """
+    started = process_time()
+    for _ in range(calls):
+        function()
+    return (process_time() - started) * 1e6 / calls
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+    service = OfflineEncoding('12345', 'a' * 32)
+    arguments = {'mediaid': ','.join(str(10000000 + index) for index in range(args.mediaids)), 'extended': 'yes'}
+    builder = RequestBuilder(service.user_id, service.user_key, Encoding.default_notification_format, 'GetStatus')
+
+    assert legacy(service, arguments) == builder.build(arguments)[1]
+
+    results = [
+        ('legacy', measure(lambda: legacy(service, arguments), args.calls)),
+        ('compiled', measure(lambda: builder.build(arguments), args.calls)),
+        ('get_status', measure(lambda: service.get_status(**arguments), args.calls)),
+    ]
+
+    print('%d calls, %d mediaid(s) per call' % (args.calls, args.mediaids))
+    print('%-12s %12s' % ('VARIANT', 'CPU US/CALL'))
+    for name, cpu in results:
+        print('%-12s %12.2f' % (name, cpu))
+    print('compiled builder: %.0f%% less CPU per call than legacy' % (100 * (1 - results[1][1] / results[0][1])))
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
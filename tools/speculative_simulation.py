@@ -0,0 +1,113 @@
+#! /usr/bin/env python
+"""
+Evaluate speculative duplicate submission of straggler transcodes (encodingcom/speculative.py) on a modeled workload.
+
+The evaluation is a simulation, no call is made to encoding.com:
+* job durations are log-normal around a median, a share of the jobs land on slow encoder nodes
+* a job still running past a percentile of the durations gets a duplicate, within a budget of concurrent duplicates;
+  the percentile is learned from the jobs completed so far, as SpeculativeRunner does
+* the first copy to finish completes the job
+
+USAGE:
+    python speculative_simulation.py
+    * Compares the completion times with and without duplicates for the default model values
+
+    python speculative_simulation.py --slow-probability=0.05 --slow-factor=8 --percentile=0.95 --max-duplicates=10
+
+"""
+
+from argparse import ArgumentParser, Namespace
+
+from encodingcom.speculative import simulate
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    arguments = {
+        '--jobs': {
+            'required': False,
+            'type': int,
+            'default': 10000,
+            'help': 'Number of simulated jobs (defaults to 10000)'
+        },
+
+        '--arrival-rate': {
+            'required': False,
+            'type': float,
+            'default': 1.0,
+            'help': 'Jobs submitted per second (defaults to 1)'
+        },
+
+        '--median': {
+            'required': False,
+            'type': float,
+            'default': 300.0,
+            'help': 'Median job duration in seconds (defaults to 300)'
+        },
+
+        '--slow-probability': {
+            'required': False,
+            'type': float,
+            'default': 0.03,
+            'help': 'Probability of a job landing on a slow node (defaults to 0.03)'
+        },
+
+        '--slow-factor': {
+            'required': False,
+            'type': float,
+            'default': 5.0,
+            'help': 'Slowdown of a job on a slow node (defaults to 5)'
+        },
+
+        '--percentile': {
+            'required': False,
+            'type': float,
+            'default': 0.9,
+            'help': 'Percentile of the durations past which a job is duplicated (defaults to 0.9)'
+        },
+
+        '--max-duplicates': {
+            'required': False,
+            'type': int,
+            'default': 20,
+            'help': 'Maximum number of duplicates running at once (defaults to 20)'
+        },
+
+    }
+
+    parser = ArgumentParser()
+    for argument in arguments.keys():
+        parser.add_argument(argument, **arguments[argument])
+
+    return parser.parse_args()
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+    result = simulate(jobs=args.jobs, arrival_rate=args.arrival_rate, median=args.median,
+                      slow_probability=args.slow_probability, slow_factor=args.slow_factor,
+                      percentile_threshold=args.percentile, max_duplicates=args.max_duplicates)
+
+    print('duplicated past %.0fs (last learned threshold): %d of %d jobs (%.1f%% extra submissions)' %
+          (result['threshold'] or 0, result['duplicates'], args.jobs, 100.0 * result['duplicates'] / args.jobs))
+    print('%-12s %10s %10s %10s' % ('SUBMISSION', 'P50', 'P99', 'P99.9'))
+    for mode in ('baseline', 'speculative'):
+        values = result[mode]
+        print('%-12s %9.0fs %9.0fs %9.0fs' % (mode, values['p50'], values['p99'], values['p999']))
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)
@@ -0,0 +1,123 @@
+#! /usr/bin/env python
+"""
+Measure the startup time of the encodingcom command, against a bare interpreter.
+
+Each variant is run in a fresh interpreter several times, the median wall time is reported along with
+the overhead over a bare interpreter start.  Fails (exit status 1) when the overhead of the command
+exceeds the target, or when requests gets imported before any request is sent.
+
+USAGE:
+    python startup_benchmark.py
+    python startup_benchmark.py --runs=50 --target=40
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from os import environ
+from os.path import abspath, dirname
+from statistics import median
+from subprocess import DEVNULL, check_output, run
+from sys import executable
+from time import perf_counter
+
+
+# variant -> interpreter arguments
+VARIANTS = [
+    ('python', ['-c', 'pass']),
+    ('import encodingcom', ['-c', 'import encodingcom.encoding']),
+    ('encodingcom --help', ['-m', 'encodingcom.cli', '--help']),
+    ('encodingcom status --help', ['-m', 'encodingcom.cli', 'status', '--help']),
+]
+
+# prints the heavy modules loaded by the parsing of a subcommand
+LOADED = ('import sys\n'
+          'from argparse import ArgumentParser\n'
+          'from encodingcom.cli import ls_queue, job_status_monitor, cancel_media, media_status, submit_media\n'
+          'for module in (ls_queue, job_status_monitor, cancel_media, media_status, submit_media):\n'
+          '    module.add_arguments(ArgumentParser())\n'
+          'print(",".join(name for name in ("requests", "urllib3") if name in sys.modules))\n')
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    arguments = {
+        '--runs': {
+            'required': False,
+            'type': int,
+            'default': 20,
+            'help': 'Number of runs per variant (defaults to 20)'
+        },
+
+        '--target': {
+            'required': False,
+            'type': float,
+            'default': 60.0,
+            'help': 'Maximum overhead of "encodingcom status --help" over a bare interpreter, '
+                    'in milliseconds (defaults to 60)'
+        },
+
+    }
+
+    parser = ArgumentParser()
+    for argument in arguments.keys():
+        parser.add_argument(argument, **arguments[argument])
+
+    return parser.parse_args()
+
+
+def measure(arguments: [str], runs: int, env: dict) -> float:
+    """
+    :param arguments: [str]
+        Interpreter arguments
+    :param runs: int
+    :param env: dict
+        Environment of the runs
+    :return: median wall time of a run, in milliseconds
+    :rtype: float
+    """
+    times = []
+    for _ in range(runs):
+        started = perf_counter()
+        run([executable] + arguments, stdout=DEVNULL, stderr=DEVNULL, env=env, check=True)
+        times.append((perf_counter() - started) * 1000)
+    return median(times)
+
+
+def main(args: Namespace) -> int:
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return: exit status, 1 if the target is missed
+    :rtype: int
+    """
+    env = dict(environ, PYTHONPATH=dirname(dirname(abspath(__file__))))
+    # credentials given, so --user/--key are not required
+    env.setdefault('ENCODING_USER_ID', 'benchmark')
+    env.setdefault('ENCODING_USER_KEY', 'benchmark')
+
+    results = [(name, measure(arguments, args.runs, env)) for name, arguments in VARIANTS]
+    baseline = results[0][1]
+
+    print('%d runs per variant, median wall time' % args.runs)
+    print('%-28s %10s %10s' % ('VARIANT', 'MS', 'OVERHEAD'))
+    for name, elapsed in results:
+        print('%-28s %10.1f %10.1f' % (name, elapsed, elapsed - baseline))
+
+    loaded = check_output([executable, '-c', LOADED], env=env).decode('utf-8').strip()
+    overhead = results[-1][1] - baseline
+    print('heavy modules loaded before any request: %s' % (loaded or 'none'))
+    print('target: %.0fms overhead, %s' % (args.target, 'met' if overhead <= args.target else 'MISSED'))
+    return 0 if overhead <= args.target and not loaded else 1
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    exit(main(args))
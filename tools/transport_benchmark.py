@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+"""
+Compare the transports (see encodingcom/transport.py): per call CPU overhead and throughput.
+
+Encoding.get_status calls are sent through each transport to a local server answering a canned
+GetStatus response, run in a child process so that only the client CPU is measured.  The in-process
+transport answers without any network, it measures the overhead of Encoding itself.
+
+USAGE:
+    python transport_benchmark.py
+    python transport_benchmark.py --calls=20000 --threads=8 --delay=0.01
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pipe, Process
+from time import perf_counter, process_time
+
+from encodingcom.encoding import Encoding
+from encodingcom.local_server import LocalServer
+from encodingcom.transport import InProcessTransport, RequestsTransport, Urllib3Transport
+
+
+RESPONSE = b'{"response": {"id": "1", "status": "Processing", "progress": "50"}}'
+
+
+def get_args() -> Namespace:
+    """
+
+    :return: Arguments parsed from the ArgumentParser
+    :rtype: Namespace
+    """
+
+    arguments = {
+        '--calls': {
+            'required': False,
+            'type': int,
+            'default': 5000,
+            'help': 'Number of calls measured per transport (defaults to 5000)'
+        },
+
+        '--threads': {
+            'required': False,
+            'type': int,
+            'default': 1,
+            'help': 'Number of threads sharing the service (defaults to 1)'
+        },
+
+        '--delay': {
+            'required': False,
+            'type': float,
+            'default': 0.0,
+            'help': 'Seconds the server waits before answering, to model the network (defaults to 0)'
+        },
+
+    }
+
+    parser = ArgumentParser()
+    for argument in arguments.keys():
+        parser.add_argument(argument, **arguments[argument])
+
+    return parser.parse_args()
+
+
+def serve(connection, delay: float):
+    """
+    Run the local server until the connection receives anything, run in a child process
+
+    :param connection:
+        Pipe end the url of the server is sent to
+    :param delay: float
+    :return: None
+    """
+    with LocalServer(RESPONSE, delay=delay, keep_bodies=False) as server:
+        connection.send(server.url)
+        connection.recv()
+
+
+def measure(service: Encoding, calls: int, threads: int) -> (float, float):
+    """
+    :param service: Encoding
+    :param calls: int
+    :param threads: int
+    :return: CPU microseconds per call, calls per second
+    :rtype: (float, float)
+    """
+    # warm up: connections and compiled requests
+    for _ in range(threads):
+        service.get_status(mediaid='1')
+
+    started, cpu = perf_counter(), process_time()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: service.get_status(mediaid='1'), range(calls)))
+    elapsed, cpu = perf_counter() - started, process_time() - cpu
+    return cpu * 1e6 / calls, calls / elapsed
+
+
+def main(args: Namespace):
+    """
+    Main entry point used as a stand alone python execution
+
+    :param args: Namespace
+        arguments from the arguments parser
+    :return:
+    """
+    connection, child = Pipe()
+    server = Process(target=serve, args=(child, args.delay), daemon=True)
+    server.start()
+    url = connection.recv()
+
+    transports = [
+        ('requests', RequestsTransport(args.threads)),
+        ('urllib3', Urllib3Transport(args.threads)),
+        ('in-process', InProcessTransport(lambda url, body, headers: (200, RESPONSE), latency=args.delay)),
+    ]
+
+    results = []
+    try:
+        for name, transport in transports:
+            service = Encoding('12345', 'a' * 32, transport=transport)
+            service.url = url
+            results.append((name, measure(service, args.calls, args.threads)))
+            transport.close()
+    finally:
+        connection.send('stop')
+        server.join()
+
+    print('%d calls per transport, %d thread(s), %gs server delay' % (args.calls, args.threads, args.delay))
+    print('%-12s %12s %12s' % ('TRANSPORT', 'CPU US/CALL', 'CALLS/S'))
+    for name, (cpu, throughput) in results:
+        print('%-12s %12.1f %12.0f' % (name, cpu, throughput))
+
+
+if __name__ == '__main__':
+
+    args = get_args()
+    main(args)